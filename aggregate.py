@@ -0,0 +1,102 @@
+"""Daily aggregation of the 3-hourly forecast.
+
+The forecast columns are sorted by time, so each local day is one contiguous
+run of slots. Runs are found with bisect on the day column and every statistic
+is a single C-level min/max/sum/count over an array slice, with no per-slot
+Python work.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+from models import Forecast
+from tracing import traced
+
+@dataclass(slots=True)
+class DailySummary:
+    """Aggregated forecast for one local calendar day."""
+
+    day: date
+    temp_min: float
+    temp_max: float
+    temp_mean: float
+    precipitation: float  # mm over the day's slots
+    wind_max: float  # m/s
+    condition_id: int  # most frequent condition of the day
+    description: str
+    slots: int  # 3-hour slots covered; fewer than 8 for the first and last day
+
+# OpenWeatherMap rain codes for heavy, very heavy, freezing and heavy shower rain
+HEAVY_RAIN = frozenset({502, 503, 504, 511, 522, 531})
+
+def _severity(condition_id: int) -> Tuple[int, int]:
+    """Rank of a condition: thunderstorm > snow > heavy rain > rain > drizzle >
+    fog and haze > clouds by coverage > clear sky, then the id within a class."""
+    group = condition_id // 100
+    if group == 2:
+        rank = 7
+    elif group == 6:
+        rank = 6
+    elif group == 5:
+        rank = 5 if condition_id in HEAVY_RAIN else 4
+    elif group == 3:
+        rank = 3
+    elif group == 7:
+        rank = 2
+    elif condition_id == 800:
+        rank = 0
+    else:
+        rank = 1  # 801-804: few, scattered, broken, overcast clouds
+    return rank, condition_id
+
+def _dominant(forecast: Forecast, start: int, end: int) -> int:
+    """Index of a slot with the day's most frequent condition.
+
+    Ties go to the more severe condition, so a day split between a clear sky
+    and overcast is summarised as overcast, and one split between light and
+    heavy rain as heavy rain.
+    """
+    ids = forecast.condition_id[start:end]
+    condition_id = max(set(ids), key=lambda cid: (ids.count(cid), _severity(cid)))
+    return start + ids.index(condition_id)
+
+def _summarize(forecast: Forecast, start: int, end: int) -> DailySummary:
+    temps = forecast.temp[start:end]
+    dominant = _dominant(forecast, start, end)
+    return DailySummary(
+        day=forecast.slot_date(start),
+        temp_min=min(temps),
+        temp_max=max(temps),
+        temp_mean=sum(temps) / (end - start),
+        precipitation=sum(forecast.precipitation[start:end]),
+        wind_max=max(forecast.wind_speed[start:end]),
+        condition_id=forecast.condition_id[dominant],
+        description=forecast.description[dominant],
+        slots=end - start,
+    )
+
+@traced("aggregate.daily")
+def daily_summaries(forecast: Forecast, days: Optional[int] = None) -> List[DailySummary]:
+    """Summaries of the forecast's local days in order, at most ``days`` of them."""
+    summaries: List[DailySummary] = []
+    start, total = 0, len(forecast)
+    while start < total and (days is None or len(summaries) < days):
+        end = bisect_right(forecast.day, forecast.day[start], start)
+        summaries.append(_summarize(forecast, start, end))
+        start = end
+    return summaries
+
+@traced("aggregate.day")
+def summaries_for_day(forecasts: Sequence[Forecast], day: int) -> List[Optional[DailySummary]]:
+    """Summary of one local day (a date ordinal) for many forecasts, e.g. one per city.
+
+    Returns None for forecasts that do not cover that day.
+    """
+    summaries: List[Optional[DailySummary]] = []
+    for forecast in forecasts:
+        start = bisect_right(forecast.day, day - 1)
+        end = bisect_right(forecast.day, day, start)
+        summaries.append(_summarize(forecast, start, end) if end > start else None)
+    return summaries
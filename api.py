@@ -1,45 +1,582 @@
 """API interaction module for weather data."""
 
+import asyncio
+import contextvars
+import importlib.util
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, Awaitable, List, Optional, Sequence, Tuple, Union
+
 import httpx
-from typing import Dict, Any
-from config import OPENWEATHER_API_BASE, OPENWEATHER_API_KEY, USER_AGENT
+from config import (OPENWEATHER_API_BASE, OPENWEATHER_API_KEY, USER_AGENT,
+                    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED, HTTP_CONNECT_TIMEOUT,
+                    HTTP_DEFAULT_TIMEOUT, HTTP_ENDPOINT_TIMEOUTS, CACHE_TTLS,
+                    CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, TOOL_DEADLINE,
+                    UPSTREAM_CALLS_PER_MINUTE, UPSTREAM_BURST, UPSTREAM_CALLS_PER_DAY,
+                    UPSTREAM_MAX_QUEUE_WAIT, BATCH_MAX_CONCURRENCY,
+                    BATCH_DEADLINE, PERSISTENT_CACHE_PATH, PERSISTENT_CACHE_MAX_ENTRIES,
+                    PERSISTENT_CACHE_COMPACT_INTERVAL, CACHE_STALE_GRACE, CACHE_MAX_STALE_AGE,
+                    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, HEDGE_ENABLED,
+                    HEDGE_QUANTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY,
+                    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, SERVER_WORKERS,
+                    SHUTDOWN_DRAIN_TIMEOUT, UPSTREAM_MODE, UPSTREAM_ARCHIVE)
+from cache import TTLCache, cache_key, FRESH, STALE
+from decode import decode_response
+from geo import snap_coordinates
+from metrics import metrics
+from models import AirQuality, CurrentWeather, Forecast, with_stale_age
+from ratelimit import QuotaLimiter, RateLimited, ensure_flow
+from resilience import CircuitBreaker, LatencyTracker, decorrelated_jitter
+from tracing import annotate, span, traced
+
+if TYPE_CHECKING:
+    from store import PersistentCache
+
+logger = logging.getLogger(__name__)
+
+# Shared client, created on first use and closed by the server lifespan
+_client: Optional[httpx.AsyncClient] = None
+
+# Responses for the cacheable endpoints, keyed on endpoint and rounded coordinates
+response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_STALE_GRACE, CACHE_MAX_STALE_AGE)
+
+# Counters for decisions made outside the cache itself
+request_stats = {"stale_fallbacks": 0, "rate_limited_fallbacks": 0}
+
+# Optional on-disk layer below response_cache, opened on first use. The store
+# module, and sqlite3 with it, is only imported when one is configured;
+# _StoreError is then sqlite3.Error
+_store_path: Optional[str] = PERSISTENT_CACHE_PATH
+_store: Optional["PersistentCache"] = None
+_StoreError: Any = ()
+
+def _worker_limiter(workers: int) -> QuotaLimiter:
+    """Return a limiter holding one worker's equal share of the upstream budgets."""
+    return QuotaLimiter(UPSTREAM_CALLS_PER_MINUTE / workers, UPSTREAM_CALLS_PER_DAY / workers,
+                        max(1, UPSTREAM_BURST // workers), UPSTREAM_MAX_QUEUE_WAIT)
+
+# Minute and day budgets for requests that actually reach OpenWeatherMap;
+# cache hits are not limited. Worker processes of the HTTP server get equal shares
+upstream_limiter = _worker_limiter(SERVER_WORKERS)
+
+# Per-endpoint upstream health: recent latencies (for hedging) and circuit breakers
+_latencies: Dict[str, LatencyTracker] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+# Counters for retry, hedging and circuit breaker decisions
+resilience_stats = {"attempts": 0, "failed_attempts": 0, "retries": 0, "retries_exhausted": 0,
+                    "hedges": 0, "hedge_wins": 0, "short_circuits": 0}
+
+# Upstream requests currently in flight, keyed like the cache (single-flight)
+_inflight: Dict[Tuple[str, float, float], "asyncio.Task[Dict[str, Any]]"] = {}
+
+# Concurrency bound of the batch a request is made for. A hedge needs a free
+# slot of its own and is not sent without one
+_batch_slots: contextvars.ContextVar[Optional[asyncio.Semaphore]] = contextvars.ContextVar("batch_slots",
+                                                                                          default=None)
+
+def _http2_available() -> bool:
+    """HTTP/2 support in httpx needs the optional 'h2' package."""
+    return HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+
+def create_client() -> httpx.AsyncClient:
+    """Create an HTTP client with the configured pool and keep-alive settings."""
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(HTTP_DEFAULT_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    transport = None
+    if is_demo_mode():
+        # Demo answers are synthesized in OpenWeatherMap's format, so they are parsed and formatted like real ones
+        from demo import DemoTransport  # the demo module is only loaded in demo mode
+        transport = DemoTransport()
+    elif UPSTREAM_MODE != "live":
+        # Recording and replaying happen below the client, so everything above runs as usual
+        from replay import create_transport
+        transport = create_transport(UPSTREAM_MODE, httpx.AsyncHTTPTransport(
+            limits=limits, http2=_http2_available()), UPSTREAM_ARCHIVE)
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=_http2_available(),
+        headers={"User-Agent": USER_AGENT},
+        transport=transport,
+    )
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it if needed."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+async def close_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+def get_endpoint_timeout(endpoint: str) -> httpx.Timeout:
+    """Return the timeout to use for a given API endpoint."""
+    read = HTTP_ENDPOINT_TIMEOUTS.get(endpoint, HTTP_DEFAULT_TIMEOUT)
+    return httpx.Timeout(read, connect=HTTP_CONNECT_TIMEOUT)
+
+def get_store() -> Optional["PersistentCache"]:
+    """Return the persistent cache, opening it if one is configured."""
+    global _store, _StoreError
+    if _store is None and _store_path:
+        import sqlite3
+        from store import PersistentCache
+        _StoreError = sqlite3.Error
+        _store = PersistentCache(_store_path, PERSISTENT_CACHE_MAX_ENTRIES)
+    return _store
+
+def close_store() -> None:
+    """Close the persistent cache, if open."""
+    global _store
+    if _store is not None:
+        store, _store = _store, None
+        store.close()
+
+def configure_worker(workers: int, cache_db: Optional[str]) -> None:
+    """Take one of ``workers`` shares of the upstream budgets and use the
+    persistent cache at ``cache_db``, overriding what the environment set on
+    import. Call before the server starts."""
+    global upstream_limiter, _store_path
+    upstream_limiter = _worker_limiter(workers)
+    _store_path = cache_db
 
-async def make_weather_request(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+async def _compact_periodically(store: "PersistentCache") -> None:
+    """Background task keeping the persistent cache file bounded."""
+    while True:
+        try:
+            await asyncio.to_thread(store.compact)
+        except _StoreError as e:
+            logger.warning("Persistent cache compaction failed: %s", e)
+        await asyncio.sleep(PERSISTENT_CACHE_COMPACT_INTERVAL)
+
+async def drain(timeout: float = SHUTDOWN_DRAIN_TIMEOUT) -> None:
+    """Wait up to ``timeout`` seconds for in-flight upstream fetches, such as
+    background refreshes, so their responses still reach the caches."""
+    pending = list(_inflight.values())
+    if not pending:
+        return
+    logger.info("Waiting for %d upstream requests to finish", len(pending))
+    _, unfinished = await asyncio.wait(pending, timeout=timeout)
+    if unfinished:
+        logger.warning("%d upstream requests still running after %.0f s", len(unfinished), timeout)
+
+@asynccontextmanager
+async def lifespan(server: Any) -> AsyncIterator[None]:
+    """Server lifespan: open the shared client and persistent cache on startup;
+    on shutdown let in-flight upstream fetches finish, then close them."""
+    get_client()
+    store = get_store()
+    compactor = asyncio.create_task(_compact_periodically(store)) if store else None
+    try:
+        yield
+    finally:
+        if compactor is not None:
+            compactor.cancel()
+            await asyncio.gather(compactor, return_exceptions=True)
+        await drain()
+        await close_client()
+        close_store()
+
+def _request_cache_key(endpoint: str, params: Dict[str, Any]) -> Optional[Tuple[str, float, float]]:
+    """Return the cache key for a request, or None if it should not be cached."""
+    if endpoint not in CACHE_TTLS or "lat" not in params or "lon" not in params:
+        return None
+    return cache_key(endpoint, params["lat"], params["lon"])
+
+def is_error(result: Any) -> bool:
+    """True for the error dictionaries returned in place of a response."""
+    return isinstance(result, dict) and "error" in result
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss/eviction counters of the response cache."""
+    return dict(response_cache.stats(), **request_stats)
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    """Return the endpoint's circuit breaker, creating it on first use."""
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+    return breaker
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Return retry/hedge/short-circuit counters, breaker states and hedge thresholds."""
+    hedge_after = {endpoint: tracker.quantile(HEDGE_QUANTILE) for endpoint, tracker in _latencies.items()}
+    return dict(resilience_stats,
+                breakers={endpoint: breaker.stats() for endpoint, breaker in _breakers.items()},
+                hedge_after_ms={endpoint: None if value is None else round(value * 1000, 1)
+                                for endpoint, value in hedge_after.items()})
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    """Return budget, queue-depth and wait-time metrics of the upstream limiter."""
+    return upstream_limiter.stats()
+
+# Exported with the latency histograms whenever the metrics are read
+metrics.add_collector("cache", get_cache_stats)
+metrics.add_collector("ratelimit", get_rate_limit_stats)
+
+@traced("weather_request")
+async def make_weather_request(endpoint: str, params: Dict[str, Any]) -> Any:
     """Make a request to the OpenWeatherMap API with proper error handling.
+
+    Successful responses of the ``weather``, ``forecast`` and ``air_pollution``
+    endpoints are cached for the endpoint's TTL; coordinates within a few
+    kilometres of a known settlement are snapped onto it first. Concurrent
+    requests for the same endpoint and coordinates share a single upstream
+    request; cancelling one caller does not cancel the shared request.
+
+    Shortly after expiry a cached response is still returned immediately
+    while one background task refreshes it (stale-while-revalidate). If
+    upstream fails, a cached response up to CACHE_MAX_STALE_AGE old is
+    returned instead of the error, with its age in seconds in ``stale_age``.
+    The same copy is returned without waiting while the
+    upstream call budget is saturated.
     
     Args:
         endpoint: API endpoint (e.g., "weather", "forecast")
         params: Query parameters for the request
         
     Returns:
-        JSON response or error dictionary
+        The endpoint's model (see models.py), the decoded JSON for endpoints
+        without one, or an error dictionary
+    """
+    ensure_flow()
+    key = _request_cache_key(endpoint, params)
+    if key is None:
+        return await _fetch(endpoint, params, None)
+
+    # Coordinates close to a known settlement are requested and cached as that place
+    lat, lon = snap_coordinates(params["lat"], params["lon"])
+    if (lat, lon) != (params["lat"], params["lon"]):
+        params = dict(params, lat=lat, lon=lon)
+        key = cache_key(endpoint, lat, lon)
+
+    cached = response_cache.lookup(key)
+    annotate(endpoint=endpoint, cache=cached[1] if cached is not None else "miss")
+    if cached is not None:
+        data, state, age = cached
+        if state == FRESH:
+            return data
+        if state == STALE:
+            _shared_fetch(endpoint, params, key)
+            return data
+        if upstream_limiter.saturated() and key not in _inflight and not is_demo_mode():
+            # Out of budget for now: an old copy beats queueing for a token
+            request_stats["rate_limited_fallbacks"] += 1
+            return with_stale_age(data, age)
+
+    result = await asyncio.shield(_shared_fetch(endpoint, params, key))
+    if is_error(result) and cached is not None:
+        data, state, age = cached
+        request_stats["stale_fallbacks"] += 1
+        return with_stale_age(data, age)
+    return result
+
+def _shared_fetch(endpoint: str, params: Dict[str, Any], key: Tuple[str, float, float],
+                  upstream_only: bool = False) -> "asyncio.Task[Dict[str, Any]]":
+    """Return the in-flight task for key, starting one if none is running.
+
+    A new task checks the persistent cache first unless upstream_only is set.
     """
+    task = _inflight.get(key)
+    if task is None:
+        fetch = _fetch if upstream_only else _load_or_fetch
+        task = asyncio.ensure_future(fetch(endpoint, params, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _forget_inflight(key, done))
+    return task
+
+def _locate(endpoint: str, lat: float, lon: float) -> Tuple[Dict[str, Any], Tuple[str, float, float]]:
+    """Snap coordinates like make_weather_request and return (params, cache key)."""
+    lat, lon = snap_coordinates(lat, lon)
+    return {"lat": lat, "lon": lon}, cache_key(endpoint, lat, lon)
+
+def cache_expires_in(endpoint: str, lat: float, lon: float) -> Optional[float]:
+    """Seconds until the cached response for a location expires, or None if not cached."""
+    return response_cache.expires_in(_locate(endpoint, lat, lon)[1])
+
+async def refresh(endpoint: str, lat: float, lon: float) -> Any:
+    """Fetch a response from upstream and replace the cached copy, ignoring the cache.
+
+    Shares an already running request for the same key instead of starting another.
+    """
+    params, key = _locate(endpoint, lat, lon)
+    return await asyncio.shield(_shared_fetch(endpoint, params, key, upstream_only=True))
+
+def is_demo_mode() -> bool:
+    """True while the placeholder API key is configured, unless answers are replayed."""
+    return OPENWEATHER_API_KEY == "YOUR_API_KEY_HERE" and UPSTREAM_MODE != "replay"
+
+def _forget_inflight(key: Tuple[str, float, float], task: "asyncio.Task[Dict[str, Any]]") -> None:
+    """Done callback removing a finished request from the in-flight table."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        # Mark the exception as retrieved in case every waiter was cancelled
+        task.exception()
+
+async def _load_or_fetch(endpoint: str, params: Dict[str, Any],
+                         key: Tuple[str, float, float]) -> Any:
+    """Serve a memory-cache miss from the persistent cache, else from upstream."""
+    store = get_store()
+    if store is not None:
+        try:
+            with span("store.get", endpoint=endpoint):
+                stored = await asyncio.to_thread(store.get, key)
+        except _StoreError as e:
+            logger.warning("Persistent cache read failed: %s", e)
+            stored = None
+        if stored is not None:
+            payload, expires_at = stored
+            model = decode_response(endpoint, payload)
+            response_cache.set(key, model, expires_at - time.time(), model.nbytes)
+            return model
+    return await _fetch(endpoint, params, key)
+
+async def _remember(key: Tuple[str, float, float], endpoint: str, model: Any,
+                    payload: bytes) -> None:
+    """Cache a parsed response in memory and its raw JSON, if configured, on disk."""
+    ttl = CACHE_TTLS[endpoint]
+    response_cache.set(key, model, ttl, model.nbytes)
+    store = get_store()
+    if store is not None:
+        try:
+            await asyncio.to_thread(store.set, key, payload, ttl)
+        except _StoreError as e:
+            logger.warning("Persistent cache write failed: %s", e)
+
+async def _fetch(endpoint: str, params: Dict[str, Any],
+                 key: Optional[Tuple[str, float, float]]) -> Any:
+    """Perform the upstream request, parse it and cache a successful response under key.
+
+    Timeouts, connection errors and 5xx responses are retried up to
+    RETRY_MAX_ATTEMPTS times with decorrelated jitter. While the endpoint's
+    circuit breaker is open the request fails at once without reaching upstream.
+    """
+    params = dict(params)
     params["appid"] = OPENWEATHER_API_KEY
     params["units"] = "metric"  # Use Celsius
     params["lang"] = "tr"  # Turkish language for descriptions
     
     url = f"{OPENWEATHER_API_BASE}/{endpoint}"
-    headers = {"User-Agent": USER_AGENT}
-    
-    # Check if using placeholder API key
-    if OPENWEATHER_API_KEY == "YOUR_API_KEY_HERE":
-        return {
-            "error": "Demo mode: Please replace 'YOUR_API_KEY_HERE' with a valid OpenWeatherMap API key."
-        }
+    # Demo answers are made locally and cost no quota
+    demo = is_demo_mode()
     
-    async with httpx.AsyncClient() as client:
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        resilience_stats["short_circuits"] += 1
+        metrics.count_error("upstream", endpoint, "circuit_open")
+        return {"error": f"Circuit open: {endpoint} requests are failing, retrying in "
+                         f"{breaker.retry_in():.0f} s"}
+
+    delay = RETRY_BASE_DELAY
+    for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
         try:
-            response = await client.get(url, params=params, headers=headers, timeout=30.0)
+            if not demo:
+                with span("ratelimit.acquire"):
+                    await upstream_limiter.acquire()
+        except RateLimited as e:
+            metrics.count_error("upstream", endpoint, "rate_limited")
+            return {"error": f"Rate limit reached: {e}"}
+        resilience_stats["attempts"] += 1
+        try:
+            response = await _hedged_get(endpoint, url, params)
             response.raise_for_status()
-            return response.json()
+            with span("decode", bytes=len(response.content)):
+                data = decode_response(endpoint, response.content)
         except httpx.HTTPStatusError as e:
-            return {"error": f"HTTP error: {e.response.status_code} - {e.response.text}"}
+            status = e.response.status_code
+            metrics.count_error("upstream", endpoint, "http_429" if status == 429 else f"http_{status // 100}xx")
+            if status == 429:
+                upstream_limiter.throttle(_retry_after(e.response))
+            error = {"error": f"HTTP error: {status} - {e.response.text}"}
+            if status < 500:
+                # Upstream answered; the request itself is at fault (bad key, unknown place, quota)
+                breaker.record_success()
+                return error
         except httpx.RequestError as e:
-            return {"error": f"Request error: {str(e)}"}
+            metrics.count_error("upstream", endpoint,
+                                "timeout" if isinstance(e, httpx.TimeoutException) else "connection")
+            error = {"error": f"Request error: {str(e)}"}
         except Exception as e:
+            metrics.count_error("upstream", endpoint, type(e).__name__)
             return {"error": f"An unexpected error occurred: {str(e)}"}
+        else:
+            breaker.record_success()
+            if key is not None:
+                await _remember(key, endpoint, data, response.content)
+            return data
+
+        # Timeouts, connection errors and 5xx are transient: back off and retry
+        resilience_stats["failed_attempts"] += 1
+        breaker.record_failure()
+        if attempt == RETRY_MAX_ATTEMPTS or not breaker.allow():
+            resilience_stats["retries_exhausted"] += 1
+            return error
+        resilience_stats["retries"] += 1
+        delay = decorrelated_jitter(delay, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+        await asyncio.sleep(delay)
+    return error
+
+@traced("upstream.get")
+async def _hedged_get(endpoint: str, url: str, params: Dict[str, Any]) -> httpx.Response:
+    """GET url, sending a second identical request if the first is slower than usual.
+
+    The hedge goes out once the endpoint's recent HEDGE_QUANTILE latency has
+    passed, and only if it can be sent without waiting for the rate limiter or,
+    within a batch, for a free slot of the batch's concurrency bound. The first
+    response to arrive is returned and the other request is cancelled.
+    """
+    annotate(endpoint=endpoint)
+    client = get_client()
+    timeout = get_endpoint_timeout(endpoint)
+    tracker = _latencies.get(endpoint)
+    if tracker is None:
+        tracker = _latencies[endpoint] = LatencyTracker(min_samples=HEDGE_MIN_SAMPLES)
+    hedge_after = tracker.quantile(HEDGE_QUANTILE) if HEDGE_ENABLED else None
+
+    slots = _batch_slots.get()
+    hedge_slot = False
+
+    start = time.perf_counter()
+    first = asyncio.ensure_future(client.get(url, params=params, timeout=timeout))
+    pending = {first}
+    metrics.in_flight[("upstream", endpoint)] += 1
+    try:
+        if hedge_after is not None:
+            done, _ = await asyncio.wait(pending, timeout=max(hedge_after, HEDGE_MIN_DELAY))
+            # Like the first request, a demo hedge is answered locally and costs no quota
+            if (not done and not (slots is not None and slots.locked())
+                    and (is_demo_mode() or upstream_limiter.try_acquire())):
+                if slots is not None:
+                    await slots.acquire()  # a slot is free, so this returns at once
+                    hedge_slot = True
+                resilience_stats["hedges"] += 1
+                annotate(hedged=True)
+                pending.add(asyncio.ensure_future(client.get(url, params=params, timeout=timeout)))
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            task = done.pop()
+            # A failed request only decides the outcome once no other one is left
+            if task.exception() is None or not pending:
+                if task is not first and task.exception() is None:
+                    resilience_stats["hedge_wins"] += 1
+                if task.exception() is None:
+                    tracker.record(time.perf_counter() - start)
+                    annotate(status=task.result().status_code)
+                return task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        metrics.in_flight[("upstream", endpoint)] -= 1
+        metrics.observe("upstream", endpoint, time.perf_counter() - start)
+        try:
+            # A cancelled request holds its connection until it has unwound
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            if hedge_slot:
+                slots.release()
+
+def _retry_after(response: httpx.Response, default: float = 60.0) -> float:
+    """Seconds to back off after a 429, from the Retry-After header if it is numeric."""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return default
+
+async def fetch_all(*fetches: Awaitable[Any], timeout: float = TOOL_DEADLINE,
+                    fail_fast: bool = False) -> List[Any]:
+    """Run independent API fetches concurrently under one shared deadline.
+
+    Fetches still running when the deadline passes are cancelled and yield an
+    error dictionary, so callers can build a partial result from the rest.
+    Pending fetches are also cancelled if the caller itself is cancelled.
+
+    Args:
+        fetches: Awaitables returning API responses (e.g. get_current_weather(...))
+        timeout: Deadline in seconds for all fetches together
+        fail_fast: Cancel the remaining fetches as soon as the first one returns an error
+
+    Returns:
+        One response or error dictionary per fetch, in the given order
+    """
+    ensure_flow()  # the fetches queue for upstream tokens as one flow
+    tasks = [asyncio.ensure_future(fetch) for fetch in fetches]
+    deadline = asyncio.get_running_loop().time() + timeout
+    pending = set(tasks)
+    reason = f"deadline of {timeout:g} s exceeded"
+    try:
+        while pending:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            primary = tasks[0]
+            if (fail_fast and primary in done and not primary.exception()
+                    and is_error(primary.result())):
+                reason = "an earlier request failed"
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for task in tasks:
+        if task in pending:
+            results.append({"error": f"Request cancelled: {reason}"})
+        elif task.exception() is not None:
+            results.append({"error": f"An unexpected error occurred: {str(task.exception())}"})
+        else:
+            results.append(task.result())
+    return results
+
+async def fetch_batch(jobs: Sequence[Tuple[str, float, float]],
+                      concurrency: Optional[int] = None,
+                      timeout: float = BATCH_DEADLINE) -> List[Any]:
+    """Fetch many (endpoint, lat, lon) jobs with bounded concurrency.
+
+    At most ``concurrency`` requests are in flight at once across all jobs,
+    whatever their endpoints and hedged requests included; each request still
+    goes through the cache, single-flight and upstream rate limiter.
+
+    Args:
+        jobs: (endpoint, lat, lon) triples, e.g. ("weather", 41.0, 29.0)
+        concurrency: Maximum number of requests in flight (default BATCH_MAX_CONCURRENCY)
+        timeout: Deadline in seconds for the whole batch
+
+    Returns:
+        One response or error dictionary per job, in the given order
+    """
+    semaphore = asyncio.Semaphore(concurrency or BATCH_MAX_CONCURRENCY)
+
+    async def fetch_one(endpoint: str, lat: float, lon: float) -> Any:
+        async with semaphore:
+            _batch_slots.set(semaphore)  # each job runs in its own task and context
+            return await make_weather_request(endpoint, {"lat": lat, "lon": lon})
+
+    return await fetch_all(*(fetch_one(*job) for job in jobs), timeout=timeout)
+
+async def fetch_many(endpoint: str, coordinates: List[Tuple[float, float]],
+                     concurrency: Optional[int] = None,
+                     timeout: float = BATCH_DEADLINE) -> List[Any]:
+    """Fetch one endpoint for many (lat, lon) locations, like fetch_batch."""
+    return await fetch_batch([(endpoint, lat, lon) for lat, lon in coordinates], concurrency, timeout)
 
-async def get_current_weather(lat: float, lon: float) -> Dict[str, Any]:
+async def get_current_weather(lat: float, lon: float) -> Union[CurrentWeather, Dict[str, Any]]:
     """Get current weather for a specific location.
     
     Args:
@@ -47,11 +584,11 @@ async def get_current_weather(lat: float, lon: float) -> Dict[str, Any]:
         lon: Longitude
         
     Returns:
-        Current weather data
+        CurrentWeather model or error dictionary
     """
     return await make_weather_request("weather", {"lat": lat, "lon": lon})
 
-async def get_weather_forecast(lat: float, lon: float) -> Dict[str, Any]:
+async def get_weather_forecast(lat: float, lon: float) -> Union[Forecast, Dict[str, Any]]:
     """Get weather forecast for a specific location.
     
     Args:
@@ -59,11 +596,11 @@ async def get_weather_forecast(lat: float, lon: float) -> Dict[str, Any]:
         lon: Longitude
         
     Returns:
-        Forecast weather data
+        Forecast model or error dictionary
     """
     return await make_weather_request("forecast", {"lat": lat, "lon": lon})
 
-async def get_air_quality(lat: float, lon: float) -> Dict[str, Any]:
+async def get_air_quality(lat: float, lon: float) -> Union[AirQuality, Dict[str, Any]]:
     """Get air quality data for a specific location.
     
     Args:
@@ -71,6 +608,6 @@ async def get_air_quality(lat: float, lon: float) -> Dict[str, Any]:
         lon: Longitude
         
     Returns:
-        Air quality data
+        AirQuality model or error dictionary
     """
     return await make_weather_request("air_pollution", {"lat": lat, "lon": lon})
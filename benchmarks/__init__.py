@@ -0,0 +1,4 @@
+"""Benchmarks for the weather MCP server.
+
+Run a benchmark from the repository root, e.g. ``python -m benchmarks.bench_client_pool``.
+"""
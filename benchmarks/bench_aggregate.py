@@ -0,0 +1,79 @@
+"""Daily forecast aggregation: array-slice engine vs grouping the raw JSON slot by slot.
+
+Checks that both produce the same min/max/mean/precipitation/peak wind for
+every day, then times one city and a batch of all 81 provinces.
+
+Usage: python -m benchmarks.bench_aggregate
+"""
+
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from aggregate import daily_summaries, summaries_for_day
+from benchmarks.mock_owm import forecast_payload
+from gazetteer import get_gazetteer
+from models import TURKEY_TZ, Forecast, parse_response
+
+def naive_daily(data: Dict[str, Any]) -> List[Dict[str, float]]:
+    """Per-slot dictionary walk, grouping on datetime.fromtimestamp."""
+    days: Dict[Any, Dict[str, Any]] = defaultdict(lambda: {"temps": [], "precipitation": 0.0, "wind": 0.0})
+    for item in data["list"]:
+        day = days[datetime.fromtimestamp(item["dt"], TURKEY_TZ).date()]
+        day["temps"].append(item["main"]["temp"])
+        day["precipitation"] += item.get("rain", {}).get("3h", 0.0) + item.get("snow", {}).get("3h", 0.0)
+        day["wind"] = max(day["wind"], item["wind"]["speed"])
+    return [{"day": key, "min": min(v["temps"]), "max": max(v["temps"]),
+             "mean": sum(v["temps"]) / len(v["temps"]), "precipitation": v["precipitation"], "wind": v["wind"]}
+            for key, v in days.items()]
+
+def check_ties() -> None:
+    """Days split evenly between two conditions are summarised as the more severe one."""
+    start = 1_700_000_000 // 86400 * 86400 - 3 * 3600  # local midnight in Turkey
+    cases = [((800, "açık"), (804, "kapalı"), 804),
+             ((500, "hafif yağmur"), (502, "şiddetli yağmur"), 502),
+             ((520, "hafif sağanak"), (500, "hafif yağmur"), 520),
+             ((300, "çisenti"), (600, "hafif kar"), 600),
+             ((741, "sis"), (211, "gök gürültülü fırtına"), 211)]
+    for first, second, expected in cases:
+        slots = [(start + i * 3 * 3600, 10.0, 50, 2.0, 0.0, *(first if i % 2 else second)) for i in range(8)]
+        summary, = daily_summaries(Forecast.from_slots(slots))
+        assert summary.condition_id == expected, (first, second, summary)
+    print("ties between conditions go to the more severe one")
+
+def timed(label: str, fn: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1e6
+    print(f"{label:<44} {elapsed:9.1f} µs")
+    return elapsed
+
+def main() -> None:
+    places = list(get_gazetteer().provinces.values())
+    raw = [forecast_payload(place["lat"], place["lon"]) for place in places]
+    forecasts = [parse_response("forecast", data) for data in raw]
+
+    for expected, summary in zip(naive_daily(raw[0]), daily_summaries(forecasts[0])):
+        assert expected["day"] == summary.day
+        for key, value in (("min", summary.temp_min), ("max", summary.temp_max), ("mean", summary.temp_mean),
+                           ("precipitation", summary.precipitation), ("wind", summary.wind_max)):
+            assert math.isclose(expected[key], value), (key, expected, summary)
+    print("array engine matches the per-slot walk on every day")
+    check_ties()
+
+    naive = timed("one city, per-slot dict walk", lambda: naive_daily(raw[0]), 2000)
+    engine = timed("one city, array slices", lambda: daily_summaries(forecasts[0]), 2000)
+    print(f"{'':<44} {naive / engine:8.1f}x")
+    tomorrow = forecasts[0].day[0] + 1
+    naive = timed(f"{len(raw)} cities, per-slot dict walk", lambda: [naive_daily(data) for data in raw], 50)
+    engine = timed(f"{len(raw)} cities, array slices",
+                   lambda: [daily_summaries(forecast) for forecast in forecasts], 50)
+    print(f"{'':<44} {naive / engine:8.1f}x")
+    timed(f"{len(raw)} cities, tomorrow only (summaries_for_day)",
+          lambda: summaries_for_day(forecasts, tomorrow), 50)
+
+if __name__ == "__main__":
+    main()
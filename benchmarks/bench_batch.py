@@ -0,0 +1,102 @@
+"""Throughput of the multi-city batch tool for 81 locations against the local stub.
+
+The 81 locations are spread on a grid over Turkey so every one is a distinct
+cache key. By default the upstream rate limiter is lifted to measure raw
+fan-out throughput; pass --rate-limit to run with the configured limit.
+A cold run with tomorrow's outlook fetches both endpoints for every location,
+with some answers slow enough to be hedged, and must never have more than
+--concurrency requests in flight upstream, hedges included. They are counted
+in the client's transport, from sending a request until it returns or has
+been cancelled.
+
+Usage: python -m benchmarks.bench_batch [--latency SECONDS] [--concurrency N] [--rate-limit]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+import api
+import weather
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from ratelimit import QuotaLimiter
+
+def province_grid(count: int = 81):
+    """Distinct coordinates covering Turkey's bounding box."""
+    rows, cols = 9, 9
+    points = []
+    for i in range(rows):
+        for j in range(cols):
+            points.append(f"{36.0 + i * 0.7:.2f},{26.0 + j * 2.1:.2f}")
+    return points[:count]
+
+async def run(locations, label: str, tomorrow: bool = False) -> float:
+    start = time.perf_counter()
+    report = await weather.coklu_sehir_hava_durumu(locations, yarin=tomorrow)
+    elapsed = time.perf_counter() - start
+    assert f"({len(locations)}/{len(locations)} konum)" in report, report[:300]
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(locations) / elapsed:9.1f} locations/s")
+    return elapsed
+
+class InFlight:
+    """Counts the requests inside httpx's transport while installed."""
+
+    def __init__(self) -> None:
+        self.current = 0
+        self.peak = 0
+        self._handle = httpx.AsyncHTTPTransport.handle_async_request
+
+    def __enter__(self) -> "InFlight":
+        handle = self._handle
+
+        async def counted(transport: httpx.AsyncHTTPTransport, request: httpx.Request) -> httpx.Response:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+            try:
+                return await handle(transport, request)
+            finally:
+                self.current -= 1
+
+        httpx.AsyncHTTPTransport.handle_async_request = counted
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        httpx.AsyncHTTPTransport.handle_async_request = self._handle
+
+async def main(latency: float, concurrency: int, rate_limit: bool) -> None:
+    if not rate_limit:
+        api.upstream_limiter = QuotaLimiter(per_minute=1e9, per_day=1e12)
+    api.BATCH_MAX_CONCURRENCY = concurrency
+    locations = province_grid()
+
+    with MockOWMServer(latency=latency) as server:
+        use_mock(server)
+        await api.make_weather_request("weather", {"q": "warm-up"})
+        server.reset()
+        print(f"{len(locations)} locations, upstream latency {latency * 1000:.0f} ms, "
+              f"concurrency {concurrency}, rate limit {'on' if rate_limit else 'off'}")
+        await run(locations, "cold cache")
+        print(f"{'':<28} upstream calls: {server.hits['weather']}")
+        await run(locations, "warm cache")
+        # Shifted coordinates: both endpoints are cold for every location
+        shifted = [f"{float(lat) + 0.3:.2f},{lon}" for lat, lon in (point.split(",") for point in locations)]
+        server.reset()
+        # Every tenth answer is slow, so requests are hedged while the batch is in full swing
+        server.tail_rate, server.tail_latency = 0.1, max(4 * latency, api.HEDGE_MIN_DELAY * 3)
+        hedges = api.resilience_stats["hedges"]
+        with InFlight() as in_flight:
+            await run(shifted, "cold cache, with tomorrow", tomorrow=True)
+        print(f"{'':<28} upstream calls: {server.hits['weather']} weather, {server.hits['forecast']} forecast, "
+              f"{api.resilience_stats['hedges'] - hedges} hedged, at most {in_flight.peak} in flight")
+        assert in_flight.peak <= concurrency, f"{in_flight.peak} requests in flight"
+        await api.close_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.concurrency, args.rate_limit))
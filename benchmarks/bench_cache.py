@@ -0,0 +1,35 @@
+"""Measure tool latency with a cold and a warm response cache.
+
+Usage: python -m benchmarks.bench_cache [--calls N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import api
+import weather
+from benchmarks.mock_owm import MockOWMServer, use_mock
+
+async def main(calls: int) -> None:
+    with MockOWMServer() as server:
+        use_mock(server)
+        samples = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            await weather.hava_durumu_sehir("istanbul")
+            samples.append((time.perf_counter() - start) * 1000)
+        await api.close_client()
+
+    print(f"{calls} sequential hava_durumu_sehir('istanbul') calls")
+    print(f"cold call       {samples[0]:8.3f} ms")
+    print(f"warm calls      {statistics.mean(samples[1:]):8.3f} ms mean")
+    print(f"upstream calls  {dict(server.hits)}")
+    print(f"cache stats     {api.get_cache_stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
@@ -0,0 +1,60 @@
+"""Compare per-call latency of a shared pooled client with a client per request.
+
+Usage: python -m benchmarks.bench_client_pool [--calls N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+import api
+from benchmarks.mock_owm import MockOWMServer, use_mock
+
+async def legacy_request(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """The previous behaviour: a brand-new AsyncClient for every call."""
+    params = dict(params, appid=api.OPENWEATHER_API_KEY, units="metric", lang="tr")
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{api.OPENWEATHER_API_BASE}/{endpoint}", params=params, timeout=30.0)
+        response.raise_for_status()
+        return response.json()
+
+async def measure(request, calls: int) -> List[float]:
+    samples = []
+    for i in range(calls):
+        params = {"lat": 41.0 + i * 0.001, "lon": 29.0}
+        start = time.perf_counter()
+        await request("weather", params)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(name: str, samples: List[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<22} mean {statistics.mean(samples):7.3f} ms   "
+          f"p50 {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms")
+
+async def main(calls: int) -> None:
+    with MockOWMServer() as server:
+        use_mock(server)
+        # Warm up both paths so one-off import costs are not measured
+        await legacy_request("weather", {"lat": 0, "lon": 0})
+        await api.make_weather_request("weather", {"lat": 0, "lon": 0})
+
+        legacy = await measure(legacy_request, calls)
+        shared = await measure(api.make_weather_request, calls)
+        await api.close_client()
+
+    print(f"{calls} sequential calls against {server.base_url}")
+    report("client per request", legacy)
+    report("shared pooled client", shared)
+    print(f"speed-up (mean): {statistics.mean(legacy) / statistics.mean(shared):.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
@@ -0,0 +1,63 @@
+"""Response decoding: stdlib json vs orjson vs msgspec schema projection.
+
+Checks that every available decoder yields the same models, then reports,
+per endpoint, the time to turn a response body into its model and the peak
+memory allocated while doing so. Decoders that are not installed are skipped.
+
+Usage: python -m benchmarks.bench_decode
+"""
+
+import importlib.util
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+import decode
+from benchmarks.mock_owm import PAYLOADS
+from models import parse_response
+
+def decoders() -> Dict[str, Callable[[str, bytes], Any]]:
+    found: Dict[str, Callable[[str, bytes], Any]] = {
+        "json + parse": lambda endpoint, body: parse_response(endpoint, json.loads(body)),
+    }
+    if importlib.util.find_spec("orjson") is not None:
+        import orjson
+        found["orjson + parse"] = lambda endpoint, body: parse_response(endpoint, orjson.loads(body))
+    if importlib.util.find_spec("msgspec") is not None:
+        projections = decode._build_projections()
+        found["msgspec projection"] = lambda endpoint, body: projections[endpoint](body)
+    return found
+
+def peak(fn: Callable[[], Any]) -> int:
+    """Peak bytes allocated while fn() runs."""
+    tracemalloc.start()
+    fn()
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+def main() -> None:
+    bodies = {endpoint: json.dumps(build(39.93, 32.86)).encode() for endpoint, build in PAYLOADS.items()}
+    candidates = decoders()
+    for endpoint, body in bodies.items():
+        expected = parse_response(endpoint, json.loads(body))
+        for name, fn in candidates.items():
+            assert fn(endpoint, body) == expected, (endpoint, name)
+    print(f"{len(candidates)} decoders produce identical models (active: {decode.DECODER})")
+
+    for endpoint, body in bodies.items():
+        print(f"\n{endpoint} ({len(body)} bytes)")
+        baseline = None
+        for name, fn in candidates.items():
+            repeat = 2000
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn(endpoint, body)
+            elapsed = (time.perf_counter() - start) / repeat * 1e6
+            baseline = baseline or elapsed
+            memory = peak(lambda: fn(endpoint, body))
+            print(f"  {name:<20} {elapsed:8.1f} µs  {baseline / elapsed:5.1f}x  peak {memory / 1024:6.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Demo data: determinism, plausibility and generation speed.
+
+Checks that:
+
+* two separate stdio servers without an API key give identical answers to
+  a seeded mix of tool calls, and that WEATHER_DEMO_SEED changes them;
+* a place's payloads only change with the time bucket, and every
+  province's payloads decode into sensible models;
+* demo requests, hedged ones included, take nothing from the upstream quota;
+
+then reports how long building, encoding and decoding a payload takes with
+and without the generator's caches, and the throughput of in-process tool
+calls on demo data.
+
+Usage: python -m benchmarks.bench_demo [calls]
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import sys
+import time
+from typing import Any, Callable
+
+import demo
+from benchmarks.bench_replay import run_session
+from benchmarks.loadgen import DEMO_KEY, WORKLOAD, plan
+from config import DEMO_TIME_BUCKET
+from decode import decode_response
+from gazetteer import get_gazetteer
+
+ANKARA = (39.93, 32.86)
+# Tools whose answers are built from weather data
+WEATHER_TOOLS = {"hava_durumu", "hava_durumu_sehir", "saatlik_hava_durumu", "hava_kalitesi",
+                 "sehirler_karsilastir", "havadurumu_aktivite_onerileri", "coklu_sehir_hava_durumu"}
+
+def per_call_us(fn: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def check_payloads() -> None:
+    provinces = list(get_gazetteer().provinces.values())
+    now = time.time()
+    for place in provinces:
+        for endpoint in demo.PAYLOADS:
+            payload = demo.demo_payload(endpoint, place["lat"], place["lon"], now)
+            assert payload == demo.demo_payload(endpoint, place["lat"], place["lon"], now + 1), endpoint
+            model = decode_response(endpoint, json.dumps(payload).encode())
+            if endpoint == "weather":
+                assert -30 < model.temp < 50 and 0 < model.humidity <= 100, (place["name"], model)
+            elif endpoint == "forecast":
+                assert len(model) == demo.FORECAST_SLOTS, len(model)
+            else:
+                assert 1 <= model.aqi <= 5, model
+    changed = [demo.demo_payload("weather", ANKARA[0], ANKARA[1], now + hours * DEMO_TIME_BUCKET)
+               for hours in range(24)]
+    assert len({json.dumps(payload["main"]) for payload in changed}) > 12, "demo weather barely changes"
+    print(f"payloads of all {len(provinces)} provinces are stable within a time bucket and decode")
+
+def report_speed() -> None:
+    now = time.time()
+    provinces = list(get_gazetteer().provinces.values())
+    for endpoint in demo.PAYLOADS:
+        body = json.dumps(demo.demo_payload(endpoint, *ANKARA, now)).encode()
+
+        def fresh() -> None:
+            demo.conditions.cache_clear()
+            demo._day.cache_clear()
+            demo.demo_payload(endpoint, *ANKARA, now)
+
+        cold = per_call_us(fresh, 200)
+        warm = per_call_us(lambda: demo.demo_payload(endpoint, *ANKARA, now), 2000)
+        encode = per_call_us(lambda: json.dumps(demo.demo_payload(endpoint, *ANKARA, now),
+                                                ensure_ascii=False, separators=(",", ":")), 1000)
+        decoded = per_call_us(lambda: decode_response(endpoint, body), 1000)
+        print(f"  {endpoint:<14} build {cold:8.1f} µs uncached, {warm:7.1f} µs cached, "
+              f"build + encode {encode:7.1f} µs, decode {decoded:7.1f} µs")
+    start = time.perf_counter()
+    for place in provinces:
+        for endpoint in demo.PAYLOADS:
+            demo.demo_payload(endpoint, place["lat"], place["lon"], now)
+    print(f"  all endpoints for {len(provinces)} provinces: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+async def check_determinism(count: int) -> None:
+    calls = plan(sorted(WORKLOAD), count, cities=10, seed=3)
+    env = {"OPENWEATHER_API_KEY": DEMO_KEY, "WEATHER_UPSTREAM": "live"}
+    first, _ = await run_session(env, calls)
+    second, _ = await run_session(env, calls)
+    reseeded, _ = await run_session(dict(env, WEATHER_DEMO_SEED="1"), calls)
+    different = [tool for (tool, _), a, b in zip(calls, first, second) if a != b]
+    assert not different, f"demo answers differ between processes for {different[:5]}"
+    assert all("DEMO MODU" in text for (tool, _), text in zip(calls, first) if tool in WEATHER_TOOLS)
+    assert first != reseeded, "WEATHER_DEMO_SEED does not change the demo data"
+    print(f"{count} tool calls answered identically by two processes; another seed changes them")
+
+async def check_quota(requests: int = 300) -> None:
+    import api
+    import weather
+    api.OPENWEATHER_API_KEY = DEMO_KEY
+    answer = demo.DemoTransport.handle_async_request
+    # Every 20th answer is slow, so hedged requests go out
+    delays = itertools.cycle([0.001] * 19 + [0.05])
+
+    async def slow_answer(self: demo.DemoTransport, request: Any) -> Any:
+        await asyncio.sleep(next(delays))
+        return await answer(self, request)
+
+    demo.DemoTransport.handle_async_request = slow_answer
+    hedge_min_delay, api.HEDGE_MIN_DELAY = api.HEDGE_MIN_DELAY, 0.0
+    hedges = api.resilience_stats["hedges"]
+    acquired = api.upstream_limiter.stats()["acquired"]
+    api.response_cache.clear()
+    try:
+        async with api.lifespan(weather.mcp):
+            for tool, arguments in plan(sorted(WORKLOAD), requests, cities=81, seed=5):
+                await weather.mcp.call_tool(tool, arguments)
+    finally:
+        demo.DemoTransport.handle_async_request = answer
+        api.HEDGE_MIN_DELAY = hedge_min_delay
+    hedges = api.resilience_stats["hedges"] - hedges
+    assert hedges, "no request was hedged"
+    assert api.upstream_limiter.stats()["acquired"] == acquired, "demo requests used the upstream quota"
+    print(f"{requests} demo tool calls with {hedges} hedged requests used no upstream quota")
+
+async def tool_throughput(requests: int = 2000) -> float:
+    import api
+    import weather
+    api.OPENWEATHER_API_KEY = DEMO_KEY
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # it logs every request at INFO
+    calls = plan(sorted(WORKLOAD), requests, cities=81, seed=5)
+    async with api.lifespan(weather.mcp):
+        start = time.perf_counter()
+        for tool, arguments in calls:
+            await weather.mcp.call_tool(tool, arguments)
+        return requests / (time.perf_counter() - start)
+
+async def main(count: int) -> None:
+    check_payloads()
+    await check_determinism(count)
+    print("demo payloads:")
+    report_speed()
+    rate = await tool_throughput()
+    print(f"in-process tool calls on demo data, 81 provinces: {rate:.0f} calls/s")
+    await check_quota()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 60))
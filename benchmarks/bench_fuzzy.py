@@ -0,0 +1,75 @@
+"""Microbenchmark of typo-tolerant place resolution over a corpus of misspellings.
+
+Resolves the corpus against the bundled gazetteer with every district, then
+times misspelled lookups against gazetteers padded with synthetic,
+pronounceable place names, which share trigrams with real ones the way
+village names do. Fails if a lookup in the bundled gazetteer takes 1 ms or more.
+
+Usage: python -m benchmarks.bench_fuzzy
+"""
+
+import random
+import timeit
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.bench_gazetteer import padded_gazetteer
+from fuzzy import FuzzyIndex, get_fuzzy_index, resolve_place
+from gazetteer import get_gazetteer
+
+# (misspelling, expected place name)
+CORPUS = [
+    ("Istambul", "İstanbul"), ("istnbul", "İstanbul"), ("Ankra", "Ankara"), ("Anakara", "Ankara"),
+    ("izmır", "İzmir"), ("Izmirr", "İzmir"), ("Gazıantep", "Gaziantep"), ("Gaziantap", "Gaziantep"),
+    ("Eskisehr", "Eskişehir"), ("Eskişeir", "Eskişehir"), ("Diyarbekir", "Diyarbakır"),
+    ("Trabzn", "Trabzon"), ("Erzrum", "Erzurum"), ("Kayserı", "Kayseri"), ("Samsunn", "Samsun"),
+    ("Mugla", "Muğla"), ("Kahraman Maras", "Kahramanmaraş"), ("Sanli urfa", "Şanlıurfa"),
+    ("Afyon Karahisar", "Afyonkarahisar"), ("Canakale", "Çanakkale"), ("Tekirdag", "Tekirdağ"),
+    ("Kirikale", "Kırıkkale"), ("Kadikoi", "Kadıköy, İstanbul"), ("Uskudar", "Üsküdar, İstanbul"),
+    ("Besiktas", "Beşiktaş, İstanbul"), ("Bodrumm", "Bodrum, Muğla"), ("Kusadasi", "Kuşadası, Aydın"),
+    ("Cankya", "Çankaya, Ankara"), ("Karsiyaka", "Karşıyaka, İzmir"), ("Alanyaa", "Alanya, Antalya"),
+    ("Dogubayazit", "Doğubayazıt, Ağrı"), ("Sarikamis", "Sarıkamış, Kars"), ("Yuksekovaa", "Yüksekova, Hakkari"),
+    ("Akcakoca", "Akçakoca, Düzce"), ("Vezirkopru", "Vezirköprü, Samsun"), ("Sebinkarahisr", "Şebinkarahisar, Giresun"),
+]
+
+SYLLABLES = ["ak", "kara", "yeni", "köy", "ova", "dere", "tepe", "su", "bel", "pınar", "yurt", "hisar",
+             "çam", "göl", "kaya", "bağ", "kızıl", "saray", "alan", "ören", "bük", "eli", "lı", "ca"]
+
+def synthetic_names(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+def per_lookup_us(index: FuzzyIndex, rounds: int) -> float:
+    elapsed = timeit.timeit(lambda: [index.search(query) for query, _ in CORPUS], number=rounds)
+    return elapsed / rounds / len(CORPUS) * 1e6
+
+def main() -> None:
+    get_fuzzy_index()  # build outside the timed region
+    resolved = 0
+    for query, expected in CORPUS:
+        place, suggestions = resolve_place(query)
+        names = [place["name"]] if place else [s["name"] for s in suggestions]
+        if names and names[0] == expected:
+            resolved += 1
+        else:
+            print(f"  miss: {query!r} -> {names}")
+
+    rounds = 200
+    elapsed = timeit.timeit(lambda: [resolve_place(query) for query, _ in CORPUS], number=rounds)
+    per_lookup = elapsed / rounds / len(CORPUS) * 1e6
+    print(f"gazetteer: {len(get_gazetteer())} places")
+    print(f"top match correct: {resolved}/{len(CORPUS)}")
+    print(f"mean resolve time: {per_lookup:.1f} µs per misspelled lookup")
+    assert per_lookup < 1000, f"misspelled lookups take {per_lookup:.0f} µs"
+
+    print(f"{'places':>7} {'names':>7} {'search µs':>10}")
+    for extra in (0, 4000, 20000):
+        gazetteer = padded_gazetteer(extra, synthetic_names(extra))
+        entries: List[Tuple[str, Dict[str, Any]]] = list(gazetteer.entries())
+        index = FuzzyIndex(entries)
+        print(f"{len(gazetteer):>7} {len(entries):>7} {per_lookup_us(index, 50 if extra else 200):>10.1f}")
+
+if __name__ == "__main__":
+    main()
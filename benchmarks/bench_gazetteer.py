@@ -0,0 +1,50 @@
+"""Gazetteer lookup cost against the old linear scan, for growing datasets.
+
+The bundled gazetteer is padded with synthetic districts to show that exact
+lookups and prefix completions stay flat as the number of places grows.
+
+Usage: python -m benchmarks.bench_gazetteer
+"""
+
+import json
+import timeit
+from typing import List, Optional
+
+from config import GAZETTEER_PATH
+from gazetteer import Gazetteer
+from utils import normalize_turkish_text
+
+QUERIES = ["İstanbul", "kadıköy", "K.Maraş", "34", "bodrum", "ist", "Gazi", "bilinmeyen"]
+
+def padded_gazetteer(extra: int, names: Optional[List[str]] = None) -> Gazetteer:
+    """The bundled gazetteer plus extra synthetic districts, named Köy00000... unless names are given."""
+    with open(GAZETTEER_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    districts = {plate: list(rows) for plate, rows in data["districts"].items()}
+    for i in range(extra):
+        plate = data["provinces"][i % 81][0]
+        districts.setdefault(plate, []).append([names[i] if names else f"Köy{i:05d}", 39.0, 35.0])
+    return Gazetteer(data["provinces"], districts, data.get("preferred_districts"))
+
+def linear_scan(names, query):
+    """The old approach: normalize every key on every miss."""
+    normalized = normalize_turkish_text(query)
+    if normalized in names:
+        return names[normalized]
+    return [name for name in names if normalized in normalize_turkish_text(name)]
+
+def main() -> None:
+    print(f"{'places':>7} {'lookup µs':>10} {'complete µs':>12} {'linear scan µs':>15}")
+    for extra in (0, 1000, 5000, 20000):
+        gazetteer = padded_gazetteer(extra)
+        names = {normalize_turkish_text(p["name"]): p for p in gazetteer.places}
+        rounds = 2000
+        lookup = timeit.timeit(lambda: [gazetteer.lookup(q) for q in QUERIES], number=rounds)
+        complete = timeit.timeit(lambda: [gazetteer.complete(q) for q in QUERIES], number=rounds)
+        scan = timeit.timeit(lambda: [linear_scan(names, q) for q in QUERIES], number=20)
+        per_query = len(QUERIES)
+        print(f"{len(gazetteer):>7} {lookup / rounds / per_query * 1e6:>10.2f} "
+              f"{complete / rounds / per_query * 1e6:>12.2f} {scan / 20 / per_query * 1e6:>15.1f}")
+
+if __name__ == "__main__":
+    main()
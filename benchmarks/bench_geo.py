@@ -0,0 +1,45 @@
+"""Nearest-settlement lookups with the spatial index against a linear scan.
+
+Also checks the index against brute force on random coordinates over Turkey,
+and shows how many distinct cache keys a cloud of nearby points collapses to.
+
+Usage: python -m benchmarks.bench_geo
+"""
+
+import random
+import timeit
+
+from cache import cache_key
+from gazetteer import get_gazetteer
+from geo import get_spatial_index, snap_coordinates, to_unit_vector
+
+def linear_nearest(places, lat, lon):
+    target = to_unit_vector(lat, lon)
+    return min(places, key=lambda place: sum(
+        (a - b) ** 2 for a, b in zip(to_unit_vector(place["lat"], place["lon"]), target)))
+
+def main() -> None:
+    rng = random.Random(8)
+    places = get_gazetteer().places
+    index = get_spatial_index()
+    points = [(rng.uniform(36.0, 42.0), rng.uniform(26.0, 44.5)) for _ in range(500)]
+
+    for lat, lon in points:
+        assert index.nearest(lat, lon)[0] is linear_nearest(places, lat, lon)
+    print(f"{len(points)} random points: spatial index agrees with brute force")
+
+    rounds = 5
+    indexed = timeit.timeit(lambda: [index.nearest(lat, lon) for lat, lon in points], number=rounds)
+    linear = timeit.timeit(lambda: [linear_nearest(places, lat, lon) for lat, lon in points], number=rounds)
+    per_query = rounds * len(points)
+    print(f"{len(places)} places: spatial index {indexed / per_query * 1e6:.1f} µs, "
+          f"linear scan {linear / per_query * 1e6:.1f} µs per lookup")
+
+    # Points scattered within ~1.5 km of Kadıköy
+    cloud = [(40.990 + rng.uniform(-0.012, 0.012), 29.029 + rng.uniform(-0.015, 0.015)) for _ in range(200)]
+    rounded = {cache_key("weather", lat, lon) for lat, lon in cloud}
+    snapped = {cache_key("weather", *snap_coordinates(lat, lon)) for lat, lon in cloud}
+    print(f"200 points around Kadıköy: {len(rounded)} cache keys by rounding, {len(snapped)} after snapping")
+
+if __name__ == "__main__":
+    main()
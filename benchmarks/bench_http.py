@@ -0,0 +1,97 @@
+"""Streamable HTTP server: shared cache between workers, draining and throughput.
+
+Runs ``python weather.py --transport streamable-http`` against the mock server
+and checks that:
+
+* workers share responses through the persistent cache: a city asked for on
+  many connections, so by several workers, reaches OpenWeatherMap once per
+  endpoint;
+* shutdown drains: tool calls still waiting on a slow upstream when SIGTERM
+  arrives are answered, and the server exits cleanly;
+
+then prints the throughput of cached tool calls with 1 and N workers. Tool
+calls are sent as plain JSON-RPC posts, which the stateless server accepts
+without an MCP session handshake.
+
+Usage: python -m benchmarks.bench_http [workers]
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict
+
+import httpx
+
+from benchmarks.loadgen import http_server
+from benchmarks.mock_owm import MockOWMServer
+
+HEADERS = {"Accept": "application/json, text/event-stream"}
+CITIES = ["Ankara", "İzmir", "Antalya", "Bursa", "Konya", "Trabzon", "Erzurum", "Van", "Samsun", "Edirne",
+          "Adana", "Sivas", "Kars", "Rize", "Muğla", "Aydın"]
+
+async def call_tool(client: httpx.AsyncClient, url: str, name: str, arguments: Dict[str, Any]) -> str:
+    response = await client.post(url, headers=HEADERS, json={
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name, "arguments": arguments}})
+    response.raise_for_status()
+    result = response.json()["result"]
+    assert not result.get("isError"), result
+    return result["content"][0]["text"]
+
+async def shared_cache(workers: int) -> None:
+    with MockOWMServer(latency=0.01) as server:
+        async with http_server(server, workers) as (base_url, _):
+            for _ in range(40):
+                # A new connection each time, so the calls are spread over the workers
+                async with httpx.AsyncClient(timeout=30) as client:
+                    await call_tool(client, f"{base_url}/mcp", "hava_durumu_sehir", {"sehir": "Ankara"})
+        hits = dict(server.hits)
+    print(f"40 calls for one city on {workers} workers: upstream calls {hits}")
+    assert all(count == 1 for count in hits.values()), hits
+
+async def graceful_drain(workers: int) -> None:
+    with MockOWMServer(latency=1.5) as server:
+        async with http_server(server, workers) as (base_url, process):
+            async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=64)) as client:
+                calls = [asyncio.create_task(call_tool(client, f"{base_url}/mcp", "hava_durumu_sehir",
+                                                       {"sehir": city})) for city in CITIES]
+                await asyncio.sleep(0.5)  # all calls are now waiting on the mock
+                start = time.perf_counter()
+                process.send_signal(signal.SIGTERM)
+                results = await asyncio.gather(*calls, return_exceptions=True)
+                code = await asyncio.to_thread(process.wait, 60)
+                stopped = time.perf_counter() - start
+    failed = [r for r in results if isinstance(r, BaseException)]
+    print(f"SIGTERM with {len(calls)} calls in flight: {len(calls) - len(failed)} answered, "
+          f"exit status {code} after {stopped:.2f} s")
+    assert not failed, failed[:3]
+    assert code == 0, code
+
+async def throughput(workers: int, requests: int = 2000, concurrency: int = 64) -> float:
+    with MockOWMServer(latency=0.02) as server:
+        async with http_server(server, workers) as (base_url, _):
+            url = f"{base_url}/mcp"
+            async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=concurrency)) as client:
+                for city in CITIES:
+                    await call_tool(client, url, "hava_durumu_sehir", {"sehir": city})
+                pending = iter(range(requests))
+
+                async def worker() -> None:
+                    for i in pending:
+                        await call_tool(client, url, "hava_durumu_sehir", {"sehir": CITIES[i % len(CITIES)]})
+
+                start = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                return requests / (time.perf_counter() - start)
+
+async def main(workers: int) -> None:
+    await shared_cache(workers)
+    await graceful_drain(workers)
+    for count in sorted({1, workers}):
+        print(f"cached tool calls, {count} worker(s): {await throughput(count):7.1f} req/s")
+    print(f"({os.cpu_count()} CPUs; the client runs on the same machine)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 4))
@@ -0,0 +1,60 @@
+"""Cost of the always-on metrics, and a check of their exports.
+
+Times a trivial async tool with and without ``timed_tool`` and a bare
+histogram observation, then serves the Prometheus text over HTTP and dumps it
+to a file, checking that both contain the recorded calls.
+
+Usage: python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import os
+import socket
+import tempfile
+import time
+import urllib.request
+
+from metrics import Histogram, MetricsExporter, metrics, timed_tool
+
+async def bare_tool() -> str:
+    return "ok"
+
+timed = timed_tool(bare_tool)
+
+async def per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) / repeat * 1e9
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def main() -> None:
+    repeat = 200_000
+    bare = min([await per_call(bare_tool, repeat) for _ in range(3)])
+    instrumented = min([await per_call(timed, repeat) for _ in range(3)])
+    print(f"bare tool call          {bare:7.0f} ns")
+    print(f"with timed_tool         {instrumented:7.0f} ns  (+{instrumented - bare:.0f} ns per call)")
+    histogram = Histogram(metrics.buckets)
+    start = time.perf_counter()
+    for i in range(repeat):
+        histogram.observe(i * 1e-6)
+    print(f"histogram observation   {(time.perf_counter() - start) / repeat * 1e9:7.0f} ns")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "weather.prom")
+        exporter = MetricsExporter(port=free_port(), path=path, interval=3600)
+        exporter.start()
+        url = f"http://127.0.0.1:{exporter.port}/metrics"
+        text = await asyncio.to_thread(lambda: urllib.request.urlopen(url, timeout=5).read().decode())
+        await exporter.stop()
+        assert f'weather_tool_duration_seconds_count{{tool="bare_tool"}} {3 * repeat}' in text, text[:500]
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == text
+    print("Prometheus text served over HTTP and dumped to file")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Memory held per cached city: raw decoded JSON vs the compact models.
+
+Measures with tracemalloc what one city's weather, forecast and air_pollution
+responses keep alive once decoded, for the raw dictionaries and for the models
+the response cache now stores, and times walking the 40 forecast slots.
+
+Usage: python -m benchmarks.bench_models [--cities N]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from benchmarks.mock_owm import PAYLOADS
+from gazetteer import get_gazetteer
+from models import parse_response
+
+def retained(build: Callable[[], List[Any]]) -> int:
+    """Bytes still allocated by build()'s result after it returns."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+def hourly_raw(data: Dict[str, Any]) -> int:
+    days = 0
+    for item in data["list"]:
+        dt = datetime.fromtimestamp(item["dt"])
+        days += dt.day
+        f"{dt.strftime('%H:%M')} {item['main']['temp']} {item['weather'][0]['description']}"
+    return days
+
+def hourly_model(forecast: Any) -> int:
+    days = 0
+    for i in range(len(forecast)):
+        days += forecast.day[i]
+        f"{forecast.time_text(i)} {forecast.temp[i]} {forecast.description[i]}"
+    return days
+
+def main(cities: int) -> None:
+    places = list(get_gazetteer().provinces.values())[:cities]
+    payloads = [{endpoint: json.dumps(build(place["lat"], place["lon"])).encode()
+                 for endpoint, build in PAYLOADS.items()} for place in places]
+
+    raw = retained(lambda: [{endpoint: json.loads(body) for endpoint, body in city.items()}
+                            for city in payloads])
+    compact = retained(lambda: [{endpoint: parse_response(endpoint, json.loads(body))
+                                 for endpoint, body in city.items()} for city in payloads])
+    print(f"{cities} cities, weather + forecast (40 slots) + air_pollution each")
+    print(f"raw JSON dictionaries: {raw / cities / 1024:7.1f} KiB per city")
+    print(f"compact models:        {compact / cities / 1024:7.1f} KiB per city "
+          f"({raw / compact:.1f}x smaller)")
+    assert compact < raw
+
+    data = json.loads(payloads[0]["forecast"])
+    forecast = parse_response("forecast", data)
+    for label, walk, arg in (("raw, fromtimestamp per slot", hourly_raw, data),
+                             ("model, local time precomputed", hourly_model, forecast)):
+        start = time.perf_counter()
+        for _ in range(2000):
+            walk(arg)
+        print(f"walk 40 slots, {label:<30} {(time.perf_counter() - start) / 2000 * 1e6:7.1f} µs")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=81)
+    args = parser.parse_args()
+    main(args.cities)
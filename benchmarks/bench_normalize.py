@@ -0,0 +1,64 @@
+"""Check and time normalize_turkish_text against the previous implementation.
+
+Before timing, the new function is checked for output identical to the old
+one on every Basic Multilingual Plane character, every pair of letters of
+the Turkish alphabet (both cases, with circumflex vowels) and random mixed
+strings.
+
+Usage: python -m benchmarks.bench_normalize
+"""
+
+import random
+import timeit
+import unicodedata
+
+from utils import normalize_turkish_text
+
+TURKISH_ALPHABET = "abcçdefgğhıijklmnoöprsştuüvyzâîû"
+TURKISH_LETTERS = TURKISH_ALPHABET + "ABCÇDEFGĞHIİJKLMNOÖPRSŞTUÜVYZÂÎÛ"
+
+def reference_normalize(text: str) -> str:
+    """The previous implementation, kept verbatim for comparison."""
+    text = text.lower()
+    text = text.replace('İ', 'i').replace('I', 'ı')
+    replacements = {
+        'ğ': 'g', 'ü': 'u', 'ş': 's', 'ı': 'i',
+        'ö': 'o', 'ç': 'c', 'â': 'a', 'î': 'i', 'û': 'u'
+    }
+    for char, replacement in replacements.items():
+        text = text.replace(char, replacement)
+    text = ''.join(c for c in unicodedata.normalize('NFD', text)
+                  if unicodedata.category(c) != 'Mn')
+    return text
+
+def check_equivalence() -> int:
+    """Compare both implementations; returns the number of inputs checked."""
+    normalize = normalize_turkish_text.__wrapped__  # bypass the memo cache
+    inputs = [chr(code) for code in range(0x10000) if not 0xD800 <= code <= 0xDFFF]
+    inputs += [a + b for a in TURKISH_LETTERS for b in TURKISH_LETTERS]
+
+    rng = random.Random(9)
+    pool = TURKISH_LETTERS + "äéèñßẞ.-' 0123456789̇̈̂ΣσΑ"
+    inputs += ["".join(rng.choice(pool) for _ in range(rng.randint(1, 24))) for _ in range(20000)]
+
+    for text in inputs:
+        expected = reference_normalize(text)
+        actual = normalize(text)
+        assert actual == expected, f"{text!r}: {actual!r} != {expected!r}"
+    return len(inputs)
+
+def main() -> None:
+    checked = check_equivalence()
+    print(f"identical output on {checked} inputs")
+
+    samples = ["İstanbul", "ANKARA", "Şanlıurfa", "Kahramanmaraş", "IĞDIR", "Çanakkale",
+               "Diyarbakır", "Gümüşhane", "izmir", "Kadıköy, İstanbul"]
+    rounds = 20000
+    uncached = normalize_turkish_text.__wrapped__
+    for name, fn in (("previous", reference_normalize), ("translate table", uncached),
+                     ("translate + memo", normalize_turkish_text)):
+        elapsed = timeit.timeit(lambda: [fn(s) for s in samples], number=rounds)
+        print(f"{name:<18} {elapsed / rounds / len(samples) * 1e9:8.0f} ns per call")
+
+if __name__ == "__main__":
+    main()
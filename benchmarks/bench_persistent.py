@@ -0,0 +1,131 @@
+"""Persistent cache across restarts and concurrent server processes.
+
+1. A fresh process fills the on-disk cache from the local mock server.
+2. A second process ("restart") must answer the same tools with zero
+   upstream calls.
+3. Several processes hammer one database at once; no operation may fail.
+4. The database is compacted back under its entry bound.
+5. A cache cut from 2,000 to 100 entries gives the freed pages back:
+   the file must shrink by most of them.
+
+Usage: python -m benchmarks.bench_persistent
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+CITIES = ["istanbul", "ankara", "izmir", "antalya", "bursa", "adana", "konya", "trabzon"]
+
+async def serve_cities(base_url: str) -> float:
+    import api
+    import weather
+    api.OPENWEATHER_API_BASE = base_url
+    api.OPENWEATHER_API_KEY = "benchmark-key"
+    start = time.perf_counter()
+    async with api.lifespan(None):
+        for city in CITIES:
+            await weather.hava_durumu_sehir(city)
+    return (time.perf_counter() - start) * 1000
+
+def run_session(base_url: str, db_path: str) -> float:
+    """Run one server 'session' in a fresh interpreter and return its tool time in ms."""
+    env = dict(os.environ, WEATHER_CACHE_DB=db_path)
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_persistent", "--session", base_url],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def hammer(db_path: str, worker: int, operations: int, errors) -> None:
+    from store import PersistentCache
+    store = PersistentCache(db_path, max_entries=500)
+    rng = random.Random(worker)
+    try:
+        for i in range(operations):
+            key = ("weather", round(rng.uniform(36, 42), 2), round(rng.uniform(26, 45), 2))
+            if rng.random() < 0.5:
+                store.set(key, b'{"main": {"temp": 20}}' * 20, ttl=rng.choice([-1, 600]))
+            else:
+                store.get(key)
+            if i % 500 == 0:
+                store.compact()
+    except Exception as e:
+        errors.put(f"worker {worker}: {e!r}")
+    finally:
+        store.close()
+
+def main() -> None:
+    from benchmarks.mock_owm import MockOWMServer
+    from store import PersistentCache
+
+    with tempfile.TemporaryDirectory() as tmp, MockOWMServer(latency=0.02) as server:
+        db_path = os.path.join(tmp, "cache.db")
+
+        cold = run_session(server.base_url, db_path)
+        cold_hits = sum(server.hits.values())
+        server.reset()
+        warm = run_session(server.base_url, db_path)
+        warm_hits = sum(server.hits.values())
+        assert warm_hits == 0, f"restarted session made {warm_hits} upstream calls"
+        print(f"first session:     {cold:8.1f} ms, {cold_hits} upstream calls")
+        print(f"after restart:     {warm:8.1f} ms, {warm_hits} upstream calls")
+
+        workers, operations = 6, 3000
+        errors = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=hammer, args=(db_path, w, operations, errors))
+                     for w in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        failures = [errors.get() for _ in range(errors.qsize())]
+        assert not failures, failures
+        print(f"{workers} processes x {operations} mixed ops: {elapsed:.2f} s, no errors")
+
+        store = PersistentCache(db_path, max_entries=500)
+        before = store.stats()
+        result = store.compact()
+        after = store.stats()
+        store.close()
+        assert after["entries"] <= 500
+        print(f"compaction: {before['entries']} -> {after['entries']} entries, "
+              f"{before['bytes'] // 1024} KiB -> {after['bytes'] // 1024} KiB ({result})")
+
+        check_shrink(os.path.join(tmp, "shrink.db"))
+
+def check_shrink(db_path: str, filled: int = 2000, kept: int = 100) -> None:
+    from store import PersistentCache
+
+    store = PersistentCache(db_path, max_entries=filled)
+    for i in range(filled):
+        store.set(("weather", i), b'{"main": {"temp": 20}}' * 80, ttl=600)
+    store.compact()
+    before = store.stats()
+    store.max_entries = kept
+    result = store.compact()
+    after = store.stats()
+    store.close()
+    freed = before["bytes"] - after["bytes"]
+    kept_share = kept / filled
+    assert after["free_pages"] == 0, f"{after['free_pages']} pages left on the freelist"
+    # The file keeps about the kept share of the data pages, plus the schema
+    assert freed >= before["bytes"] * (1 - kept_share) * 0.9, (before, after)
+    assert os.path.getsize(db_path) == after["bytes"], "the checkpoint left the file larger"
+    print(f"shrinking: {result['trimmed']} of {filled} entries trimmed, "
+          f"{before['bytes'] // 1024} KiB -> {after['bytes'] // 1024} KiB, no free pages left")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--session", metavar="BASE_URL")
+    args = parser.parse_args()
+    if args.session:
+        print(asyncio.run(serve_cities(args.session)))
+    else:
+        main()
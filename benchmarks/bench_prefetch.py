@@ -0,0 +1,90 @@
+"""Predictive cache warming: cache hit ratio under skewed traffic, with and without the warmer.
+
+Simulates a few hours of Zipf-distributed city requests on a manual clock
+shared by the response cache and the scheduler, so expiry happens without
+waiting. The upstream rate limiter is lifted since simulated minutes pass
+in milliseconds; the warmer's own budget is checked against the manual clock.
+Checks that the warmer never exceeds its per-minute call budget.
+
+Usage: python -m benchmarks.bench_prefetch [--hours H] [--seed N]
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Any, Dict
+
+import api
+import weather
+from benchmarks.bench_swr import ManualClock
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from cache import TTLCache
+from config import CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, PREFETCH_ENDPOINTS
+from gazetteer import get_gazetteer
+from prefetch import PrefetchScheduler
+from ratelimit import QuotaLimiter
+
+STEP = 15.0  # simulated seconds between scheduler passes
+REQUESTS_PER_STEP = 3
+
+async def simulate(server: MockOWMServer, hours: float, seed: int, warm: bool) -> Dict[str, Any]:
+    clock = ManualClock()
+    api.response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, clock=clock)
+    scheduler = PrefetchScheduler(interval=STEP, clock=clock)
+    weather.prefetcher = scheduler
+    server.reset()
+    names = sorted(city["name"] for city in get_gazetteer().provinces.values())
+    rng = random.Random(seed)
+    rng.shuffle(names)
+    weights = [1 / rank ** 1.1 for rank in range(1, len(names) + 1)]
+    hot = set(names[:scheduler.top_k])
+    hot_hits = hot_requests = 0
+    max_budget_used = 0
+    for _ in range(int(hours * 3600 / STEP)):
+        for name in rng.choices(names, weights, k=REQUESTS_PER_STEP):
+            place, _ = weather.resolve_city(name)
+            endpoint = rng.choice(PREFETCH_ENDPOINTS)
+            hits = api.response_cache.hits
+            await api.make_weather_request(endpoint, {"lat": place["lat"], "lon": place["lon"]})
+            if name in hot:
+                hot_requests += 1
+                hot_hits += api.response_cache.hits - hits
+        if warm:
+            await scheduler.run_once()
+            max_budget_used = max(max_budget_used, scheduler.state()["budget"]["used"])
+        clock.now += STEP
+    stats = api.response_cache.stats()
+    return {
+        "hit_ratio": stats["hit_ratio"],
+        "hot_hit_ratio": hot_hits / hot_requests,
+        "upstream_calls": sum(server.hits.values()),
+        "max_budget_used": max_budget_used,
+        "state": scheduler.state(),
+    }
+
+async def main(hours: float, seed: int) -> None:
+    with MockOWMServer(latency=0) as server:
+        use_mock(server)
+        api.upstream_limiter = QuotaLimiter(per_minute=1e9, per_day=1e12)
+        cold = await simulate(server, hours, seed, warm=False)
+        warm = await simulate(server, hours, seed, warm=True)
+        state = warm["state"]
+        assert warm["max_budget_used"] <= state["budget"]["calls_per_minute"], warm["max_budget_used"]
+        assert warm["hot_hit_ratio"] > cold["hot_hit_ratio"]
+        print(f"{hours:g} simulated hours, {REQUESTS_PER_STEP} requests per {STEP:g} s, Zipf city popularity")
+        print(f"{'':12} {'hit ratio':>10} {'top-10 hit ratio':>17} {'upstream calls':>15}")
+        for label, result in (("no warmer", cold), ("warmer", warm)):
+            print(f"{label:12} {result['hit_ratio']:10.1%} {result['hot_hit_ratio']:17.1%} "
+                  f"{result['upstream_calls']:15d}")
+        print(f"warmer: {state['refreshes']} refreshes, peak budget use "
+              f"{warm['max_budget_used']}/{state['budget']['calls_per_minute']} calls per minute, "
+              f"{state['deferred_for_budget']} deferred")
+        print("hot places:", ", ".join(f"{p['name']} ({p['score']})" for p in state["hot_places"]))
+        await api.close_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.hours, args.seed))
@@ -0,0 +1,97 @@
+"""Upstream quota limiter: fair queuing between tool calls, non-blocking tokens for hedged
+requests, and cached data when the budget runs out.
+
+Usage: python -m benchmarks.bench_ratelimit
+"""
+
+import asyncio
+import time
+
+import api
+import weather
+from benchmarks.bench_swr import ManualClock
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from cache import TTLCache
+from config import CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_MAX_STALE_AGE, CACHE_TTLS
+from ratelimit import QuotaLimiter, RateLimited, ensure_flow
+
+async def fairness() -> None:
+    # 20 calls per second, no burst: a 40-call batch queues for 2 seconds
+    limiter = QuotaLimiter(per_minute=1200, per_day=100000, burst=1, max_wait=30)
+    start = time.perf_counter()
+
+    async def batch() -> None:
+        ensure_flow()
+        await asyncio.gather(*[limiter.acquire() for _ in range(40)])
+
+    async def single() -> float:
+        ensure_flow()
+        await asyncio.sleep(0.2)
+        begin = time.perf_counter()
+        await limiter.acquire()
+        return time.perf_counter() - begin
+
+    _, waited = await asyncio.gather(batch(), single())
+    total = time.perf_counter() - start
+    assert waited < 0.2, waited  # served on the next token, not after the batch
+    stats = limiter.stats()
+    print(f"40-call batch + 1 single call at 20 calls/s: batch done in {total:.2f} s, "
+          f"single call waited {waited * 1000:.0f} ms")
+    print(f"  queue: max depth {stats['max_queue_depth']}, wait avg {stats['wait_avg_ms']} ms, "
+          f"p95 {stats['wait_p95_ms']} ms, max {stats['wait_max_ms']} ms")
+
+async def daily_budget() -> None:
+    limiter = QuotaLimiter(per_minute=60, per_day=3)
+    for _ in range(3):
+        await limiter.acquire()
+    try:
+        await limiter.acquire()
+    except RateLimited as e:
+        print(f"4th call with a daily budget of 3: rejected at once ({e})")
+    else:
+        raise AssertionError("daily budget not enforced")
+
+async def try_acquire() -> None:
+    limiter = QuotaLimiter(per_minute=60, per_day=100000, burst=2, max_wait=30)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire(), "took a token beyond the burst"
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1 and not limiter.try_acquire(), "jumped the queue"
+    waiting.cancel()
+    spent = QuotaLimiter(per_minute=60, per_day=1)
+    assert spent.try_acquire() and not spent.try_acquire(), "daily budget not enforced"
+    stats = limiter.stats()
+    assert stats["acquired"] == 2 and stats["rejected"] == 0, stats
+    print("try_acquire: takes free tokens only, never waits, queues or raises")
+
+async def degradation() -> None:
+    with MockOWMServer(latency=0.01) as server:
+        use_mock(server)
+        clock = ManualClock()
+        api.response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, 0, CACHE_MAX_STALE_AGE, clock=clock)
+        api.upstream_limiter = QuotaLimiter(per_minute=60, per_day=2)
+        await weather.hava_durumu_sehir("Ankara")  # spends the whole daily budget
+        clock.now += CACHE_TTLS["forecast"] + 60
+        calls = sum(server.hits.values())
+
+        report = await weather.hava_durumu_sehir("Ankara")
+        assert "MEVCUT DURUM" in report and "önceki veriler gösteriliyor" in report, report
+        assert sum(server.hits.values()) == calls
+        print("budget exhausted, cached city: old report served and flagged, no upstream call")
+
+        report = await weather.hava_durumu_sehir("Van")
+        assert "Rate limit reached" in report, report
+        print(f"budget exhausted, uncached city: {report}")
+        print(f"cache stats: {api.get_cache_stats()}")
+        print(f"limiter stats: {api.get_rate_limit_stats()}")
+        await api.close_client()
+
+async def main() -> None:
+    await fairness()
+    await daily_budget()
+    await try_acquire()
+    await degradation()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""Report rendering: rendering every call vs reusing rendered reports.
+
+Checks that a report served from the render cache is exactly the freshly
+rendered text, that it is rendered again once a new response replaces the
+data, that reports of stale copies are never kept, and that the cache does
+not keep the models alive: a report goes when its data is freed. Then times each
+report rendered from scratch and served from the cache, and the throughput
+of in-process tool calls on demo data with and without the cache.
+
+Usage: python -m benchmarks.bench_render [calls]
+"""
+
+import asyncio
+import gc
+import logging
+import sys
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Tuple
+
+import reports
+from benchmarks.loadgen import DEMO_KEY, WORKLOAD, plan
+from benchmarks.mock_owm import air_pollution_payload, forecast_payload, weather_payload
+from gazetteer import get_gazetteer
+from models import parse_response, with_stale_age
+from reports import RenderCache, cached_report
+
+def per_call_us(fn: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def city_models(place: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    lat, lon = place["lat"], place["lon"]
+    return (parse_response("weather", weather_payload(lat, lon)),
+            parse_response("forecast", forecast_payload(lat, lon)),
+            parse_response("air_pollution", air_pollution_payload(lat, lon)))
+
+def report_cases() -> List[Tuple[str, Tuple[Any, ...], Callable[[], str]]]:
+    """(tool, models, render) for every report, on mock data of a few provinces."""
+    places = list(get_gazetteer().provinces.values())[:12]
+    models = [city_models(place) for place in places]
+    (w1, f1, a1), (w2, _, _) = models[0], models[1]
+    name1, name2 = places[0]["name"], places[1]["name"]
+    weathers = [weather for weather, _, _ in models]
+    forecasts = [forecast for _, forecast, _ in models]
+    locations = [(place["name"], place["lat"], place["lon"]) for place in places]
+    return [
+        ("hava_durumu", (w1, f1), lambda: reports.weather_report(name1, w1, f1)),
+        ("saatlik_hava_durumu", (f1,), lambda: reports.hourly_report(name1, 5, f1)),
+        ("hava_kalitesi", (a1,), lambda: reports.air_quality_report(name1, a1)),
+        ("sehirler_karsilastir", (w1, w2), lambda: reports.comparison_report(name1, w1, name2, w2)),
+        ("havadurumu_aktivite_onerileri", (w1, f1), lambda: reports.activity_report(name1, w1, f1)),
+        ("coklu_sehir_hava_durumu", (*weathers, *forecasts),
+         lambda: reports.batch_report(len(locations), locations, weathers, forecasts, [])),
+    ]
+
+def check_cache() -> None:
+    cache = RenderCache()
+    place = get_gazetteer().provinces[sorted(get_gazetteer().provinces)[0]]
+    weather, forecast, _ = city_models(place)
+    text = reports.weather_report(place["name"], weather, forecast)
+    cache.put("key", (weather, forecast), text)
+    assert cache.get("key", (weather, forecast)) is text
+    # Equal data in a new object is a new response: render again
+    refreshed, _, _ = city_models(place)
+    assert cache.get("key", (refreshed, forecast)) is None and cache.outdated == 1
+    cache.put("stale", (with_stale_age(weather, 600), forecast), text)
+    cache.put("error", ({"error": "zaman aşımı"}, forecast), text)
+    assert len(cache) == 1, "reports of stale copies or errors were kept"
+    evicted, _, _ = city_models(place)
+    cache.put("evicted", (evicted, forecast), text)
+    freed = weakref.ref(evicted)
+    del evicted
+    gc.collect()
+    assert freed() is None, "the render cache keeps models alive"
+    assert len(cache) == 1, "the report outlived its data"
+    small = RenderCache(max_entries=2)
+    for key in range(3):
+        small.put(key, (weather,), text)
+    assert len(small) == 2 and small.get(0, (weather,)) is None
+    print("the render cache reuses a report only for the very models it was rendered from, "
+          "and drops it when they are freed")
+
+def report_render_times() -> None:
+    reports.render_cache.clear()
+    for tool, models, render in report_cases():
+        text = render()
+        assert cached_report(tool, models, render) == text
+        assert cached_report(tool, models, lambda: "") == text, f"{tool} was rendered again"
+        fresh = per_call_us(render, 500)
+        cached = per_call_us(lambda: cached_report(tool, models, render), 5000)
+        print(f"  {tool:<30} {len(text):6} chars  rendered {fresh:7.1f} µs, cached {cached:5.2f} µs "
+              f"({fresh / cached:5.1f}x)")
+
+async def tool_throughput(requests: int, max_entries: int) -> float:
+    import api
+    import weather
+    api.OPENWEATHER_API_KEY = DEMO_KEY
+    reports.render_cache.clear()
+    reports.render_cache.max_entries = max_entries
+    calls = plan(sorted(WORKLOAD), requests, cities=81, seed=5)
+    async with api.lifespan(weather.mcp):
+        start = time.perf_counter()
+        for tool, arguments in calls:
+            await weather.mcp.call_tool(tool, arguments)
+        return requests / (time.perf_counter() - start)
+
+async def main(requests: int) -> None:
+    check_cache()
+    print("rendering one report:")
+    report_render_times()
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # it logs every request at INFO
+    max_entries = reports.render_cache.max_entries
+    await tool_throughput(requests, 0)  # warms the response cache for both runs
+    uncached = await tool_throughput(requests, 0)
+    before = reports.render_cache.stats()
+    cached = await tool_throughput(requests, max_entries)
+    after = reports.render_cache.stats()
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    print(f"in-process tool calls on demo data: {uncached:.0f} calls/s rendering every report, "
+          f"{cached:.0f} calls/s with the render cache ({hits / lookups:.0%} of {lookups} reports reused)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000))
@@ -0,0 +1,88 @@
+"""Recording upstream answers and replaying them without a network.
+
+Runs a seeded mix of calls to every tool over a stdio session three times:
+
+* recording: against the mock OpenWeatherMap with ``WEATHER_UPSTREAM=record``;
+* replaying with the recorded latencies, after the mock has been shut down;
+* replaying with no latency at all.
+
+Both replays must answer every call with exactly the text of the recording,
+and without any upstream call. Prints the archive's size and the durations
+of the three runs, which shows how closely the recorded latencies are
+reproduced.
+
+Usage: python -m benchmarks.bench_replay [calls]
+"""
+
+import asyncio
+import gzip
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.loadgen import ROOT, WORKLOAD, plan
+from benchmarks.mock_owm import MockOWMServer
+from replay import read_archive
+
+async def run_session(env: Dict[str, str], calls: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[str], float]:
+    """Tool answers of a fresh stdio server and the seconds the calls took."""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[str(ROOT / "weather.py")],
+                                   env=dict(os.environ, WEATHER_PREFETCH="0", **env), cwd=str(ROOT))
+    answers = []
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                start = time.perf_counter()
+                for tool, arguments in calls:
+                    result = await session.call_tool(tool, arguments)
+                    assert not result.isError, (tool, arguments, result)
+                    answers.append(result.content[0].text)
+                elapsed = time.perf_counter() - start
+    return answers, elapsed
+
+def replay_env(base_url: str, archive: str, latency: Optional[str]) -> Dict[str, str]:
+    env = {"OPENWEATHER_API_BASE": base_url, "OPENWEATHER_API_KEY": "benchmark-key",
+           "WEATHER_UPSTREAM": "replay", "WEATHER_ARCHIVE": archive}
+    if latency is not None:
+        env["WEATHER_REPLAY_LATENCY"] = latency
+    return env
+
+async def main(count: int) -> None:
+    calls = plan(sorted(WORKLOAD), count, cities=8, seed=7)
+    with tempfile.TemporaryDirectory() as directory:
+        archive = os.path.join(directory, "upstream.jsonl.gz")
+        with MockOWMServer(latency=0.03) as server:
+            recorded, record_time = await run_session(
+                {"OPENWEATHER_API_BASE": server.base_url, "OPENWEATHER_API_KEY": "benchmark-key",
+                 "WEATHER_UPSTREAM": "record", "WEATHER_ARCHIVE": archive}, calls)
+            base_url, upstream_calls = server.base_url, sum(server.hits.values())
+
+        exchanges = read_archive(archive)
+        size = os.path.getsize(archive)
+        with gzip.open(archive, "rb") as f:
+            raw = len(f.read())
+        print(f"recorded {len(exchanges)} answers of {upstream_calls} upstream calls for {count} tool calls: "
+              f"{size / 1024:.1f} KiB ({raw / 1024:.1f} KiB uncompressed, {size / len(exchanges):.0f} B per answer)")
+        assert len(exchanges) == upstream_calls, (len(exchanges), upstream_calls)
+        assert not any("benchmark-key" in exchange.to_json() for exchange in exchanges)
+
+        # The mock is gone, so any request that is not replayed fails
+        replayed, replay_time = await run_session(replay_env(base_url, archive, None), calls)
+        instant, instant_time = await run_session(replay_env(base_url, archive, "0"), calls)
+
+    for name, answers in (("recorded latency", replayed), ("no latency", instant)):
+        different = [tool for (tool, _), old, new in zip(calls, recorded, answers) if old != new]
+        assert not different, f"replay with {name} differs for {different[:5]}"
+    print(f"both replays match all {count} answers of the recording")
+    for label, seconds in (("recording", record_time), ("replay, recorded latency", replay_time),
+                           ("replay, no latency", instant_time)):
+        print(f"  {label:<26} {seconds * 1000:8.1f} ms ({seconds / record_time:.0%} of recording)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 60))
@@ -0,0 +1,107 @@
+"""Retries, hedged requests and the circuit breaker against an unreliable mock upstream.
+
+Usage: python -m benchmarks.bench_resilience [--requests N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import api
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from ratelimit import QuotaLimiter
+from resilience import CircuitBreaker
+
+def reset() -> None:
+    api._latencies.clear()
+    api._breakers.clear()
+    for name in api.resilience_stats:
+        api.resilience_stats[name] = 0
+
+async def run(requests: int, concurrency: int = 10) -> List[float]:
+    """Uncached weather requests for distinct coordinates; returns latencies of successes."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            data = await api._fetch("weather", {"lat": 36 + i * 0.01, "lon": 30.0}, None)
+            if not api.is_error(data):
+                latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    return latencies
+
+def quantile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] * 1000
+
+async def retries(requests: int) -> None:
+    with MockOWMServer(latency=0.005, error_rate=0.2, seed=1) as server:
+        use_mock(server)
+        rows: Dict[str, int] = {}
+        for attempts in (1, 3):
+            reset()
+            server.reset()
+            api.RETRY_MAX_ATTEMPTS = attempts
+            ok = len(await run(requests))
+            rows[f"{attempts} attempt(s)"] = ok
+            print(f"20% injected 5xx, {attempts} attempt(s): {ok}/{requests} succeeded, "
+                  f"{sum(server.hits.values())} upstream calls, {api.resilience_stats['retries']} retries")
+        assert rows["3 attempt(s)"] > rows["1 attempt(s)"]
+        await api.close_client()
+
+async def hedging(requests: int) -> None:
+    with MockOWMServer(latency=0.02, tail_rate=0.03, tail_latency=1.0, seed=2) as server:
+        use_mock(server)
+        results = {}
+        for enabled in (False, True):
+            reset()
+            server.reset()
+            api.HEDGE_ENABLED = enabled
+            await run(100)  # fill the latency window
+            server.reset()
+            latencies = await run(requests)
+            label = "hedged" if enabled else "not hedged"
+            results[label] = quantile(latencies, 0.99)
+            print(f"3% of calls delayed 1 s, {label:>10}: p50 {statistics.median(latencies) * 1000:6.1f} ms, "
+                  f"p99 {results[label]:7.1f} ms, {sum(server.hits.values())} upstream calls, "
+                  f"{api.resilience_stats['hedges']} hedges ({api.resilience_stats['hedge_wins']} won)")
+        assert results["hedged"] < results["not hedged"], results
+        await api.close_client()
+
+async def breaker() -> None:
+    with MockOWMServer(latency=0.005, failing_endpoints={"weather"}) as server:
+        use_mock(server)
+        reset()
+        api.RETRY_MAX_ATTEMPTS = 3
+        api._breakers["weather"] = CircuitBreaker(failure_threshold=5, reset_timeout=0.5)
+        start = time.perf_counter()
+        await run(50, concurrency=1)
+        elapsed = time.perf_counter() - start
+        hits = server.hits["weather"]
+        assert hits <= 6, hits
+        print(f"upstream down, 50 requests: {hits} upstream calls, "
+              f"{api.resilience_stats['short_circuits']} failed fast, {elapsed * 1000:.0f} ms in total")
+
+        server.failing_endpoints.clear()
+        await asyncio.sleep(0.5)
+        data = await api._fetch("weather", {"lat": 39.9, "lon": 32.8}, None)
+        assert not api.is_error(data) and api.get_breaker("weather").state == "closed"
+        print(f"upstream back: probe succeeded, breaker {api.get_resilience_stats()['breakers']['weather']}")
+        await api.close_client()
+
+async def main(requests: int) -> None:
+    api.upstream_limiter = QuotaLimiter(per_minute=1e9, per_day=1e12)
+    await retries(requests)
+    await hedging(requests)
+    await breaker()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,68 @@
+"""Check and time single-flight coalescing of identical upstream requests.
+
+Fires a burst of concurrent ``hava_durumu_sehir("istanbul")`` calls against
+the local mock and asserts exactly one upstream hit per endpoint. Also
+checks that errors reach every waiter and that cancelling one waiter leaves
+the shared request running.
+
+Usage: python -m benchmarks.bench_singleflight [--callers N]
+"""
+
+import argparse
+import asyncio
+import time
+
+import api
+import weather
+from benchmarks.mock_owm import MockOWMServer, use_mock
+
+async def check_burst(server: MockOWMServer, callers: int) -> None:
+    api.response_cache.clear()
+    server.reset()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(weather.hava_durumu_sehir("istanbul") for _ in range(callers)))
+    elapsed = (time.perf_counter() - start) * 1000
+
+    assert len(set(results)) == 1, "callers received different reports"
+    assert server.hits == {"weather": 1, "forecast": 1}, f"unexpected upstream hits: {dict(server.hits)}"
+    print(f"{callers} concurrent callers: {elapsed:.1f} ms, upstream hits {dict(server.hits)}")
+
+async def check_cancellation(server: MockOWMServer) -> None:
+    api.response_cache.clear()
+    server.reset()
+    waiters = [asyncio.ensure_future(api.get_current_weather(39.93, 32.86)) for _ in range(10)]
+    await asyncio.sleep(0.01)
+    waiters[0].cancel()
+    results = await asyncio.gather(*waiters[1:])
+
+    assert waiters[0].cancelled()
+    assert not any(api.is_error(result) for result in results)
+    assert server.hits == {"weather": 1}, f"unexpected upstream hits: {dict(server.hits)}"
+    print("cancelling one waiter: shared request completed for the others")
+
+async def check_error_propagation() -> None:
+    api.response_cache.clear()
+    base = api.OPENWEATHER_API_BASE
+    api.OPENWEATHER_API_BASE = "http://127.0.0.1:9/data/2.5"  # nothing listens on the discard port
+    try:
+        results = await asyncio.gather(*(api.get_current_weather(38.42, 27.14) for _ in range(10)))
+    finally:
+        api.OPENWEATHER_API_BASE = base
+
+    assert all(api.is_error(result) for result in results)
+    assert len({result["error"] for result in results}) == 1
+    print("upstream failure: every waiter received the same error")
+
+async def main(callers: int) -> None:
+    with MockOWMServer(latency=0.05) as server:
+        use_mock(server)
+        await check_burst(server, callers)
+        await check_cancellation(server)
+        await check_error_propagation()
+        await api.close_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.callers))
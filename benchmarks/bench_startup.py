@@ -0,0 +1,151 @@
+"""Startup time of the stdio server, measured with ``python -X importtime``.
+
+Every stdio MCP session starts a fresh ``python weather.py``, so its startup
+is latency the user sees. This imports weather.py in fresh interpreters and
+reports the median import time, the part spent in this repository's own
+modules and the slowest imports. It also times real stdio sessions in demo
+mode (no API key, no network) up to the end of the handshake and the first
+tool call, which loads the place tables.
+
+The exit status is 1 if a module meant to load lazily is imported at
+startup, if the repository's own modules take longer than ``--budget-ms``
+to import, or, with ``--baseline``, if the medians regressed by more than
+``--tolerance`` (and at least ``--min-delta-ms``). A median over budget is
+measured again with as many runs before it counts, and the median of all
+runs decides.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 7
+    python -m benchmarks.bench_startup --baseline benchmarks/results/startup-20260101-120000.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+OWN_MODULES = {path.stem for path in ROOT.glob("*.py")}
+# Only imported when their feature is used: the persistent cache, the fast JSON
+# decoders (until the first payload), the metrics HTTP endpoint, demo mode and
+# recording or replaying upstream answers
+LAZY_MODULES = ("sqlite3", "store", "msgspec", "orjson", "http.server", "demo", "replay")
+
+def import_times() -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """(self µs, cumulative µs) per module for one ``import weather``, and the modules loaded."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    probe = "import sys, weather; print('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times, result.stdout.split()
+
+async def session_times() -> Tuple[float, float]:
+    """Seconds from spawning a stdio server to its initialize answer and to its first tool answer."""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    env = dict(os.environ, OPENWEATHER_API_KEY="YOUR_API_KEY_HERE", WEATHER_PREFETCH="0")
+    params = StdioServerParameters(command=sys.executable, args=[str(ROOT / "weather.py")], env=env, cwd=str(ROOT))
+    start = time.perf_counter()
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                ready = time.perf_counter() - start
+                result = await session.call_tool("hava_durumu_sehir", {"sehir": "Ankra"})
+                first_call = time.perf_counter() - start
+                assert not result.isError and "ANKARA" in result.content[0].text, result
+    return ready, first_call
+
+def own_ms(times: Dict[str, Tuple[int, int]]) -> float:
+    """Self time of this repository's modules in one import, in ms."""
+    return sum(t[0] for name, t in times.items() if name in OWN_MODULES) / 1000
+
+def main(args: argparse.Namespace) -> int:
+    import_times()  # warm the .pyc files and the OS file cache
+    runs = [import_times() for _ in range(args.runs)]
+    if statistics.median(own_ms(times) for times, _ in runs) > args.budget_ms:
+        # A busy machine slows a whole batch of runs; confirm before reporting
+        runs += [import_times() for _ in range(args.runs)]
+    totals = [times["weather"][1] / 1000 for times, _ in runs]
+    own = [own_ms(times) for times, _ in runs]
+    loaded = set(runs[0][1])
+    eager = [name for name in LAZY_MODULES if name in loaded]
+
+    sessions = [asyncio.run(session_times()) for _ in range(args.sessions)]
+    slowest = sorted(runs[0][0].items(), key=lambda item: item[1][1], reverse=True)
+    report: Dict[str, Any] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "runs": len(runs),
+        "import_ms": round(statistics.median(totals), 1),
+        "own_modules_ms": round(statistics.median(own), 1),
+        "own_modules": {name: round(times[0] / 1000, 2) for name, times in sorted(
+            runs[0][0].items(), key=lambda item: -item[1][0]) if name in OWN_MODULES},
+        "session_ready_ms": round(statistics.median(ready for ready, _ in sessions) * 1000, 1),
+        "first_tool_call_ms": round(statistics.median(first for _, first in sessions) * 1000, 1),
+        "eagerly_imported": eager,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"startup-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    print(f"import weather: {report['import_ms']} ms (median of {len(runs)}), "
+          f"own modules {report['own_modules_ms']} ms (budget {args.budget_ms} ms)")
+    print("  own modules (self time): " + ", ".join(f"{name} {ms}" for name, ms in report["own_modules"].items()))
+    print("  slowest imports (cumulative):")
+    for name, (_, cumulative) in slowest[:8]:
+        print(f"    {name:<40} {cumulative / 1000:7.1f} ms")
+    print(f"stdio session: handshake done after {report['session_ready_ms']} ms, "
+          f"first tool call answered after {report['first_tool_call_ms']} ms")
+    print(f"report written to {output}")
+
+    failures = []
+    if eager:
+        failures.append(f"imported at startup although meant to be lazy: {', '.join(eager)}")
+    if report["own_modules_ms"] > args.budget_ms:
+        failures.append(f"own modules take {report['own_modules_ms']} ms, budget {args.budget_ms} ms")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print(f"compared with baseline from {baseline.get('timestamp')}:")
+        for key in ("import_ms", "own_modules_ms", "session_ready_ms", "first_tool_call_ms"):
+            current, previous = report[key], baseline.get(key)
+            if not previous:
+                continue
+            change = (current - previous) / previous
+            print(f"  {key:<24} {previous:8.1f} -> {current:8.1f} ({change:+.1%})")
+            if change > args.tolerance and current - previous >= args.min_delta_ms:
+                failures.append(f"{key}: {previous} -> {current}")
+    if failures:
+        print("REGRESSIONS:\n  " + "\n  ".join(failures))
+        return 1
+    print("startup within budget")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters importing weather.py")
+    parser.add_argument("--sessions", type=int, default=3, help="stdio sessions timed")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="allowed import time of the repository's own modules")
+    parser.add_argument("--output", help="report path (default benchmarks/results/startup-<time>.json)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0,
+                        help="increase below which no regression is reported")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""Stale-while-revalidate: latency of the first caller after expiry, and stale fallback.
+
+The response cache is swapped for one driven by a manual clock so expiry
+can be simulated without waiting.
+
+Usage: python -m benchmarks.bench_swr [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import time
+
+import api
+import weather
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from cache import TTLCache
+from config import CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_MAX_STALE_AGE, CACHE_STALE_GRACE, CACHE_TTLS
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+async def first_caller_after_expiry(server: MockOWMServer, stale_grace: float) -> float:
+    clock = ManualClock()
+    api.response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, stale_grace,
+                                  CACHE_MAX_STALE_AGE, clock=clock)
+    await api.get_current_weather(41.0082, 28.9784)
+    clock.now += CACHE_TTLS["weather"] + 1
+    start = time.perf_counter()
+    await api.get_current_weather(41.0082, 28.9784)
+    elapsed = (time.perf_counter() - start) * 1000
+    # let a background refresh, if any, finish before the next scenario
+    while api._inflight:
+        await asyncio.sleep(0.01)
+    return elapsed
+
+async def main(latency: float) -> None:
+    with MockOWMServer(latency=latency) as server:
+        use_mock(server)
+        await api.make_weather_request("weather", {"q": "warm-up"})
+        print(f"upstream latency {latency * 1000:.0f} ms")
+
+        without = await first_caller_after_expiry(server, stale_grace=0)
+        server.reset()
+        with_swr = await first_caller_after_expiry(server, stale_grace=CACHE_STALE_GRACE)
+        assert server.hits["weather"] == 2, dict(server.hits)  # initial fill + background refresh
+        print(f"first caller after expiry, no grace window: {without:8.2f} ms")
+        print(f"first caller after expiry, SWR:             {with_swr:8.2f} ms (refreshed in background)")
+
+        # Past the grace window with upstream down: stale data instead of an error
+        clock = ManualClock()
+        api.response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_STALE_GRACE,
+                                      CACHE_MAX_STALE_AGE, clock=clock)
+        await weather.hava_durumu_sehir("izmir")
+        clock.now += CACHE_TTLS["forecast"] + CACHE_STALE_GRACE + 600
+        server.failing_endpoints = {"weather", "forecast"}
+        report = await weather.hava_durumu_sehir("izmir")
+        assert "MEVCUT DURUM" in report and "önceki veriler gösteriliyor" in report, report
+        print("upstream down past the grace window: stale report served and flagged")
+        print(f"cache stats: {api.get_cache_stats()}")
+        await api.close_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,51 @@
+"""Measure cold-cache tool latency when upstream fetches run concurrently.
+
+With an injected upstream latency L, a tool issuing two fetches should take
+about L rather than 2L. A second pass makes the forecast endpoint fail and
+checks that partial results still come back.
+
+Usage: python -m benchmarks.bench_tool_concurrency [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import time
+
+import api
+import weather
+from benchmarks.mock_owm import MockOWMServer, use_mock
+
+TOOLS = [
+    ("hava_durumu", lambda: weather.hava_durumu(41.0082, 28.9784, "İstanbul")),
+    ("sehirler_karsilastir", lambda: weather.sehirler_karsilastir("ankara", "izmir")),
+    ("havadurumu_aktivite_onerileri", lambda: weather.havadurumu_aktivite_onerileri("antalya")),
+]
+
+async def main(latency: float) -> None:
+    with MockOWMServer(latency=latency) as server:
+        use_mock(server)
+        # Open the shared client first so its setup is not charged to the first tool
+        await api.make_weather_request("weather", {"q": "warm-up"})
+        print(f"upstream latency {latency * 1000:.0f} ms per request")
+        for name, call in TOOLS:
+            api.response_cache.clear()
+            start = time.perf_counter()
+            await call()
+            print(f"{name:<32} {(time.perf_counter() - start) * 1000:8.1f} ms (cold cache)")
+        await api.close_client()
+
+    with MockOWMServer(failing_endpoints=["forecast"]) as server:
+        use_mock(server)
+        api.response_cache.clear()
+        report = await weather.hava_durumu(41.0082, 28.9784, "İstanbul")
+        assert "MEVCUT DURUM" in report and "tahmini alınamadı" in report
+        report = await weather.havadurumu_aktivite_onerileri("antalya")
+        assert "ÖNERİLEN AKTİVİTELER" in report and "Tahmin alınamadı" in report
+        print("forecast failing: current conditions still reported")
+        await api.close_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,71 @@
+"""Tracing and profiling: overhead, a traced cold call, and captured stacks.
+
+Times cached tool calls with tracing off and in local mode, prints the span
+tree of a cold ``havadurumu_aktivite_onerileri`` call against the mock server,
+then runs the sampling profiler over a batch of multi-city calls and checks
+that the slowest calls come back as folded stacks.
+
+Usage: python -m benchmarks.bench_tracing
+"""
+
+import asyncio
+import time
+
+import api
+import weather
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from profiler import SamplingProfiler
+from ratelimit import QuotaLimiter
+from tracing import tracer
+
+CITIES = ["Ankara", "İzmir", "Antalya", "Bursa", "Konya", "Trabzon", "Erzurum", "Van", "Samsun", "Edirne"]
+
+async def per_call(repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await weather.mcp.call_tool("havadurumu_aktivite_onerileri", {"sehir": "ankara"})
+    return (time.perf_counter() - start) / repeat * 1e6
+
+async def main() -> None:
+    with MockOWMServer(latency=0.03) as server:
+        use_mock(server)
+        api.upstream_limiter = QuotaLimiter(per_minute=1e9, per_day=1e12)
+        async with api.lifespan(None):
+            await weather.mcp.call_tool("havadurumu_aktivite_onerileri", {"sehir": "ankara"})
+            tracer.set_mode("off")
+            off = min([await per_call(2000) for _ in range(3)])
+            tracer.set_mode("local")
+            local = min([await per_call(2000) for _ in range(3)])
+            print(f"cached tool call, tracing off:   {off:7.1f} µs")
+            print(f"cached tool call, tracing local: {local:7.1f} µs (+{local - off:.1f} µs)")
+
+            api.response_cache.clear()
+            await weather.mcp.call_tool("havadurumu_aktivite_onerileri", {"sehir": "izmir"})
+            trace = next(t for t in tracer.recent_traces() if t["name"] == "tool.havadurumu_aktivite_onerileri"
+                         and t["duration_ms"] > 20)
+            print(f"\ncold havadurumu_aktivite_onerileri, {trace['duration_ms']:.1f} ms:")
+            for row in trace["spans"]:
+                print(f"  {row['span']:<36} {row['duration_ms']:8.2f} ms  self {row['self_ms']:7.2f} ms  "
+                      f"{row.get('attributes', '')}")
+            names = {row["span"].strip() for row in trace["spans"]}
+            assert {"resolve_place", "weather_request", "ratelimit.acquire", "upstream.get", "decode"} <= names, names
+            tracer.set_mode("off")
+
+            profiler = SamplingProfiler(interval=0.001, keep=3)
+            weather.profiler, previous = profiler, weather.profiler
+            import metrics
+            metrics.profiler = profiler
+            profiler.enable()
+            for _ in range(20):
+                await weather.mcp.call_tool("coklu_sehir_hava_durumu", {"konumlar": CITIES, "yarin": True})
+            profiler.disable()
+            metrics.profiler = weather.profiler = previous
+            folded = profiler.folded().splitlines()
+            print(f"\nprofiler: {profiler.samples} samples, slowest calls "
+                  f"{[round(p.duration * 1000, 1) for p in profiler.slowest()]} ms")
+            for line in folded[:3]:
+                print("  " + (line if len(line) < 160 else line[:157] + "..."))
+            assert folded and all(line.startswith("coklu_sehir_hava_durumu;") for line in folded)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,372 @@
+"""Load generator for the MCP tools, against the local mock OpenWeatherMap.
+
+Drives every ``@mcp.tool()`` in weather.py with a seeded random mix of calls,
+either in-process through FastMCP's tool dispatch, over real stdio MCP
+sessions, each a separate ``python weather.py`` process, or over streamable
+HTTP sessions to one ``python weather.py --transport streamable-http`` server
+with ``--workers`` worker processes. Reports p50/p95/p99
+latency per tool and overall, throughput and upstream calls as JSON. With
+``--baseline`` the run is compared against an earlier report and the exit
+status is 1 if it regressed by more than ``--tolerance``. With ``--record``
+the upstream answers are also written to an archive; with ``--replay`` they
+are served from one instead of the mock (see replay.py). With ``--demo`` the
+servers run without an API key and answer with demo data (see demo.py).
+
+Usage:
+    python -m benchmarks.loadgen --mode inprocess --requests 2000 --concurrency 32
+    python -m benchmarks.loadgen --mode stdio --sessions 4 --latency 0.05 --error-rate 0.05
+    python -m benchmarks.loadgen --mode http --workers 4 --sessions 8 --concurrency 64
+    python -m benchmarks.loadgen --baseline benchmarks/results/stdio-20260101-120000.json
+    python -m benchmarks.loadgen --mode stdio --replay data/upstream.jsonl.gz
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from benchmarks.mock_owm import MockOWMServer, use_mock
+from gazetteer import get_gazetteer
+
+ROOT = Path(__file__).resolve().parent.parent
+DEMO_KEY = "YOUR_API_KEY_HERE"  # the placeholder key switches the server to demo data
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+Place = Dict[str, Any]
+# Arguments for each tool, drawn from the benchmark's city set
+WORKLOAD: Dict[str, Callable[[random.Random, Sequence[Place]], Dict[str, Any]]] = {
+    "hava_durumu": lambda rng, places: (lambda p: {"enlem": p["lat"], "boylam": p["lon"],
+                                                   "yer_adi": p["name"]})(rng.choice(places)),
+    "hava_durumu_sehir": lambda rng, places: {"sehir": rng.choice(places)["name"]},
+    "saatlik_hava_durumu": lambda rng, places: {"sehir": rng.choice(places)["name"],
+                                                "gun_sayisi": rng.randint(1, 3)},
+    "hava_kalitesi": lambda rng, places: {"sehir": rng.choice(places)["name"]},
+    "sehirler_karsilastir": lambda rng, places: dict(zip(("sehir1", "sehir2"),
+                                                         (p["name"] for p in rng.sample(places, 2)))),
+    "havadurumu_aktivite_onerileri": lambda rng, places: {"sehir": rng.choice(places)["name"]},
+    "coklu_sehir_hava_durumu": lambda rng, places: {
+        "konumlar": [p["name"] for p in rng.sample(places, min(3, len(places)))],
+        "yarin": rng.random() < 0.5},
+    "hava_alarmlari": lambda rng, places: {},
+    "turk_sehirleri_listesi": lambda rng, places: {},
+}
+
+Call = Callable[[int, str, Dict[str, Any]], Awaitable[bool]]
+
+def upstream_mode(args: argparse.Namespace) -> Tuple[str, Optional[str]]:
+    """("live", None), ("demo", None), ("record", archive) or ("replay", archive)."""
+    if args.demo:
+        return "demo", None
+    if args.replay:
+        return "replay", os.path.abspath(args.replay)
+    if args.record:
+        return "record", os.path.abspath(args.record)
+    return "live", None
+
+def server_env(server: MockOWMServer, args: argparse.Namespace) -> Dict[str, str]:
+    """Environment of a server process talking to the mock, replaying an archive or on demo data."""
+    mode, archive = upstream_mode(args)
+    env = dict(os.environ, OPENWEATHER_API_BASE=server.base_url,
+               OPENWEATHER_API_KEY=DEMO_KEY if mode == "demo" else "benchmark-key",
+               WEATHER_PREFETCH="1" if args.prefetch else "0",
+               WEATHER_UPSTREAM="live" if mode == "demo" else mode)
+    if archive:
+        env["WEATHER_ARCHIVE"] = archive
+    return env
+
+def plan(tools: Sequence[str], requests: int, cities: int, seed: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """The (tool, arguments) sequence to send, the same for a given seed."""
+    missing = sorted(set(tools) - WORKLOAD.keys())
+    if missing:
+        raise SystemExit(f"no workload defined for tools: {', '.join(missing)}")
+    rng = random.Random(seed)
+    places = list(get_gazetteer().provinces.values())[:max(cities, 3)]
+    return [(tool, WORKLOAD[tool](rng, places)) for tool in (rng.choice(tools) for _ in range(requests))]
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence."""
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+def summarize(samples: List[float], errors: int) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+async def drive(call: Call, calls: List[Tuple[str, Dict[str, Any]]], concurrency: int
+                ) -> Tuple[float, Dict[str, List[float]], Dict[str, int]]:
+    """Send the planned calls from ``concurrency`` workers; returns elapsed time,
+    latencies and error counts per tool."""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    pending = iter(calls)
+
+    async def worker(index: int) -> None:
+        for tool, args in pending:
+            start = time.perf_counter()
+            try:
+                ok = await call(index, tool, args)
+            except Exception:
+                ok = False
+            latencies.setdefault(tool, []).append(time.perf_counter() - start)
+            if not ok:
+                errors[tool] = errors.get(tool, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+async def run_inprocess(args: argparse.Namespace, server: MockOWMServer) -> Tuple[float, Dict, Dict]:
+    import api
+    import weather
+    use_mock(server)
+    mode, archive = upstream_mode(args)
+    if mode == "demo":
+        api.OPENWEATHER_API_KEY = DEMO_KEY
+    else:
+        api.UPSTREAM_MODE = mode
+    if archive:
+        api.UPSTREAM_ARCHIVE = archive
+    lifespan = weather.server_lifespan if args.prefetch else api.lifespan
+    async with lifespan(weather.mcp):
+        tools = [tool.name for tool in await weather.mcp.list_tools()]
+        calls = plan(tools, args.warmup + args.requests, args.cities, args.seed)
+
+        async def call(index: int, tool: str, arguments: Dict[str, Any]) -> bool:
+            await weather.mcp.call_tool(tool, arguments)  # raises ToolError on failure
+            return True
+
+        await drive(call, calls[:args.warmup], args.concurrency)
+        server.reset()
+        return await drive(call, calls[args.warmup:], args.concurrency)
+
+async def run_stdio(args: argparse.Namespace, server: MockOWMServer) -> Tuple[float, Dict, Dict]:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[str(ROOT / "weather.py")],
+                                   env=server_env(server, args), cwd=str(ROOT))
+    async with AsyncExitStack() as stack:
+        errlog = stack.enter_context(open(args.server_log or os.devnull, "w"))
+        sessions: List[ClientSession] = []
+        for _ in range(args.sessions):
+            read, write = await stack.enter_async_context(stdio_client(params, errlog=errlog))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions.append(session)
+        tools = [tool.name for tool in (await sessions[0].list_tools()).tools]
+        calls = plan(tools, args.warmup + args.requests, args.cities, args.seed)
+
+        async def call(index: int, tool: str, arguments: Dict[str, Any]) -> bool:
+            result = await sessions[index % len(sessions)].call_tool(tool, arguments)
+            return not result.isError
+
+        await drive(call, calls[:args.warmup], args.concurrency)
+        server.reset()
+        return await drive(call, calls[args.warmup:], args.concurrency)
+
+@asynccontextmanager
+async def http_server(server: MockOWMServer, workers: int, prefetch: bool = False,
+                      log: Optional[str] = None, env_overrides: Optional[Dict[str, str]] = None
+                      ) -> AsyncIterator[Tuple[str, subprocess.Popen]]:
+    """Run ``weather.py --transport streamable-http`` against the mock with a
+    fresh shared cache; yields its base URL and process, and stops it with
+    SIGTERM like a process manager would. env_overrides replaces parts of the
+    default environment (see server_env)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    with tempfile.TemporaryDirectory() as cache_dir, open(log or os.devnull, "w") as errlog:
+        env = dict(os.environ, OPENWEATHER_API_BASE=server.base_url, OPENWEATHER_API_KEY="benchmark-key",
+                   WEATHER_PREFETCH="1" if prefetch else "0")
+        env.update(env_overrides or {})
+        env["WEATHER_CACHE_DB"] = os.path.join(cache_dir, "cache.db")
+        process = subprocess.Popen([sys.executable, str(ROOT / "weather.py"), "--transport", "streamable-http",
+                                    "--port", str(port), "--workers", str(workers)],
+                                   env=env, cwd=str(ROOT), stdout=errlog, stderr=errlog)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            async with httpx.AsyncClient() as client:
+                for _ in range(300):
+                    if process.poll() is not None:
+                        raise RuntimeError(f"HTTP server exited with status {process.returncode}")
+                    try:
+                        if (await client.get(f"{base_url}/health")).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    await asyncio.sleep(0.1)
+                else:
+                    raise RuntimeError("HTTP server did not become healthy")
+            yield base_url, process
+        finally:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+                await asyncio.to_thread(process.wait, 60)
+
+async def run_http(args: argparse.Namespace, server: MockOWMServer) -> Tuple[float, Dict, Dict]:
+    from mcp import ClientSession
+    try:
+        from mcp.client.streamable_http import streamable_http_client
+    except ImportError:  # renamed in mcp 1.24; older releases only have this name
+        from mcp.client.streamable_http import streamablehttp_client as streamable_http_client
+
+    async with AsyncExitStack() as stack:
+        base_url, _ = await stack.enter_async_context(http_server(server, args.workers, args.prefetch,
+                                                                  args.server_log, server_env(server, args)))
+        sessions: List[ClientSession] = []
+        for _ in range(args.sessions):
+            read, write, _ = await stack.enter_async_context(streamable_http_client(f"{base_url}/mcp"))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions.append(session)
+        tools = [tool.name for tool in (await sessions[0].list_tools()).tools]
+        calls = plan(tools, args.warmup + args.requests, args.cities, args.seed)
+
+        async def call(index: int, tool: str, arguments: Dict[str, Any]) -> bool:
+            result = await sessions[index % len(sessions)].call_tool(tool, arguments)
+            return not result.isError
+
+        await drive(call, calls[:args.warmup], args.concurrency)
+        server.reset()
+        return await drive(call, calls[args.warmup:], args.concurrency)
+
+def build_report(args: argparse.Namespace, elapsed: float, latencies: Dict[str, List[float]],
+                 errors: Dict[str, int], server: MockOWMServer) -> Dict[str, Any]:
+    completed = sum(len(samples) for samples in latencies.values())
+    upstream = sum(server.hits.values())
+    return {
+        "mode": args.mode,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests, "warmup": args.warmup, "concurrency": args.concurrency,
+            "sessions": args.sessions if args.mode != "inprocess" else None,
+            "workers": args.workers if args.mode == "http" else None, "cities": args.cities,
+            "seed": args.seed, "prefetch": args.prefetch, "upstream": upstream_mode(args)[0],
+            "mock": {"latency_ms": args.latency * 1000, "error_rate": args.error_rate,
+                     "tail_rate": args.tail_rate, "tail_latency_ms": args.tail_latency * 1000,
+                     "rate_limit_per_second": args.rate_limit},
+        },
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else None,
+        "overall": summarize([s for samples in latencies.values() for s in samples], sum(errors.values())),
+        "tools": {tool: summarize(latencies.get(tool, []), errors.get(tool, 0)) for tool in sorted(latencies)},
+        "upstream": {
+            "calls": dict(sorted(server.hits.items())),
+            "total": upstream,
+            "per_tool_call": round(upstream / completed, 4) if completed else None,
+            "responses": {str(status): n for status, n in sorted(server.statuses.items())},
+        },
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float) -> List[str]:
+    """Regressions of report against baseline beyond the relative tolerance.
+
+    Latencies must also have grown by at least min_delta_ms, so that jitter
+    on sub-millisecond tools is not reported.
+    """
+    regressions = []
+
+    def check(label: str, current: Optional[float], previous: Optional[float],
+              higher_is_worse: bool = True, floor: float = 0.0):
+        if current is None or not previous:
+            return
+        change = (current - previous) / previous
+        print(f"  {label:<48} {previous:10.2f} -> {current:10.2f} ({change:+.1%})")
+        if (change if higher_is_worse else -change) > tolerance and abs(current - previous) >= floor:
+            regressions.append(f"{label}: {previous} -> {current}")
+
+    print(f"compared with baseline from {baseline.get('timestamp')}:")
+    check("throughput (req/s)", report["throughput_rps"], baseline.get("throughput_rps"), higher_is_worse=False)
+    check("upstream calls per tool call", report["upstream"]["per_tool_call"],
+          baseline.get("upstream", {}).get("per_tool_call"))
+    for quantile in ("p50_ms", "p95_ms", "p99_ms"):
+        check(f"overall {quantile}", report["overall"].get(quantile),
+              baseline.get("overall", {}).get(quantile), floor=min_delta_ms)
+    for tool, stats in report["tools"].items():
+        check(f"{tool} p95_ms", stats.get("p95_ms"),
+              baseline.get("tools", {}).get(tool, {}).get("p95_ms"), floor=min_delta_ms)
+    return regressions
+
+async def main(args: argparse.Namespace) -> int:
+    with MockOWMServer(latency=args.latency, error_rate=args.error_rate, tail_rate=args.tail_rate,
+                       tail_latency=args.tail_latency, rate_limit=args.rate_limit, seed=args.seed) as server:
+        runner = {"inprocess": run_inprocess, "stdio": run_stdio, "http": run_http}[args.mode]
+        elapsed, latencies, errors = await runner(args, server)
+        report = build_report(args, elapsed, latencies, errors, server)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{args.mode}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    overall = report["overall"]
+    print(f"{args.mode}: {overall['count']} calls in {report['duration_s']} s, "
+          f"{report['throughput_rps']} req/s, {overall['errors']} errors")
+    print(f"latency p50 {overall.get('p50_ms')} ms, p95 {overall.get('p95_ms')} ms, p99 {overall.get('p99_ms')} ms")
+    print(f"upstream calls {report['upstream']['total']} ({report['upstream']['per_tool_call']} per tool call)")
+    for tool, stats in report["tools"].items():
+        print(f"  {tool:<32} n={stats['count']:<5} p50 {stats.get('p50_ms', 0):8.2f} "
+              f"p95 {stats.get('p95_ms', 0):8.2f} p99 {stats.get('p99_ms', 0):8.2f} ms  errors {stats['errors']}")
+    print(f"report written to {output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()),
+                              args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("REGRESSIONS:\n  " + "\n  ".join(regressions))
+            return 1
+        print("no regressions beyond the tolerance")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "stdio", "http"), default="inprocess")
+    parser.add_argument("--requests", type=int, default=1000, help="measured tool calls")
+    parser.add_argument("--warmup", type=int, default=0, help="unmeasured tool calls sent first")
+    parser.add_argument("--concurrency", type=int, default=16, help="tool calls in flight")
+    parser.add_argument("--sessions", type=int, default=2,
+                        help="server processes in stdio mode, client sessions in http mode")
+    parser.add_argument("--workers", type=int, default=2, help="HTTP server worker processes in http mode")
+    parser.add_argument("--cities", type=int, default=10, help="provinces the workload draws from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefetch", action="store_true", help="run the prefetch scheduler as well")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock upstream latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls failing with 500")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of upstream calls slowed down")
+    parser.add_argument("--tail-latency", type=float, default=1.0, help="latency of the slow fraction (s)")
+    parser.add_argument("--rate-limit", type=int, default=0, help="upstream requests per second before 429s")
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument("--record", metavar="ARCHIVE", help="also write the upstream answers to this archive")
+    archive.add_argument("--replay", metavar="ARCHIVE",
+                         help="serve upstream answers from this archive instead of the mock")
+    archive.add_argument("--demo", action="store_true", help="run without an API key, on demo data")
+    parser.add_argument("--server-log", help="file for the stdio or HTTP servers' output")
+    parser.add_argument("--output", help="report path (default benchmarks/results/<mode>-<time>.json)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="latency increase below which no regression is reported")
+    sys.exit(asyncio.run(main(parser.parse_args())))
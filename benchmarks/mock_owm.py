@@ -0,0 +1,195 @@
+"""Local stand-in for the OpenWeatherMap API used by the benchmarks."""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+def weather_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """Build a current-weather payload shaped like OpenWeatherMap's."""
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [{"id": 802, "main": "Clouds", "description": "parçalı bulutlu", "icon": "03d"}],
+        "main": {"temp": 21.4, "feels_like": 21.0, "temp_min": 19.8, "temp_max": 23.1,
+                 "pressure": 1014, "humidity": 58},
+        "visibility": 10000,
+        "wind": {"speed": 4.1, "deg": 210},
+        "clouds": {"all": 40},
+        "dt": int(time.time()),
+        "timezone": 10800,
+        "name": "Mock",
+        "cod": 200,
+    }
+
+def forecast_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """Build a 5 day / 3 hour forecast payload with 40 entries."""
+    start = int(time.time()) // 10800 * 10800 + 10800
+    conditions = [(800, "Clear", "açık"), (802, "Clouds", "parçalı bulutlu"),
+                  (500, "Rain", "hafif yağmur"), (804, "Clouds", "kapalı")]
+    items = []
+    for i in range(40):
+        cid, main, description = conditions[i % len(conditions)]
+        item = {
+            "dt": start + i * 10800,
+            "main": {"temp": round(15 + 6 * ((i % 8) - 4) / 4, 2), "feels_like": 15.0,
+                     "temp_min": 12.0, "temp_max": 21.0, "pressure": 1012, "sea_level": 1012,
+                     "grnd_level": 1003, "humidity": 60 + i % 30, "temp_kf": 0.0},
+            "weather": [{"id": cid, "main": main, "description": description, "icon": "01d"}],
+            "clouds": {"all": 20},
+            "wind": {"speed": 2.0 + (i % 5), "deg": 180, "gust": 5.0},
+            "visibility": 10000,
+            "pop": 0.2,
+            "sys": {"pod": "d" if i % 8 < 4 else "n"},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(start + i * 10800)),
+        }
+        if main == "Rain":
+            item["rain"] = {"3h": 1.2}
+        items.append(item)
+    return {"cod": "200", "message": 0, "cnt": len(items), "list": items,
+            "city": {"name": "Mock", "coord": {"lat": lat, "lon": lon}, "timezone": 10800}}
+
+def air_pollution_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """Build an air pollution payload."""
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "list": [{
+            "main": {"aqi": 2},
+            "components": {"co": 230.3, "no": 0.1, "no2": 12.4, "o3": 68.7, "so2": 4.2,
+                           "pm2_5": 8.6, "pm10": 14.1, "nh3": 1.1},
+            "dt": int(time.time()),
+        }],
+    }
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connection bursts, which then wait
+    # a full second for the SYN retransmit
+    request_queue_size = 128
+
+PAYLOADS = {
+    "weather": weather_payload,
+    "forecast": forecast_payload,
+    "air_pollution": air_pollution_payload,
+}
+
+class MockOWMServer:
+    """Threaded HTTP/1.1 server answering the OpenWeatherMap endpoints we use.
+
+    Use as a context manager; ``base_url`` points at the running server and
+    ``hits`` counts requests per endpoint. Endpoints listed in
+    ``failing_endpoints`` answer with HTTP 500. A random ``error_rate``
+    fraction of other requests fails the same way, and a ``tail_rate``
+    fraction is delayed by ``tail_latency`` instead of ``latency``. With
+    ``rate_limit`` set, requests beyond that many per second get HTTP 429
+    with a Retry-After header. ``statuses`` counts the response codes sent.
+    """
+
+    def __init__(self, latency: float = 0.0, failing_endpoints: Iterable[str] = (),
+                 error_rate: float = 0.0, tail_rate: float = 0.0, tail_latency: float = 0.0,
+                 rate_limit: int = 0, seed: int = 0):
+        self.latency = latency
+        self.failing_endpoints = set(failing_endpoints)
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.rate_limit = rate_limit
+        self._window = (0, 0)  # (second, requests seen in it)
+        self._rng = random.Random(seed)
+        self.hits: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._httpd = _Server(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/data/2.5"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits.clear()
+            self.statuses.clear()
+
+    def _over_limit(self) -> bool:
+        """Count a request against the per-second limit; call with the lock held."""
+        if not self.rate_limit:
+            return False
+        second = int(time.monotonic())
+        count = self._window[1] + 1 if self._window[0] == second else 1
+        self._window = (second, count)
+        return count > self.rate_limit
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                endpoint = url.path.rsplit("/", 1)[-1]
+                query = parse_qs(url.query)
+                with server._lock:
+                    server.hits[endpoint] += 1
+                    limited = server._over_limit()
+                    slow = server._rng.random() < server.tail_rate
+                    fail = server._rng.random() < server.error_rate
+                if limited:
+                    self._send(429, {"cod": 429, "message": "injected rate limit"}, {"Retry-After": "1"})
+                    return
+                delay = server.tail_latency if slow else server.latency
+                if delay:
+                    time.sleep(delay)
+                if fail or endpoint in server.failing_endpoints:
+                    self._send(500, {"cod": "500", "message": "injected failure"})
+                    return
+                if endpoint not in PAYLOADS:
+                    self._send(404, {"cod": "404", "message": "not found"})
+                    return
+                lat = float(query.get("lat", ["0"])[0])
+                lon = float(query.get("lon", ["0"])[0])
+                self._send(200, PAYLOADS[endpoint](lat, lon))
+
+            def _send(self, status: int, body: Dict[str, Any],
+                      headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(body).encode()
+                with server._lock:
+                    server.statuses[status] += 1
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except ConnectionError:
+                    pass  # client gave up, e.g. a cancelled hedged request
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "MockOWMServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def use_mock(server: MockOWMServer) -> None:
+    """Point the api module at the mock server with a non-placeholder key."""
+    import api
+    api.OPENWEATHER_API_BASE = server.base_url
+    api.OPENWEATHER_API_KEY = "benchmark-key"
+    # httpx logs every request at INFO, which drowns the benchmark output
+    logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -0,0 +1,140 @@
+"""In-process TTL cache for OpenWeatherMap responses."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config import CACHE_COORD_PRECISION
+
+# States returned by TTLCache.lookup
+FRESH = "fresh"  # within its TTL
+STALE = "stale"  # expired, but within the grace window: serve it and refresh
+EXPIRED = "expired"  # past the grace window, only usable if upstream fails
+
+def cache_key(endpoint: str, lat: float, lon: float) -> Tuple[str, float, float]:
+    """Build a cache key from an endpoint and coordinates rounded to the cache precision."""
+    return (endpoint, round(float(lat), CACHE_COORD_PRECISION), round(float(lon), CACHE_COORD_PRECISION))
+
+class CacheEntry:
+    """A cached value with its approximate size, storage time and absolute expiry time."""
+
+    __slots__ = ("value", "size", "stored_at", "expires_at")
+
+    def __init__(self, value: Any, size: int, stored_at: float, expires_at: float):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+class TTLCache:
+    """LRU cache whose entries expire after a per-entry TTL.
+
+    The cache is bounded both by entry count and by the total approximate
+    size of its entries; when either bound is exceeded the least recently
+    used entries are evicted. Expired entries are kept for ``stale_grace``
+    seconds as STALE and after that as EXPIRED, until they are
+    ``max_stale_age`` seconds old. Hit, stale hit, miss, expiration and
+    eviction counters are kept for diagnostics.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, stale_grace: float = 0.0,
+                 max_stale_age: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_grace = stale_grace
+        self.max_stale_age = max_stale_age
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> Optional[Tuple[Any, str, float]]:
+        """Return (value, state, age in seconds) for key, or None if nothing usable is cached.
+
+        The state is FRESH, STALE or EXPIRED. Only FRESH and STALE lookups
+        count as hits.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        now = self._clock()
+        age = now - entry.stored_at
+        if now < entry.expires_at:
+            state = FRESH
+            self.hits += 1
+        elif age > max(self.max_stale_age, entry.expires_at - entry.stored_at):
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        elif now < entry.expires_at + self.stale_grace:
+            state = STALE
+            self.stale_hits += 1
+        else:
+            state = EXPIRED
+            self.misses += 1
+        self._entries.move_to_end(key)
+        return entry.value, state, age
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if it is missing or not fresh."""
+        found = self.lookup(key)
+        if found is None or found[1] != FRESH:
+            return None
+        return found[0]
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until key expires (negative once expired), or None if not cached.
+
+        Unlike lookup(), this does not touch the counters or the LRU order.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry.expires_at - self._clock()
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 0) -> None:
+        """Store value under key for ttl seconds, evicting LRU entries if needed."""
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        now = self._clock()
+        self._entries[key] = CacheEntry(value, size, now, now + ttl)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache counters and current size."""
+        hits = self.hits + self.stale_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
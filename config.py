@@ -1,25 +1,182 @@
 """Configuration settings and constants for the weather application."""
 
-# API Configuration
-OPENWEATHER_API_BASE = "https://api.openweathermap.org/data/2.5"
-<<<<<<< HEAD
-OPENWEATHER_API_KEY = "YOUR_API_KEY_HERE"
-=======
-OPENWEATHER_API_KEY = "your_key"
->>>>>>> be9c914f6bb6c11bfa0bfed8f02ae564922c18a5
+import os
+
+# API Configuration; the environment overrides these, e.g. to point at the benchmark mock
+OPENWEATHER_API_BASE = os.environ.get("OPENWEATHER_API_BASE", "https://api.openweathermap.org/data/2.5")
+OPENWEATHER_API_KEY = os.environ.get("OPENWEATHER_API_KEY", "YOUR_API_KEY_HERE")
 USER_AGENT = "weather-turkey-app/1.0"
 
-# Dictionary of major Turkish cities with their coordinates
-TURKISH_CITIES = {
-    "istanbul": {"lat": 41.0082, "lon": 28.9784, "name": "İstanbul"},
-    "ankara": {"lat": 39.9334, "lon": 32.8597, "name": "Ankara"},
-    "izmir": {"lat": 38.4237, "lon": 27.1428, "name": "İzmir"},
-    "antalya": {"lat": 36.8841, "lon": 30.7056, "name": "Antalya"},
-    "bursa": {"lat": 40.1885, "lon": 29.0610, "name": "Bursa"},
-    "adana": {"lat": 37.0000, "lon": 35.3213, "name": "Adana"},
-    "konya": {"lat": 37.8667, "lon": 32.4833, "name": "Konya"},
-    "gaziantep": {"lat": 37.0662, "lon": 37.3833, "name": "Gaziantep"},
-    "mersin": {"lat": 36.8000, "lon": 34.6333, "name": "Mersin"},
-    "diyarbakir": {"lat": 37.9144, "lon": 40.2306, "name": "Diyarbakır"},
-    "kayseri": {"lat": 38.7312, "lon": 35.4787, "name": "Kayseri"}
+# HTTP client configuration (one shared client per server process)
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 30.0  # seconds an idle connection is kept open
+HTTP2_ENABLED = True  # only used when the optional 'h2' package is installed
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_DEFAULT_TIMEOUT = 30.0
+# Read timeouts per endpoint; forecast payloads are larger than the others
+HTTP_ENDPOINT_TIMEOUTS = {
+    "weather": 10.0,
+    "forecast": 15.0,
+    "air_pollution": 10.0,
+}
+# Overall deadline for the upstream fetches of a single tool call
+TOOL_DEADLINE = 25.0
+
+# Upstream rate limit (OpenWeatherMap free tier: 60 calls per minute)
+UPSTREAM_CALLS_PER_MINUTE = 60
+UPSTREAM_BURST = 60  # calls allowed back to back before pacing starts
+UPSTREAM_CALLS_PER_DAY = 30000  # free tier: 1,000,000 calls per month
+UPSTREAM_MAX_QUEUE_WAIT = 10.0  # seconds a call may queue before falling back to cached data
+
+# Upstream mode. "live" talks to OpenWeatherMap. "record" does too and appends
+# every answer to the gzip-compressed JSON-lines archive UPSTREAM_ARCHIVE (without
+# the API key). "replay" answers from that archive with no network access, so
+# benchmarks and CI run the real parsing and formatting on recorded payloads
+UPSTREAM_MODE = os.environ.get("WEATHER_UPSTREAM", "live")  # live | record | replay
+UPSTREAM_ARCHIVE = os.environ.get(
+    "WEATHER_ARCHIVE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "upstream.jsonl.gz"))
+# Simulated latency of replayed answers in seconds; "recorded" waits as long as
+# upstream took when the answer was recorded
+_replay_latency = os.environ.get("WEATHER_REPLAY_LATENCY", "recorded")
+REPLAY_LATENCY = None if _replay_latency == "recorded" else float(_replay_latency)
+# Requests for unrecorded coordinates get the answer recorded nearest to them
+# (for the same endpoint) instead of a 404
+REPLAY_NEAREST = True
+
+# Demo mode (no API key): answers are synthesized in OpenWeatherMap's format
+# and go through the usual parsing and formatting. They depend only on the
+# place, the time bucket and DEMO_SEED, so they repeat within a bucket
+DEMO_SEED = int(os.environ.get("WEATHER_DEMO_SEED", "0"))
+DEMO_TIME_BUCKET = 3600  # seconds; current weather and air quality change once per bucket
+
+# Retries for transient upstream failures (timeouts, connection errors, 5xx),
+# spaced with decorrelated jitter
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.2  # seconds
+RETRY_MAX_DELAY = 2.0  # seconds
+
+# Hedged requests: if an attempt is slower than the endpoint's recent p95
+# latency, a second identical request is sent and the first answer wins
+HEDGE_ENABLED = True
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20  # latencies recorded before hedging starts
+HEDGE_MIN_DELAY = 0.1  # seconds; never hedge sooner than this
+
+# Per-endpoint circuit breaker: after this many consecutive failures calls
+# fail fast (or are answered from the cache) until a probe succeeds
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30.0  # seconds before a probe is let through
+
+# Multi-city batch requests
+BATCH_MAX_LOCATIONS = 100
+BATCH_MAX_CONCURRENCY = 8  # upstream requests in flight per batch
+BATCH_DEADLINE = 120.0  # seconds for a whole batch
+
+# JSON decoder for upstream payloads: "auto" picks msgspec, then orjson, then
+# the standard library, depending on what is installed
+JSON_DECODER = os.environ.get("WEATHER_JSON_DECODER", "auto")
+
+# Response cache; OpenWeatherMap refreshes its data about every 10 minutes
+CACHE_TTLS = {  # seconds
+    "weather": 600,
+    "forecast": 1800,
+    "air_pollution": 900,
 }
+CACHE_MAX_ENTRIES = 2048
+CACHE_MAX_BYTES = 32 * 1024 * 1024  # approximate, based on response body size
+CACHE_COORD_PRECISION = 2  # decimal places of lat/lon used in cache keys (~1 km)
+# Stale-while-revalidate: within the grace window after expiry an entry is
+# served at once while it is refreshed in the background; up to the hard
+# maximum age it is served (flagged as stale) only if upstream fails
+CACHE_STALE_GRACE = 300  # seconds
+CACHE_MAX_STALE_AGE = 6 * 3600  # seconds since the response was fetched
+
+# Rendered tool reports, reused while the responses they were built from are cached
+RENDER_CACHE_MAX_ENTRIES = 1024
+
+# Optional on-disk cache shared across restarts and server processes (SQLite).
+# Disabled unless WEATHER_CACHE_DB points at a database file.
+PERSISTENT_CACHE_PATH = os.environ.get("WEATHER_CACHE_DB")
+PERSISTENT_CACHE_MAX_ENTRIES = 20000
+PERSISTENT_CACHE_COMPACT_INTERVAL = 900  # seconds between background compactions
+
+# Memoized results of normalize_turkish_text
+NORMALIZE_CACHE_SIZE = 4096
+
+# Bundled gazetteer of all 81 provinces and their districts, loaded on first use
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.json")
+GAZETTEER_MAX_COMPLETIONS = 5  # "did you mean" suggestions kept per prefix
+# The gazetteer and the indexes built from it (fuzzy, spatial) are compiled on
+# first use into this per-user cache directory, under a hash of their sources
+GAZETTEER_COMPILED_DIR = os.environ.get("WEATHER_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "weather-turkey")
+
+# Typo-tolerant place name matching
+FUZZY_MAX_DISTANCE = 2  # edits allowed; shorter names allow fewer (1 per 4 characters)
+FUZZY_MAX_CANDIDATES = 50  # trigram candidates ranked by edit distance
+FUZZY_MAX_SUGGESTIONS = 5
+FUZZY_AUTO_RESOLVE_MIN_LENGTH = 4  # shorter inputs only get suggestions
+
+# Reverse geocoding
+GEO_NAME_RADIUS_KM = 15.0  # coordinates within this distance are named after the place
+GEO_SNAP_RADIUS_KM = 3.0  # coordinates within this distance share the place's cache key
+
+# Predictive cache warming: the most requested places are refreshed shortly
+# before their cached responses expire, within a separate upstream budget
+PREFETCH_ENABLED = os.environ.get("WEATHER_PREFETCH", "1") != "0"
+PREFETCH_ENDPOINTS = ("weather", "forecast", "air_pollution")
+PREFETCH_TOP_K = 10  # places kept warm
+PREFETCH_CALLS_PER_MINUTE = 20  # upstream calls the warmer may spend per minute
+PREFETCH_LEAD_TIME = 60.0  # seconds before expiry an entry is refreshed
+PREFETCH_INTERVAL = 15.0  # seconds between scheduler passes
+PREFETCH_HALF_LIFE = 1800.0  # seconds for a place's request score to halve
+PREFETCH_MAX_TRACKED = 500  # places whose request scores are remembered
+
+# Metrics: latency histograms, error classes and in-flight counts, always collected.
+# Exported as the weather://diagnostics/metrics resource and optionally in the
+# Prometheus text format over HTTP and/or to a file (node_exporter textfile style)
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_HOST = os.environ.get("WEATHER_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("WEATHER_METRICS_PORT", "0"))  # 0: no HTTP endpoint
+METRICS_FILE = os.environ.get("WEATHER_METRICS_FILE")  # unset: no file dump
+METRICS_DUMP_INTERVAL = 15.0  # seconds between file dumps
+METRICS_SLOW_TOOL_SECONDS = 5.0  # tool calls slower than this are logged
+
+# Opt-in tracing of the request path. "local" keeps recent traces in memory
+# (weather://diagnostics/traces) and appends spans to TRACE_FILE as JSON lines
+# with OTLP field names; "otel" hands spans to the OpenTelemetry API instead
+TRACING_MODE = os.environ.get("WEATHER_TRACING", "off")  # off | local | otel
+TRACE_FILE = os.environ.get("WEATHER_TRACE_FILE")
+TRACE_KEEP = 50  # recent traces kept in memory
+
+# Sampling profiler for the slowest tool calls; toggled at runtime with SIGUSR2
+PROFILER_ENABLED = os.environ.get("WEATHER_PROFILER", "0") != "0"
+PROFILER_INTERVAL = 0.005  # seconds between stack samples
+PROFILER_KEEP_SLOWEST = 10  # tool calls whose folded stacks are kept
+
+# Streamable HTTP server mode (python weather.py --transport streamable-http).
+# Requests are stateless, so any worker process can answer any client. With
+# several workers the upstream budgets above are split evenly between them and
+# the workers share responses through the persistent cache, which defaults to
+# a file in the temporary directory unless WEATHER_CACHE_DB is set
+HTTP_SERVER_HOST = os.environ.get("WEATHER_HTTP_HOST", "127.0.0.1")
+HTTP_SERVER_PORT = int(os.environ.get("WEATHER_HTTP_PORT", "8000"))
+# Host names clients may reach the server by, comma separated (e.g.
+# "hava.example.com,10.0.0.5"). Requests whose Host or Origin header names any
+# other host are refused, which guards against DNS rebinding; loopback names
+# and the listening address are always allowed
+HTTP_ALLOWED_HOSTS = tuple(name.strip() for name in os.environ.get("WEATHER_ALLOWED_HOSTS", "").split(",")
+                           if name.strip())
+HTTP_SERVER_PATH = "/mcp"
+HTTP_JSON_RESPONSE = True  # answer each request with plain JSON instead of an SSE stream
+SERVER_WORKERS = max(1, int(os.environ.get("WEATHER_WORKERS", "1")))
+SHARED_CACHE_DB_NAME = "weather-turkey-cache.db"
+HTTP_ACCESS_LOG = os.environ.get("WEATHER_HTTP_ACCESS_LOG", "0") != "0"  # one log line per request
+HTTP_KEEPALIVE_TIMEOUT = 15  # seconds an idle client connection is kept open
+# On SIGTERM/SIGINT a worker stops accepting connections, gives open requests
+# this long to finish, then waits for background upstream fetches (cache
+# refreshes) up to SHUTDOWN_DRAIN_TIMEOUT before closing the HTTP client and cache
+HTTP_GRACEFUL_SHUTDOWN_TIMEOUT = 30.0
+SHUTDOWN_DRAIN_TIMEOUT = 10.0
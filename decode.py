@@ -0,0 +1,154 @@
+"""Decoding of upstream JSON payloads into the models.
+
+With msgspec installed, payloads of the modelled endpoints are decoded
+straight into small schemas that declare only the fields the models use;
+everything else in the payload is skipped without building Python objects.
+Otherwise the whole payload is decoded, with orjson if installed or the
+standard library, and then projected onto the model.
+"""
+
+import importlib.util
+import json
+import logging
+import math
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from config import JSON_DECODER
+from models import AirQuality, CurrentWeather, Forecast, parse_response
+
+logger = logging.getLogger(__name__)
+
+def _choose(preference: str) -> str:
+    """The first installed decoder of the preferred one, msgspec and orjson; else 'json'."""
+    candidates = ["msgspec", "orjson"] if preference == "auto" else [preference]
+    for name in candidates:
+        if name == "json" or importlib.util.find_spec(name) is not None:
+            return name
+    logger.warning("JSON decoder %r is not installed, using the standard library", preference)
+    return "json"
+
+DECODER = _choose(JSON_DECODER)
+
+def _build_projections() -> Dict[str, Callable[[bytes], Any]]:
+    """msgspec decoders for the modelled endpoints, keyed by endpoint."""
+    import msgspec
+
+    class Condition(msgspec.Struct):
+        id: Optional[int] = None
+        description: Optional[str] = None
+
+    class Main(msgspec.Struct):
+        temp: Optional[float] = None
+        feels_like: Optional[float] = None
+        humidity: Optional[int] = None
+
+    class Wind(msgspec.Struct):
+        speed: Optional[float] = None
+        deg: Optional[float] = None
+
+    class Weather(msgspec.Struct):
+        name: str = ""
+        main: Main = msgspec.field(default_factory=Main)
+        weather: List[Condition] = []
+        wind: Wind = msgspec.field(default_factory=Wind)
+
+    class ThreeHours(msgspec.Struct):
+        amount: float = msgspec.field(name="3h", default=0.0)
+
+    class Slot(msgspec.Struct):
+        dt: int
+        main: Main = msgspec.field(default_factory=Main)
+        weather: List[Condition] = []
+        wind: Wind = msgspec.field(default_factory=Wind)
+        rain: Optional[ThreeHours] = None
+        snow: Optional[ThreeHours] = None
+
+    class ForecastPayload(msgspec.Struct):
+        slots: List[Slot] = msgspec.field(name="list", default_factory=list)
+
+    class Aqi(msgspec.Struct):
+        aqi: int = 0
+
+    class Components(msgspec.Struct):
+        pm2_5: Optional[float] = None
+        pm10: Optional[float] = None
+        o3: Optional[float] = None
+        no2: Optional[float] = None
+        so2: Optional[float] = None
+        co: Optional[float] = None
+
+    class AirEntry(msgspec.Struct):
+        main: Aqi = msgspec.field(default_factory=Aqi)
+        components: Components = msgspec.field(default_factory=Components)
+
+    class AirPayload(msgspec.Struct):
+        entries: List[AirEntry] = msgspec.field(name="list", default_factory=list)
+
+    weather_decoder = msgspec.json.Decoder(Weather)
+    forecast_decoder = msgspec.json.Decoder(ForecastPayload)
+    air_decoder = msgspec.json.Decoder(AirPayload)
+    no_condition = Condition()
+
+    def weather(payload: bytes) -> CurrentWeather:
+        data = weather_decoder.decode(payload)
+        condition = data.weather[0] if data.weather else no_condition
+        description = sys.intern(condition.description) if condition.description is not None else None
+        return CurrentWeather(data.name, data.main.temp, data.main.feels_like, data.main.humidity,
+                              description, condition.id, data.wind.speed, data.wind.deg)
+
+    def forecast(payload: bytes) -> Forecast:
+        slots = forecast_decoder.decode(payload).slots
+        return Forecast.from_slots(
+            (slot.dt,
+             math.nan if slot.main.temp is None else slot.main.temp,
+             slot.main.humidity or 0,
+             slot.wind.speed or 0.0,
+             (slot.rain.amount if slot.rain else 0.0) + (slot.snow.amount if slot.snow else 0.0),
+             (slot.weather[0].id or 0) if slot.weather else 0,
+             (slot.weather[0].description or "") if slot.weather else "")
+            for slot in slots)
+
+    def air_pollution(payload: bytes) -> AirQuality:
+        entries = air_decoder.decode(payload).entries
+        entry = entries[0] if entries else AirEntry()
+        c = entry.components
+        return AirQuality(entry.main.aqi, c.pm2_5, c.pm10, c.o3, c.no2, c.so2, c.co)
+
+    return {"weather": weather, "forecast": forecast, "air_pollution": air_pollution}
+
+# Set up by _setup() on the first payload, so the server starts without
+# importing msgspec or orjson
+loads: Callable[[bytes], Any] = json.loads
+_projections: Optional[Dict[str, Callable[[bytes], Any]]] = None
+_ProjectionError: Any = ()
+
+def _setup() -> Dict[str, Callable[[bytes], Any]]:
+    """Import the chosen decoder and build its projections."""
+    global loads, _projections, _ProjectionError
+    if DECODER == "msgspec":
+        import msgspec
+        loads = msgspec.json.decode
+        _ProjectionError = msgspec.ValidationError
+        _projections = _build_projections()
+    elif DECODER == "orjson":
+        import orjson
+        loads = orjson.loads
+        _projections = {}
+    else:
+        _projections = {}
+    return _projections
+
+def decode_response(endpoint: str, payload: bytes) -> Any:
+    """Decode a response body into the endpoint's model, or into plain JSON if it has none.
+
+    A payload that does not fit the msgspec schema (an unexpected type, say)
+    is decoded again in full and projected like the other decoders do.
+    """
+    projection = (_projections if _projections is not None else _setup()).get(endpoint)
+    if projection is not None:
+        try:
+            return projection(payload)
+        except _ProjectionError as e:
+            logger.debug("Projection of %s payload failed (%s), decoding in full", endpoint, e)
+    return parse_response(endpoint, loads(payload))
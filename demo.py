@@ -0,0 +1,242 @@
+"""Synthetic OpenWeatherMap answers used while no API key is configured.
+
+``DemoTransport`` is given to the shared HTTP client in demo mode and answers
+the ``weather``, ``forecast`` and ``air_pollution`` requests with payloads in
+OpenWeatherMap's format, so demo output goes through the same decoding,
+parsing and formatting as real data. Every value is drawn from a random
+generator seeded with the place, the time and DEMO_SEED: the same place gets
+the same answer within a time bucket, in every process, and the forecast
+agrees with the current conditions. Kept apart from the rest so that the
+server only loads it in demo mode.
+"""
+
+import hashlib
+import json
+import math
+import random
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import httpx
+
+from config import DEMO_SEED, DEMO_TIME_BUCKET
+from models import TURKEY_UTC_OFFSET
+
+FORECAST_STEP = 3 * 3600
+FORECAST_SLOTS = 40
+
+# (main, description as sent with lang=tr, icon) per condition id
+WEATHER_TYPES: Dict[int, Tuple[str, str, str]] = {
+    800: ("Clear", "açık", "01"),
+    801: ("Clouds", "az bulutlu", "02"),
+    802: ("Clouds", "parçalı bulutlu", "03"),
+    803: ("Clouds", "çok bulutlu", "04"),
+    804: ("Clouds", "kapalı", "04"),
+    500: ("Rain", "hafif yağmur", "10"),
+    501: ("Rain", "orta şiddetli yağmur", "10"),
+    520: ("Rain", "sağanak yağmur", "09"),
+    211: ("Thunderstorm", "gök gürültülü fırtına", "11"),
+    600: ("Snow", "hafif kar yağışı", "13"),
+    601: ("Snow", "kar yağışı", "13"),
+    741: ("Fog", "sis", "50"),
+}
+# Conditions a day of each kind draws its 3-hour slots from
+REGIMES: Dict[str, Tuple[int, ...]] = {
+    "clear": (800, 800, 800, 801),
+    "fair": (801, 802, 802, 800),
+    "cloudy": (803, 804, 804, 802),
+    "rainy": (500, 501, 520, 804),
+    "stormy": (211, 520, 501, 803),
+    "foggy": (741, 741, 804, 803),
+}
+# Millimetres of precipitation per 3 hours
+PRECIPITATION = {500: (0.2, 2.0), 501: (2.0, 6.0), 520: (1.0, 8.0), 211: (3.0, 12.0),
+                 600: (0.2, 2.0), 601: (1.5, 5.0)}
+SNOW = {500: 600, 501: 601, 520: 601, 211: 601}
+
+def seed(*parts: Any) -> int:
+    """Seed for a generator, stable across processes unlike ``hash()``."""
+    digest = hashlib.blake2b(repr((DEMO_SEED,) + parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def _place(lat: float, lon: float) -> Tuple[float, float]:
+    return round(lat, 2), round(lon, 2)
+
+@lru_cache(maxsize=1024)
+def _day(lat: float, lon: float, day: int) -> Tuple[str, float, float, float]:
+    """(regime, temperature anomaly, wind base, wind direction) of a local day."""
+    rng = random.Random(seed("day", lat, lon, day))
+    winter = math.cos(2 * math.pi * (day % 365.25 - 15) / 365.25)  # 1 in January, -1 in July
+    weights = (3 - winter, 3, 2 + winter, 1 + winter, 0.5 + max(0.0, -winter), 0.3 + max(0.0, winter))
+    regime = rng.choices(tuple(REGIMES), weights)[0]
+    return regime, rng.gauss(0, 2.5), rng.uniform(1, 6), rng.uniform(0, 360)
+
+class Slot(NamedTuple):
+    """Conditions at one place and time."""
+
+    temp: float
+    feels_like: float
+    humidity: int
+    pressure: int
+    wind_speed: float
+    wind_deg: int
+    clouds: int
+    condition_id: int
+    precipitation: float
+    pop: float
+
+@lru_cache(maxsize=8192)
+def conditions(lat: float, lon: float, timestamp: int) -> Slot:
+    """Conditions at a place at a Unix time, the same every time they are asked for."""
+    local = timestamp + TURKEY_UTC_OFFSET
+    day, hour = local // 86400, local % 86400 / 3600
+    regime, anomaly, wind_base, wind_deg = _day(lat, lon, day)
+    rng = random.Random(seed("slot", lat, lon, timestamp))
+
+    # Warmer to the south and in summer, warmest in mid-afternoon
+    season = -math.cos(2 * math.pi * (day % 365.25 - 15) / 365.25)
+    annual_mean = 44 - 0.8 * abs(lat)
+    temp = (annual_mean + 11 * season * (1 if lat >= 0 else -1) + anomaly
+            + 4.5 * math.sin(2 * math.pi * (hour - 9) / 24) + rng.gauss(0, 0.6))
+    if regime in ("rainy", "stormy"):
+        temp -= 2.5
+
+    condition_id = rng.choice(REGIMES[regime])
+    if temp < 1.0 and condition_id in SNOW:
+        condition_id = SNOW[condition_id]
+    low, high = PRECIPITATION.get(condition_id, (0.0, 0.0))
+    precipitation = round(rng.uniform(low, high), 2) if high else 0.0
+
+    humidity = 55 - 12 * math.sin(2 * math.pi * (hour - 9) / 24) + rng.uniform(-8, 8)
+    if precipitation or condition_id == 741:
+        humidity += 25
+    wind_speed = max(0.0, wind_base + (3 if regime == "stormy" else 0) + rng.gauss(0, 1))
+    feels_like = temp
+    if temp < 10:
+        feels_like -= 0.7 * wind_speed  # wind chill
+    elif temp > 26:
+        feels_like += max(0.0, humidity - 40) * 0.05  # muggy heat
+    clouds = {800: 0, 801: 15, 802: 40, 803: 75}.get(condition_id, 95)
+    return Slot(
+        temp=round(temp, 2),
+        feels_like=round(feels_like, 2),
+        humidity=int(min(100, max(15, humidity))),
+        pressure=int(1013 - 4 * anomaly - (8 if precipitation else 0)),
+        wind_speed=round(wind_speed, 2),
+        wind_deg=int(wind_deg + rng.uniform(-30, 30)) % 360,
+        clouds=clouds,
+        condition_id=condition_id,
+        precipitation=precipitation,
+        pop=round(min(1.0, precipitation / 2 + (0.2 if clouds > 70 else 0.0)), 2),
+    )
+
+def _weather(condition_id: int, night: bool) -> Dict[str, Any]:
+    main, description, icon = WEATHER_TYPES[condition_id]
+    return {"id": condition_id, "main": main, "description": description, "icon": icon + ("n" if night else "d")}
+
+def _is_night(timestamp: int) -> bool:
+    hour = (timestamp + TURKEY_UTC_OFFSET) % 86400 // 3600
+    return not 6 <= hour < 19
+
+def weather_payload(lat: float, lon: float, now: float) -> Dict[str, Any]:
+    """Current weather: the conditions at the start of now's time bucket."""
+    lat, lon = _place(lat, lon)
+    start = int(now) // DEMO_TIME_BUCKET * DEMO_TIME_BUCKET
+    slot = conditions(lat, lon, start)
+    payload: Dict[str, Any] = {
+        "coord": {"lat": lat, "lon": lon},
+        "weather": [_weather(slot.condition_id, _is_night(start))],
+        "main": {"temp": slot.temp, "feels_like": slot.feels_like, "temp_min": round(slot.temp - 1.2, 2),
+                 "temp_max": round(slot.temp + 1.2, 2), "pressure": slot.pressure, "humidity": slot.humidity},
+        "visibility": 1000 if slot.condition_id == 741 else 10000,
+        "wind": {"speed": slot.wind_speed, "deg": slot.wind_deg},
+        "clouds": {"all": slot.clouds},
+        "dt": start,
+        "sys": {"country": "TR"},
+        "timezone": TURKEY_UTC_OFFSET,
+        "name": "",
+        "cod": 200,
+    }
+    if slot.precipitation:
+        payload["snow" if 600 <= slot.condition_id < 700 else "rain"] = {"1h": round(slot.precipitation / 3, 2)}
+    return payload
+
+def forecast_payload(lat: float, lon: float, now: float) -> Dict[str, Any]:
+    """5 day / 3 hour forecast starting at the first step after now's time bucket."""
+    lat, lon = _place(lat, lon)
+    first = (int(now) // DEMO_TIME_BUCKET * DEMO_TIME_BUCKET // FORECAST_STEP + 1) * FORECAST_STEP
+    items = []
+    for timestamp in range(first, first + FORECAST_SLOTS * FORECAST_STEP, FORECAST_STEP):
+        slot = conditions(lat, lon, timestamp)
+        night = _is_night(timestamp)
+        item = {
+            "dt": timestamp,
+            "main": {"temp": slot.temp, "feels_like": slot.feels_like, "temp_min": slot.temp,
+                     "temp_max": slot.temp, "pressure": slot.pressure, "humidity": slot.humidity},
+            "weather": [_weather(slot.condition_id, night)],
+            "clouds": {"all": slot.clouds},
+            "wind": {"speed": slot.wind_speed, "deg": slot.wind_deg, "gust": round(slot.wind_speed * 1.5, 2)},
+            "visibility": 1000 if slot.condition_id == 741 else 10000,
+            "pop": slot.pop,
+            "sys": {"pod": "n" if night else "d"},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)),
+        }
+        if slot.precipitation:
+            item["snow" if 600 <= slot.condition_id < 700 else "rain"] = {"3h": slot.precipitation}
+        items.append(item)
+    return {"cod": "200", "message": 0, "cnt": len(items), "list": items,
+            "city": {"name": "", "coord": {"lat": lat, "lon": lon}, "country": "TR",
+                     "timezone": TURKEY_UTC_OFFSET}}
+
+# Upper PM2.5 limits (μg/m³) of OpenWeatherMap's air quality index 1 to 4
+AQI_PM25_LIMITS = (10, 25, 50, 75)
+
+def air_pollution_payload(lat: float, lon: float, now: float) -> Dict[str, Any]:
+    """Air pollution in now's time bucket; rain and wind clear the air."""
+    lat, lon = _place(lat, lon)
+    start = int(now) // DEMO_TIME_BUCKET * DEMO_TIME_BUCKET
+    slot = conditions(lat, lon, start)
+    rng = random.Random(seed("air", lat, lon, start))
+    dispersion = 1 / (1 + 0.15 * slot.wind_speed + (0.8 if slot.precipitation else 0))
+    pm2_5 = round(rng.lognormvariate(3.0, 0.5) * dispersion, 2)
+    aqi = next((index for index, limit in enumerate(AQI_PM25_LIMITS, 1) if pm2_5 < limit), 5)
+    components = {
+        "co": round(rng.uniform(200, 900) * dispersion + 150, 2),
+        "no": round(rng.uniform(0, 5), 2),
+        "no2": round(rng.uniform(5, 60) * dispersion, 2),
+        "o3": round(rng.uniform(30, 120) * (1.3 if slot.temp > 25 else 1.0), 2),
+        "so2": round(rng.uniform(1, 25) * dispersion, 2),
+        "pm2_5": pm2_5,
+        "pm10": round(pm2_5 * rng.uniform(1.2, 2.0), 2),
+        "nh3": round(rng.uniform(0.5, 8), 2),
+    }
+    return {"coord": {"lat": lat, "lon": lon},
+            "list": [{"main": {"aqi": aqi}, "components": components, "dt": start}]}
+
+PAYLOADS: Dict[str, Callable[[float, float, float], Dict[str, Any]]] = {
+    "weather": weather_payload,
+    "forecast": forecast_payload,
+    "air_pollution": air_pollution_payload,
+}
+
+def demo_payload(endpoint: str, lat: float, lon: float, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """The demo answer of an endpoint for a place, or None for an unknown endpoint."""
+    build = PAYLOADS.get(endpoint)
+    return None if build is None else build(lat, lon, time.time() if now is None else now)
+
+class DemoTransport(httpx.AsyncBaseTransport):
+    """Answers OpenWeatherMap requests with demo payloads, without any network access."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        params = request.url.params
+        try:
+            payload = demo_payload(endpoint, float(params["lat"]), float(params["lon"]))
+        except (KeyError, ValueError):
+            payload = None
+        if payload is None:
+            body = {"cod": "404", "message": f"no demo data for {endpoint}"}
+            return httpx.Response(404, headers={"content-type": "application/json"}, content=json.dumps(body).encode())
+        content = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        return httpx.Response(200, headers={"content-type": "application/json; charset=utf-8"}, content=content)
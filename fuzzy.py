@@ -0,0 +1,140 @@
+"""Typo-tolerant place name resolution over the gazetteer."""
+
+import heapq
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import (FUZZY_MAX_CANDIDATES, FUZZY_MAX_DISTANCE, FUZZY_MAX_SUGGESTIONS,
+                    FUZZY_AUTO_RESOLVE_MIN_LENGTH)
+from gazetteer import compiled_table, get_gazetteer, make_key
+
+def trigrams(key: str) -> List[str]:
+    """Character trigrams of a key, padded so short names still produce some."""
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance between a and b, or limit + 1 if it exceeds limit.
+
+    Adjacent transpositions count as one edit. Only the diagonal band of
+    cells within limit of each other is computed, and rows are abandoned as
+    soon as every cell exceeds the limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous2: List[int] = []
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        char = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = previous[j - 1] if char == b[j - 1] else previous[j - 1] + 1
+            if previous[j] < value:
+                value = previous[j] + 1
+            if current[j - 1] < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+        if min(current) > limit:
+            return over
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else over
+
+def bag_distance(a: str, b: str) -> int:
+    """Lower bound of the edit distance between a and b from their character counts."""
+    missing = surplus = 0
+    for char in set(a) | set(b):
+        difference = a.count(char) - b.count(char)
+        if difference > 0:
+            surplus += difference
+        else:
+            missing -= difference
+    return max(missing, surplus)
+
+class FuzzyIndex:
+    """Trigram index over place keys with bounded edit-distance ranking."""
+
+    def __init__(self, entries: Iterable[Tuple[str, Dict[str, Any]]]):
+        self._keys: List[str] = []
+        self._records: List[Dict[str, Any]] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for key, record in entries:
+            entry_id = len(self._keys)
+            self._keys.append(key)
+            self._records.append(record)
+            for gram in set(trigrams(key)):
+                postings[gram].append(entry_id)
+        self._postings = dict(postings)  # plain containers only, so the index can be compiled
+
+    def search(self, text: str, limit: int = FUZZY_MAX_SUGGESTIONS) -> List[Tuple[Dict[str, Any], int]]:
+        """Return up to limit (record, distance) pairs closest to text, best first."""
+        key = make_key(text)
+        if not key:
+            return []
+        max_distance = min(FUZZY_MAX_DISTANCE, max(1, len(key) // 4))
+
+        grams = set(trigrams(key))
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+        # An edit changes at most 4 of the query's trigrams (a transposition) and
+        # the length by at most 1, so other keys cannot be close enough
+        min_shared = len(grams) - 4 * max_distance
+        keys = self._keys
+        close = {entry_id: count for entry_id, count in shared.items()
+                 if count >= min_shared and abs(len(keys[entry_id]) - len(key)) <= max_distance}
+        # Partial selection: cost grows with the matches, not with sorting all of them
+        candidates = heapq.nlargest(FUZZY_MAX_CANDIDATES, close, key=close.__getitem__)
+
+        best: Dict[int, Tuple[int, int]] = {}
+        for entry_id in candidates:
+            # Cheap bound first: most candidates differ in too many characters
+            if bag_distance(key, keys[entry_id]) > max_distance:
+                continue
+            distance = bounded_distance(key, keys[entry_id], max_distance)
+            if distance > max_distance:
+                continue
+            record = self._records[entry_id]
+            rank = (distance, -shared[entry_id])
+            # Aliases and qualified names map to the same record; keep its best score
+            if id(record) not in best or rank < best[id(record)][:2]:
+                best[id(record)] = (distance, -shared[entry_id], entry_id)
+
+        ranked = sorted(best.values())[:limit]
+        return [(self._records[entry_id], distance) for distance, _, entry_id in ranked]
+
+_index: Optional[FuzzyIndex] = None
+
+def get_fuzzy_index() -> FuzzyIndex:
+    """Return the shared fuzzy index, building it from the gazetteer on first use."""
+    global _index
+    if _index is None:
+        _index = compiled_table("fuzzy", FuzzyIndex, lambda: FuzzyIndex(get_gazetteer().entries()))
+    return _index
+
+def resolve_place(text: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Resolve a possibly misspelled place name.
+
+    Returns the matching record and no suggestions when the name is known or
+    when a single place is within one edit of a long enough name; otherwise returns None and
+    a list of suggestions (prefix completions first, then close spellings).
+    """
+    gazetteer = get_gazetteer()
+    record = gazetteer.lookup(text)
+    if record is not None:
+        return record, []
+
+    matches = get_fuzzy_index().search(text)
+    unambiguous = len(matches) == 1 or (len(matches) > 1 and matches[1][1] > matches[0][1])
+    if (matches and matches[0][1] <= 1 and unambiguous
+            and len(make_key(text)) >= FUZZY_AUTO_RESOLVE_MIN_LENGTH):
+        return matches[0][0], []
+
+    suggestions = gazetteer.complete(text)
+    for match, _ in matches:
+        if all(match is not existing for existing in suggestions):
+            suggestions.append(match)
+    return None, suggestions[:FUZZY_MAX_SUGGESTIONS]
@@ -0,0 +1,199 @@
+"""Gazetteer of Turkish provinces and districts with a precomputed lookup index."""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import marshal
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from config import GAZETTEER_COMPILED_DIR, GAZETTEER_PATH, GAZETTEER_MAX_COMPLETIONS
+from utils import normalize_turkish_text
+
+logger = logging.getLogger(__name__)
+
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+def make_key(text: str) -> str:
+    """Normalize a place name into an index key (e.g. "K.Maraş" -> "k maras")."""
+    return " ".join(part for part in _SEPARATORS.split(normalize_turkish_text(text)) if part)
+
+class Gazetteer:
+    """Provinces and districts indexed for constant-time lookups.
+
+    Records are dictionaries with ``name``, ``lat`` and ``lon`` like the old
+    ``TURKISH_CITIES`` entries, plus ``plate``, ``province`` and ``kind``
+    ("il" or "ilce"). District names are labelled with their province
+    (e.g. "Kadıköy, İstanbul").
+    """
+
+    def __init__(self, provinces: List[List[Any]], districts: Dict[str, List[List[Any]]],
+                 preferred: Optional[Dict[str, str]] = None):
+        self.provinces: Dict[str, Dict[str, Any]] = {}
+        self.places: List[Dict[str, Any]] = []
+        self._names: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, Dict[str, Any]] = {}
+        self._plates: Dict[int, Dict[str, Any]] = {}
+        self._trie: Dict[str, Any] = {}
+
+        for plate, name, lat, lon, aliases in provinces:
+            record = {"name": name, "lat": lat, "lon": lon, "plate": plate,
+                      "province": name, "kind": "il"}
+            key = make_key(name)
+            self.provinces[key] = record
+            self.places.append(record)
+            self._add(key, record)
+            self._plates[int(plate)] = record
+            for alias in aliases:
+                self._aliases.setdefault(make_key(alias), record)
+                self._insert_prefixes(make_key(alias), record)
+
+        preferred = preferred or {}
+        for plate, rows in districts.items():
+            province = self._plates[int(plate)]["name"]
+            for name, lat, lon in rows:
+                record = {"name": f"{name}, {province}", "lat": lat, "lon": lon, "plate": plate,
+                          "province": province, "kind": "ilce"}
+                self.places.append(record)
+                # A bare district name may be shared (e.g. Ereğli); the preferred
+                # province's district or else the first one keeps it, and
+                # "<district> <province>" always resolves uniquely
+                if preferred.get(name, plate) == plate:
+                    self._add(make_key(name), record)
+                self._add(make_key(f"{name} {province}"), record, prefixes=False)
+
+    def _add(self, key: str, record: Dict[str, Any], prefixes: bool = True) -> None:
+        if key in self._names:
+            return
+        self._names[key] = record
+        if prefixes:
+            self._insert_prefixes(key, record)
+
+    def _insert_prefixes(self, key: str, record: Dict[str, Any]) -> None:
+        # Every trie node keeps its first few completions, so completing a
+        # prefix costs one walk down the trie regardless of gazetteer size
+        node = self._trie
+        for char in key:
+            node = node.setdefault(char, {"": []})
+            completions = node[""]
+            if (len(completions) < GAZETTEER_MAX_COMPLETIONS
+                    and all(existing is not record for existing in completions)):
+                completions.append(record)
+
+    def entries(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield every (key, record) pair: names, qualified district names and aliases."""
+        yield from self._names.items()
+        yield from self._aliases.items()
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """Find a place by name, alternate spelling or plate code."""
+        key = make_key(text)
+        record = self._names.get(key) or self._aliases.get(key)
+        if record is None and key.isdigit():
+            record = self._plates.get(int(key))
+        return record
+
+    def complete(self, prefix: str) -> List[Dict[str, Any]]:
+        """Return places whose name or alternate spelling starts with prefix."""
+        node = self._trie
+        for char in make_key(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        return list(node.get("", []))
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Gazetteer:
+    """Load the bundled gazetteer file and build its index."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return Gazetteer(data["provinces"], data.get("districts", {}), data.get("preferred_districts"))
+
+# Modules whose code shapes the compiled tables; editing one invalidates them
+_TABLE_SOURCES = ("config", "utils", "gazetteer", "fuzzy", "geo")
+# Bumped when the way tables are stored changes
+_COMPILED_FORMAT = 1
+
+T = TypeVar("T")
+
+def _digest() -> str:
+    """Hash of the storage format, the Python version, the gazetteer file and the table code."""
+    digest = hashlib.sha256(f"{_COMPILED_FORMAT} {sys.version}".encode())
+    for path in [GAZETTEER_PATH] + [importlib.util.find_spec(name).origin for name in _TABLE_SOURCES]:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:32]
+
+def _read_compiled(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            compiled = marshal.loads(f.read())  # marshal.load reads a file object in small pieces
+        if isinstance(compiled, dict) and all(isinstance(table, dict) for table in compiled.values()):
+            return compiled
+        logger.debug("Ignoring compiled place tables in %s: unexpected contents", path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:  # truncated or corrupt file
+        logger.debug("Ignoring compiled place tables: %s", e)
+    return {}
+
+def _write_compiled(path: str, compiled: Dict[str, Dict[str, Any]]) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(GAZETTEER_COMPILED_DIR, mode=0o700, exist_ok=True)
+        with open(temporary, "wb") as f:
+            marshal.dump(compiled, f)
+        os.replace(temporary, path)
+        for name in os.listdir(GAZETTEER_COMPILED_DIR):
+            old = os.path.join(GAZETTEER_COMPILED_DIR, name)
+            if name.startswith("places-") and name.endswith(".marshal") and old != path:
+                os.remove(old)  # compiled from sources that have changed since
+    except (OSError, ValueError) as e:  # e.g. no writable home directory; the tables are rebuilt next time
+        logger.debug("Could not save compiled place tables: %s", e)
+
+_compiled: Optional[Dict[str, Dict[str, Any]]] = None
+_compiled_path = ""
+
+def compiled_table(name: str, cls: Type[T], build: Callable[[], T]) -> T:
+    """Return the named table built from the gazetteer, building it only if the
+    compiled tables lack it.
+
+    Tables are stored as their instance attributes, plain dicts, lists and
+    tuples, with marshal: loading them runs no code, unlike unpickling. All
+    tables are stored together, so the place records they share stay shared
+    objects when loaded. Loading them takes a fraction of the time of building
+    them, which every new stdio server process would pay on its first tool
+    call. The file name carries a hash of everything the tables are built
+    from, so a change to any of it compiles them afresh.
+    """
+    global _compiled, _compiled_path
+    if _compiled is None:
+        _compiled_path = os.path.join(GAZETTEER_COMPILED_DIR, f"places-{_digest()}.marshal")
+        _compiled = _read_compiled(_compiled_path)
+    attributes = _compiled.get(name)
+    if attributes is not None:
+        table = cls.__new__(cls)
+        table.__dict__.update(attributes)
+        return table
+    table = build()
+    _compiled[name] = vars(table)
+    _write_compiled(_compiled_path, _compiled)
+    return table
+
+_gazetteer: Optional[Gazetteer] = None
+
+def get_gazetteer() -> Gazetteer:
+    """Return the shared gazetteer, loading it on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = compiled_table("gazetteer", Gazetteer, load_gazetteer)
+    return _gazetteer
+
+def find_place(text: str) -> Optional[Dict[str, Any]]:
+    """Find a Turkish province or district by name, alternate spelling or plate code."""
+    return get_gazetteer().lookup(text)
@@ -0,0 +1,93 @@
+"""Reverse geocoding: nearest known Turkish settlement for a coordinate pair."""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import GEO_NAME_RADIUS_KM, GEO_SNAP_RADIUS_KM
+from gazetteer import compiled_table, get_gazetteer
+
+EARTH_RADIUS_KM = 6371.0088
+
+def to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Convert latitude/longitude in degrees to a point on the unit sphere."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+def chord_to_km(chord: float) -> float:
+    """Great-circle distance in km for a chord length on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+class SpatialIndex:
+    """3-d tree over places projected onto the unit sphere.
+
+    Nearest-neighbour queries run in O(log n) on average. Chord length on the
+    sphere grows monotonically with great-circle distance, so the nearest
+    point in the tree is also the nearest place on the map.
+    """
+
+    def __init__(self, places: Sequence[Dict[str, Any]]):
+        points = [(to_unit_vector(place["lat"], place["lon"]), place) for place in places]
+        self._root = self._build(points, 0)
+
+    def _build(self, points: List[Tuple[Tuple[float, float, float], Dict[str, Any]]], axis: int):
+        if not points:
+            return None
+        points.sort(key=lambda item: item[0][axis])
+        middle = len(points) // 2
+        point, place = points[middle]
+        next_axis = (axis + 1) % 3
+        return (point, place, axis,
+                self._build(points[:middle], next_axis),
+                self._build(points[middle + 1:], next_axis))
+
+    def nearest(self, lat: float, lon: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return the nearest place and its distance in km, or None if the index is empty."""
+        if self._root is None:
+            return None
+        target = to_unit_vector(lat, lon)
+        best: List[Any] = [None, float("inf")]  # place, squared chord length
+
+        def search(node) -> None:
+            if node is None:
+                return
+            point, place, axis, left, right = node
+            squared = ((point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2
+                       + (point[2] - target[2]) ** 2)
+            if squared < best[1]:
+                best[0], best[1] = place, squared
+            delta = target[axis] - point[axis]
+            near, far = (left, right) if delta < 0 else (right, left)
+            search(near)
+            if delta * delta < best[1]:
+                search(far)
+
+        search(self._root)
+        return best[0], chord_to_km(math.sqrt(best[1]))
+
+_index: Optional[SpatialIndex] = None
+
+def get_spatial_index() -> SpatialIndex:
+    """Return the shared spatial index, building it from the gazetteer on first use."""
+    global _index
+    if _index is None:
+        _index = compiled_table("spatial", SpatialIndex, lambda: SpatialIndex(get_gazetteer().places))
+    return _index
+
+def nearest_place(lat: float, lon: float,
+                  max_km: float = GEO_NAME_RADIUS_KM) -> Optional[Dict[str, Any]]:
+    """Return the nearest known settlement within max_km of the coordinates, or None."""
+    found = get_spatial_index().nearest(lat, lon)
+    if found is None or found[1] > max_km:
+        return None
+    return found[0]
+
+def snap_coordinates(lat: float, lon: float) -> Tuple[float, float]:
+    """Snap coordinates onto a nearby known settlement so they share its cache key.
+
+    Coordinates farther than GEO_SNAP_RADIUS_KM from every place are returned unchanged.
+    """
+    place = nearest_place(lat, lon, GEO_SNAP_RADIUS_KM)
+    if place is None:
+        return lat, lon
+    return place["lat"], place["lon"]
@@ -0,0 +1,133 @@
+"""Streamable HTTP server mode with one or more worker processes.
+
+``serve()`` runs the MCP server on FastMCP's streamable HTTP transport under
+uvicorn. Requests are stateless, so any worker process can answer any client,
+and each worker builds its own app with ``create_app()``. The workers share
+responses through the persistent SQLite cache and split the upstream budgets
+between them (see SERVER_WORKERS in config.py).
+
+Shutdown is graceful: on SIGTERM or SIGINT each worker stops accepting
+connections, lets open requests finish for up to HTTP_GRACEFUL_SHUTDOWN_TIMEOUT
+seconds, waits for background upstream fetches and only then closes the HTTP
+client and the cache.
+"""
+
+import functools
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, List, Optional
+
+from config import (HTTP_ACCESS_LOG, HTTP_ALLOWED_HOSTS, HTTP_GRACEFUL_SHUTDOWN_TIMEOUT, HTTP_JSON_RESPONSE,
+                    HTTP_KEEPALIVE_TIMEOUT, HTTP_SERVER_HOST, HTTP_SERVER_PATH, HTTP_SERVER_PORT,
+                    PREFETCH_CALLS_PER_MINUTE, SERVER_WORKERS, SHARED_CACHE_DB_NAME)
+
+if TYPE_CHECKING:
+    from mcp.server.transport_security import TransportSecuritySettings
+
+logger = logging.getLogger(__name__)
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+WILDCARD_HOSTS = ("0.0.0.0", "::", "")
+
+def transport_security(host: str, allowed: Iterable[str] = HTTP_ALLOWED_HOSTS) -> "TransportSecuritySettings":
+    """Return the Host and Origin headers a server listening on ``host`` accepts.
+
+    Loopback names, the listening address unless it is a wildcard and the
+    ``allowed`` names are accepted with any port, over http and https.
+    """
+    from mcp.server.transport_security import TransportSecuritySettings
+
+    names = [*LOOPBACK_HOSTS, *([] if host in WILDCARD_HOSTS else [host]), *allowed]
+    hosts: List[str] = []
+    origins: List[str] = []
+    for name in dict.fromkeys(names):
+        if name.count(":") > 1 and not name.startswith("["):
+            name = f"[{name}]"  # IPv6 addresses are bracketed in headers
+        hosts += [name, f"{name}:*"]
+        origins += [f"{scheme}://{name}{port}" for scheme in ("http", "https") for port in ("", ":*")]
+    return TransportSecuritySettings(allowed_hosts=hosts, allowed_origins=origins)
+
+def create_app(workers: Optional[int] = None, cache_db: Optional[str] = None):
+    """Build the ASGI app of one worker process (a uvicorn app factory).
+
+    Worker processes started by uvicorn take their worker count and shared
+    cache from the environment. A single worker runs in the process that
+    parsed the command line, after config was imported, so serve() passes
+    both values explicitly.
+    """
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+
+    import api
+    from metrics import metrics
+    from prefetch import prefetcher
+    from weather import mcp, server_lifespan
+
+    if workers is not None:
+        api.configure_worker(workers, cache_db)
+        prefetcher.calls_per_minute = max(1, PREFETCH_CALLS_PER_MINUTE // workers)
+
+    # FastMCP logs every request at INFO through rich, which costs more than a cached tool call
+    for name in ("mcp.server.lowlevel.server", "mcp.server.streamable_http"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    mcp.settings.stateless_http = True
+    mcp.settings.json_response = HTTP_JSON_RESPONSE
+    mcp.settings.streamable_http_path = HTTP_SERVER_PATH
+    # FastMCP only guards a loopback server against DNS rebinding; guard every one
+    mcp.settings.transport_security = transport_security(os.environ.get("WEATHER_HTTP_HOST", HTTP_SERVER_HOST))
+
+    @mcp.custom_route("/health", methods=["GET"])
+    async def health(request: Request) -> JSONResponse:
+        in_flight = sum(count for (scope, _), count in metrics.in_flight.items() if scope == "tool")
+        return JSONResponse({"status": "ok", "pid": os.getpid(), "in_flight": in_flight})
+
+    app = mcp.streamable_http_app()
+    session_manager_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def worker_lifespan(app) -> AsyncIterator[None]:
+        # Hold the process-wide resources for the worker's whole life, so the
+        # per-request session lifespans only join them. The session manager
+        # stops first, the shared client and cache last.
+        async with server_lifespan(mcp):
+            async with session_manager_lifespan(app):
+                logger.info("Worker %d serving MCP on %s", os.getpid(), HTTP_SERVER_PATH)
+                yield
+
+    app.router.lifespan_context = worker_lifespan
+    return app
+
+def serve(host: str = HTTP_SERVER_HOST, port: int = HTTP_SERVER_PORT, workers: int = SERVER_WORKERS,
+          log_level: str = "info") -> None:
+    """Run the streamable HTTP server until SIGTERM or SIGINT.
+
+    Args:
+        host: Interface to listen on
+        port: TCP port
+        workers: Worker processes; more than one shares the persistent cache
+        log_level: uvicorn log level
+    """
+    import uvicorn
+
+    # Worker processes read their configuration from the environment on import
+    os.environ["WEATHER_WORKERS"] = str(workers)
+    os.environ["WEATHER_HTTP_HOST"] = host
+    cache_db: Optional[str] = os.environ.get("WEATHER_CACHE_DB")
+    if workers > 1 and not cache_db:
+        cache_db = os.environ["WEATHER_CACHE_DB"] = os.path.join(tempfile.gettempdir(), SHARED_CACHE_DB_NAME)
+    logger.info("Starting %d worker(s) on http://%s:%d%s (shared cache: %s)",
+                workers, host, port, HTTP_SERVER_PATH, cache_db or "off")
+    if host not in LOOPBACK_HOSTS and not HTTP_ALLOWED_HOSTS:
+        accepted = "loopback names" if host in WILDCARD_HOSTS else f"{host} and loopback names"
+        logger.warning("Only requests addressed to %s are accepted; "
+                       "set WEATHER_ALLOWED_HOSTS to the names clients use", accepted)
+    # Several workers are started by uvicorn and import the import string;
+    # a single one runs here
+    app = "http_server:create_app" if workers > 1 else functools.partial(create_app, workers, cache_db)
+    uvicorn.run(app, factory=True, host=host, port=port, workers=workers,
+                timeout_keep_alive=HTTP_KEEPALIVE_TIMEOUT,
+                timeout_graceful_shutdown=HTTP_GRACEFUL_SHUTDOWN_TIMEOUT, access_log=HTTP_ACCESS_LOG,
+                log_level=log_level)
@@ -0,0 +1,308 @@
+"""Low-overhead metrics: latency histograms, error classes and in-flight counts.
+
+Tool calls and upstream requests are recorded in fixed-bucket histograms, so
+an observation is one bisect and two additions, with no locking; everything
+runs on the event loop thread. Other modules contribute gauges and counters
+(cache hit ratio, quota left, ...) through collectors that are only called
+when the metrics are read. The metrics can be read as a JSON-friendly
+snapshot, in the Prometheus text format, over HTTP or from a file.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from config import (METRICS_DUMP_INTERVAL, METRICS_FILE, METRICS_HOST, METRICS_LATENCY_BUCKETS,
+                    METRICS_PORT, METRICS_SLOW_TOOL_SECONDS)
+from profiler import profiler
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Counts of observations per bucket, plus their sum, count and maximum."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "max")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q-quantile, interpolated linearly within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Count and latency estimates in milliseconds."""
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 2)
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.sum / self.count) if self.count else None,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "max_ms": ms(self.max) if self.count else None,
+        }
+
+Collector = Callable[[], Dict[str, float]]
+
+class Metrics:
+    """Registry of the server's histograms and counters.
+
+    Latency histograms, in-flight counts and error classes are kept per
+    scope ("tool" or "upstream") and name (the tool or endpoint).
+    """
+
+    def __init__(self, buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight: Counter = Counter()
+        self.errors: Counter = Counter()  # (scope, name, error class) -> count
+        self.started_at = time.time()
+        self._collectors: List[Tuple[str, Collector]] = []
+
+    def observe(self, scope: str, name: str, seconds: float) -> None:
+        histogram = self.latency.get((scope, name))
+        if histogram is None:
+            histogram = self.latency[(scope, name)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def count_error(self, scope: str, name: str, error_class: str) -> None:
+        self.errors[(scope, name, error_class)] += 1
+
+    def add_collector(self, prefix: str, collector: Collector) -> None:
+        """Register a function returning numeric values, exported as
+        ``weather_<prefix>_<key>`` whenever the metrics are read."""
+        self._collectors.append((prefix, collector))
+
+    def reset(self) -> None:
+        self.latency.clear()
+        self.in_flight.clear()
+        self.errors.clear()
+        self.started_at = time.time()
+
+    def _collected(self) -> Dict[str, Dict[str, float]]:
+        collected = {}
+        for prefix, collector in self._collectors:
+            try:
+                collected[prefix] = {key: value for key, value in collector().items()
+                                     if isinstance(value, (int, float))}
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", prefix, e)
+        return collected
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dictionary."""
+        result: Dict[str, Any] = {"uptime_s": round(time.time() - self.started_at)}
+        for scope in ("tool", "upstream"):
+            errors: Dict[str, Dict[str, int]] = {}
+            for (s, name, error_class), count in self.errors.items():
+                if s == scope:
+                    errors.setdefault(name, {})[error_class] = count
+            names = ({name for s, name in self.latency if s == scope} |
+                     {name for s, name in self.in_flight if s == scope} | errors.keys())
+            section = {}
+            for name in sorted(names):
+                histogram = self.latency.get((scope, name))
+                section[name] = dict(histogram.summary() if histogram else {"count": 0},
+                                     in_flight=self.in_flight[(scope, name)], errors=errors.get(name, {}))
+            result["tools" if scope == "tool" else "upstream"] = section
+        result.update(self._collected())
+        return result
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        for scope in ("tool", "upstream"):
+            metric = f"weather_{scope}_duration_seconds"
+            label = "tool" if scope == "tool" else "endpoint"
+            lines.append(f"# HELP {metric} Duration of {scope} calls.")
+            lines.append(f"# TYPE {metric} histogram")
+            for (s, name), histogram in sorted(self.latency.items()):
+                if s != scope:
+                    continue
+                cumulative = 0
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+        lines.append("# HELP weather_in_flight Calls currently in progress.")
+        lines.append("# TYPE weather_in_flight gauge")
+        for (scope, name), count in sorted(self.in_flight.items()):
+            lines.append(f'weather_in_flight{{scope="{scope}",name="{name}"}} {count}')
+        lines.append("# HELP weather_errors_total Failed calls by error class.")
+        lines.append("# TYPE weather_errors_total counter")
+        for (scope, name, error_class), count in sorted(self.errors.items()):
+            lines.append(f'weather_errors_total{{scope="{scope}",name="{name}",class="{error_class}"}} {count}')
+        for prefix, values in self._collected().items():
+            for key, value in values.items():
+                lines.append(f"weather_{prefix}_{key} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+# Name of the tool whose call the current task is running, if any
+_current_tool: ContextVar[Optional[str]] = ContextVar("current_tool", default=None)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+def timed_tool(fn: F) -> F:
+    """Record latency, in-flight count and exceptions of an async MCP tool.
+
+    The call is also the root span of its trace when tracing is on, and is
+    sampled by the profiler while that is enabled. A tool called from another
+    tool counts as part of the outer call only. Place it below ``@mcp.tool()``;
+    the wrapper keeps the tool's signature.
+    """
+    name = fn.__name__
+    span_name = f"tool.{name}"
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _current_tool.get() is not None:
+            return await fn(*args, **kwargs)
+        token = _current_tool.set(name)
+        key = ("tool", name)
+        metrics.in_flight[key] += 1
+        profile = profiler.begin(name, wrapper.__code__) if profiler.enabled else None
+        start = time.perf_counter()
+        try:
+            with span(span_name, **kwargs):
+                return await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            metrics.count_error("tool", name, "cancelled")
+            raise
+        except Exception as e:
+            metrics.count_error("tool", name, type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight[key] -= 1
+            metrics.observe("tool", name, elapsed)
+            profiler.end(profile, elapsed)
+            _current_tool.reset(token)
+            if elapsed > METRICS_SLOW_TOOL_SECONDS:
+                logger.info("Slow tool call %s: %.0f ms", name, elapsed * 1000)
+
+    return wrapper  # type: ignore[return-value]
+
+class MetricsExporter:
+    """Serves the Prometheus text over HTTP and/or dumps it to a file periodically.
+
+    The text is always rendered on the event loop thread; the HTTP server's
+    thread only waits for it.
+    """
+
+    def __init__(self, registry: Metrics = metrics, host: str = METRICS_HOST, port: int = METRICS_PORT,
+                 path: Optional[str] = METRICS_FILE, interval: float = METRICS_DUMP_INTERVAL):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self._httpd: Any = None  # ThreadingHTTPServer, imported only if a port is set
+        self._dumper: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.port:
+            from http.server import ThreadingHTTPServer
+            try:
+                self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler(loop))
+            except OSError as e:
+                # With several HTTP server workers, the first one to start owns the port
+                logger.warning("Metrics port %d unavailable: %s", self.port, e)
+            else:
+                self._httpd.daemon_threads = True
+                threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True).start()
+                logger.info("Serving metrics on http://%s:%d/metrics", self.host, self._httpd.server_address[1])
+        if self.path:
+            self._dumper = asyncio.create_task(self._dump_periodically())
+
+    async def stop(self) -> None:
+        if self._httpd is not None:
+            httpd, self._httpd = self._httpd, None
+            await asyncio.to_thread(httpd.shutdown)
+            httpd.server_close()
+        if self._dumper is not None:
+            self._dumper.cancel()
+            try:
+                await self._dumper
+            except asyncio.CancelledError:
+                pass
+            self._dumper = None
+            self.dump()  # leave the final values behind
+
+    def dump(self) -> None:
+        """Write the metrics to the file atomically, so readers never see half of it."""
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(self.registry.prometheus_text())
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logger.warning("Metrics dump to %s failed: %s", self.path, e)
+
+    async def _dump_periodically(self) -> None:
+        while True:
+            self.dump()
+            await asyncio.sleep(self.interval)
+
+    def _make_handler(self, loop: asyncio.AbstractEventLoop):
+        from http.server import BaseHTTPRequestHandler
+
+        registry = self.registry
+
+        async def render() -> bytes:
+            return registry.prometheus_text().encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                try:
+                    body = asyncio.run_coroutine_threadsafe(render(), loop).result(timeout=5)
+                except Exception:
+                    self.send_error(503)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
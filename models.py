@@ -0,0 +1,187 @@
+"""Compact, parse-once models of the OpenWeatherMap responses we use.
+
+Responses are converted once, when they arrive, and the response cache keeps
+these objects instead of the raw JSON dictionaries. The 40-step forecast is
+stored as typed arrays (one column per field) with its timestamps already
+converted to Turkish local time, so formatting never re-parses datetimes.
+"""
+
+import dataclasses
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Turkey has used UTC+3 all year round since 2016
+TURKEY_UTC_OFFSET = 3 * 3600
+TURKEY_TZ = timezone(timedelta(seconds=TURKEY_UTC_OFFSET), "TRT")
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def today() -> int:
+    """Ordinal of the current Turkish calendar day."""
+    return datetime.now(TURKEY_TZ).date().toordinal()
+
+def _size(*objects: Any) -> int:
+    return sum(sys.getsizeof(obj) for obj in objects)
+
+@dataclass(slots=True, weakref_slot=True)
+class CurrentWeather:
+    """Current conditions from the ``weather`` endpoint."""
+
+    name: str
+    temp: Optional[float]
+    feels_like: Optional[float]
+    humidity: Optional[int]
+    description: Optional[str]
+    condition_id: Optional[int]
+    wind_speed: Optional[float]
+    wind_deg: Optional[float]
+    stale_age: Optional[int] = None  # set on a cached copy served because upstream failed
+
+    @classmethod
+    def parse(cls, data: Dict[str, Any]) -> "CurrentWeather":
+        # Upstream sometimes sends null for a field or a whole object; treat it as missing
+        main = data.get("main") or {}
+        condition = (data.get("weather") or [{}])[0] or {}
+        wind = data.get("wind") or {}
+        description = condition.get("description")
+        return cls(
+            name=data.get("name") or "",
+            temp=main.get("temp"),
+            feels_like=main.get("feels_like"),
+            humidity=main.get("humidity"),
+            description=sys.intern(description) if description is not None else None,
+            condition_id=condition.get("id"),
+            wind_speed=wind.get("speed"),
+            wind_deg=wind.get("deg"),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint, for the cache's byte budget."""
+        return _size(self, self.name, self.temp, self.feels_like, self.wind_speed, self.wind_deg)
+
+@dataclass(slots=True, weakref_slot=True)
+class AirQuality:
+    """Air quality index and pollutant concentrations (μg/m³) from ``air_pollution``."""
+
+    aqi: int
+    pm2_5: Optional[float]
+    pm10: Optional[float]
+    o3: Optional[float]
+    no2: Optional[float]
+    so2: Optional[float]
+    co: Optional[float]
+    stale_age: Optional[int] = None
+
+    @classmethod
+    def parse(cls, data: Dict[str, Any]) -> "AirQuality":
+        entry = (data.get("list") or [{}])[0] or {}
+        components = entry.get("components") or {}
+        return cls(aqi=(entry.get("main") or {}).get("aqi") or 0,
+                   **{name: components.get(name) for name in ("pm2_5", "pm10", "o3", "no2", "so2", "co")})
+
+    @property
+    def nbytes(self) -> int:
+        return _size(self, self.pm2_5, self.pm10, self.o3, self.no2, self.so2, self.co)
+
+def _slot(item: Dict[str, Any]) -> Tuple[int, float, int, float, float, int, str]:
+    """One forecast item as a from_slots tuple; null values count as missing, as in decode.py."""
+    main = item.get("main") or {}
+    wind = item.get("wind") or {}
+    condition = (item.get("weather") or [{}])[0] or {}
+    temp = main.get("temp")
+    return (item["dt"],
+            float("nan") if temp is None else temp,
+            main.get("humidity") or 0,
+            wind.get("speed") or 0.0,
+            ((item.get("rain") or {}).get("3h") or 0.0) + ((item.get("snow") or {}).get("3h") or 0.0),
+            condition.get("id") or 0,
+            condition.get("description") or "")
+
+@dataclass(slots=True, weakref_slot=True)
+class Forecast:
+    """The 3-hourly ``forecast`` series as parallel typed columns, one item per slot.
+
+    ``day`` holds the Turkish calendar day of each slot as a date ordinal and
+    ``minute`` its local minute of the day. Precipitation is the 3-hour rain
+    plus snow amount in mm. Descriptions are interned, so repeated conditions
+    share one string.
+    """
+
+    timestamp: array  # 'q': Unix seconds
+    day: array  # 'l': local date ordinal
+    minute: array  # 'H': local minutes since midnight
+    temp: array  # 'd': °C
+    humidity: array  # 'B': %
+    wind_speed: array  # 'd': m/s
+    precipitation: array  # 'd': mm per slot
+    condition_id: array  # 'H'
+    description: List[str]
+    stale_age: Optional[int] = None
+
+    @classmethod
+    def from_slots(cls, slots: Iterable[Tuple[int, float, int, float, float, int, str]]) -> "Forecast":
+        """Build the columns from (timestamp, temp, humidity, wind speed,
+        precipitation, condition id, description) tuples in time order."""
+        forecast = cls(array("q"), array("l"), array("H"), array("d"), array("B"),
+                       array("d"), array("d"), array("H"), [])
+        for timestamp, temp, humidity, wind_speed, precipitation, condition_id, description in slots:
+            local = timestamp + TURKEY_UTC_OFFSET
+            forecast.timestamp.append(timestamp)
+            forecast.day.append(local // 86400 + _EPOCH_ORDINAL)
+            forecast.minute.append(local % 86400 // 60)
+            forecast.temp.append(temp)
+            forecast.humidity.append(humidity)
+            forecast.wind_speed.append(wind_speed)
+            forecast.precipitation.append(precipitation)
+            forecast.condition_id.append(condition_id)
+            forecast.description.append(sys.intern(description))
+        return forecast
+
+    @classmethod
+    def parse(cls, data: Dict[str, Any]) -> "Forecast":
+        return cls.from_slots(_slot(item) for item in data.get("list") or [])
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def slot_date(self, i: int) -> date:
+        """Local calendar date of slot i."""
+        return date.fromordinal(self.day[i])
+
+    def time_text(self, i: int) -> str:
+        """Local time of slot i as HH:MM."""
+        return f"{self.minute[i] // 60:02d}:{self.minute[i] % 60:02d}"
+
+    def first_slot_after(self, day: int) -> Optional[int]:
+        """Index of the first slot on a later local day than ``day``, or None."""
+        for i, slot_day in enumerate(self.day):
+            if slot_day > day:
+                return i
+        return None
+
+    @property
+    def nbytes(self) -> int:
+        columns = (self.timestamp, self.day, self.minute, self.temp, self.humidity,
+                   self.wind_speed, self.precipitation, self.condition_id)
+        return _size(self, self.description, *columns, *set(self.description))
+
+# Parsers for the endpoints that have a model; other responses stay as dictionaries
+PARSERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    "weather": CurrentWeather.parse,
+    "forecast": Forecast.parse,
+    "air_pollution": AirQuality.parse,
+}
+
+def parse_response(endpoint: str, data: Dict[str, Any]) -> Any:
+    """Convert a decoded response into the endpoint's model, if it has one."""
+    parser = PARSERS.get(endpoint)
+    return parser(data) if parser is not None else data
+
+def with_stale_age(model: Any, age: float) -> Any:
+    """A copy of a cached model flagged as served stale, ``age`` seconds old."""
+    if isinstance(model, dict):
+        return dict(model, _stale_age=round(age))
+    return dataclasses.replace(model, stale_age=round(age))
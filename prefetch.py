@@ -0,0 +1,184 @@
+"""Predictive cache warming for the most requested places.
+
+Every resolved place request bumps an exponentially decaying score. A background
+pass refreshes the cached responses of the top-scoring places shortly before
+they expire, so popular cities are served from a warm cache. The warmer spends
+at most a fixed number of upstream calls per minute and pauses whenever the
+shared upstream limiter is saturated, so tool requests are never starved.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import api
+from config import (PREFETCH_ENABLED, PREFETCH_ENDPOINTS, PREFETCH_TOP_K, PREFETCH_CALLS_PER_MINUTE,
+                    PREFETCH_LEAD_TIME, PREFETCH_INTERVAL, PREFETCH_HALF_LIFE, PREFETCH_MAX_TRACKED,
+                    SERVER_WORKERS)
+
+logger = logging.getLogger(__name__)
+
+BUDGET_WINDOW = 60.0  # seconds
+
+class _Tracked:
+    """Request score of one place."""
+
+    __slots__ = ("place", "score", "updated", "requests")
+
+    def __init__(self, place: Dict[str, Any], now: float):
+        self.place = place
+        self.score = 0.0
+        self.updated = now
+        self.requests = 0
+
+class PrefetchScheduler:
+    """Keeps the cached responses of the top ``top_k`` places warm.
+
+    Args:
+        top_k: Number of places kept warm
+        calls_per_minute: Upstream calls the warmer may spend in any 60 second window
+        lead_time: Seconds before expiry a cached response is refreshed
+        interval: Seconds between scheduler passes
+        half_life: Seconds for a place's request score to halve
+        max_tracked: Places remembered; the lowest scores are dropped beyond this
+        endpoints: Endpoints refreshed for each hot place
+    """
+
+    def __init__(self, top_k: int = PREFETCH_TOP_K, calls_per_minute: int = PREFETCH_CALLS_PER_MINUTE,
+                 lead_time: float = PREFETCH_LEAD_TIME, interval: float = PREFETCH_INTERVAL,
+                 half_life: float = PREFETCH_HALF_LIFE, max_tracked: int = PREFETCH_MAX_TRACKED,
+                 endpoints: Sequence[str] = PREFETCH_ENDPOINTS, clock: Callable[[], float] = time.monotonic):
+        self.top_k = top_k
+        self.calls_per_minute = calls_per_minute
+        self.lead_time = lead_time
+        self.interval = interval
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self.endpoints = tuple(endpoints)
+        self._clock = clock
+        self._tracked: Dict[str, _Tracked] = {}
+        self._calls: Deque[float] = collections.deque()
+        self._next_refresh: Dict[Tuple[str, str], float] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.deferred = 0
+
+    def _decayed(self, tracked: _Tracked, now: float) -> float:
+        return tracked.score * 0.5 ** ((now - tracked.updated) / self.half_life)
+
+    def record(self, place: Dict[str, Any]) -> None:
+        """Count one request for a resolved place."""
+        now = self._clock()
+        tracked = self._tracked.get(place["name"])
+        if tracked is None:
+            if len(self._tracked) >= self.max_tracked:
+                coldest = min(self._tracked, key=lambda name: self._decayed(self._tracked[name], now))
+                del self._tracked[coldest]
+            tracked = self._tracked[place["name"]] = _Tracked(place, now)
+        tracked.score = self._decayed(tracked, now) + 1.0
+        tracked.updated = now
+        tracked.requests += 1
+
+    def hot_places(self) -> List[_Tracked]:
+        """The top_k tracked places, highest score first."""
+        now = self._clock()
+        ranked = sorted(self._tracked.values(), key=lambda t: self._decayed(t, now), reverse=True)
+        return ranked[:self.top_k]
+
+    def _budget_used(self, now: float) -> int:
+        while self._calls and now - self._calls[0] >= BUDGET_WINDOW:
+            self._calls.popleft()
+        return len(self._calls)
+
+    async def run_once(self) -> int:
+        """Refresh the hot places' responses that are missing or about to expire.
+
+        Returns:
+            Number of upstream refreshes made
+        """
+        if api.is_demo_mode():
+            return 0
+        made = 0
+        for tracked in self.hot_places():
+            place = tracked.place
+            for endpoint in self.endpoints:
+                slot = (place["name"], endpoint)
+                now = self._clock()
+                remaining = api.cache_expires_in(endpoint, place["lat"], place["lon"])
+                if remaining is not None and remaining > self.lead_time:
+                    self._next_refresh[slot] = now + remaining - self.lead_time
+                    continue
+                if self._budget_used(now) >= self.calls_per_minute or api.upstream_limiter.saturated():
+                    # Tool requests come first; retry on a later pass
+                    self._next_refresh[slot] = now + self.interval
+                    self.deferred += 1
+                    continue
+                self._calls.append(now)
+                made += 1
+                data = await api.refresh(endpoint, place["lat"], place["lon"])
+                if api.is_error(data):
+                    self.failures += 1
+                    logger.info("Prefetch of %s for %s failed: %s", endpoint, place["name"], data["error"])
+                    self._next_refresh[slot] = self._clock() + self.interval
+                    continue
+                self.refreshes += 1
+                remaining = api.cache_expires_in(endpoint, place["lat"], place["lon"]) or 0.0
+                self._next_refresh[slot] = self._clock() + max(remaining - self.lead_time, 0.0)
+        return made
+
+    async def run(self) -> None:
+        """Run scheduler passes every interval seconds until cancelled."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Prefetch pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background task unless it is running or warming is disabled."""
+        if PREFETCH_ENABLED and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def state(self) -> Dict[str, Any]:
+        """Diagnostic snapshot: hot places, next refresh times and budget use."""
+        now = self._clock()
+        used = self._budget_used(now)
+        hot = []
+        for tracked in self.hot_places():
+            name = tracked.place["name"]
+            next_refresh = {}
+            for endpoint in self.endpoints:
+                due = self._next_refresh.get((name, endpoint))
+                next_refresh[endpoint] = None if due is None else round(max(due - now, 0.0), 1)
+            hot.append({
+                "name": name,
+                "score": round(self._decayed(tracked, now), 2),
+                "requests": tracked.requests,
+                "next_refresh_in_s": next_refresh,
+            })
+        return {
+            "enabled": PREFETCH_ENABLED and not api.is_demo_mode(),
+            "running": self._task is not None and not self._task.done(),
+            "tracked_places": len(self._tracked),
+            "hot_places": hot,
+            "budget": {"calls_per_minute": self.calls_per_minute, "used": used,
+                       "remaining": max(self.calls_per_minute - used, 0)},
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "deferred_for_budget": self.deferred,
+        }
+
+# Process-wide scheduler fed by the tools in weather.py; each worker process
+# of the HTTP server spends an equal share of the budget
+prefetcher = PrefetchScheduler(calls_per_minute=max(1, PREFETCH_CALLS_PER_MINUTE // SERVER_WORKERS))
@@ -0,0 +1,150 @@
+"""Sampling profiler keeping flamegraph-ready stacks of the slowest tool calls.
+
+While enabled, a SIGPROF interval timer interrupts the server every
+PROFILER_INTERVAL seconds of CPU time and the handler records the running
+Python stack. A sample is credited to the tool call whose context is current,
+which tasks started by the call (concurrent fetches, batches) inherit, so
+concurrent calls are told apart; time spent awaiting the network uses no CPU
+and leaves no samples. The stacks of the PROFILER_KEEP_SLOWEST slowest calls
+are kept in the folded format read by flamegraph.pl and speedscope
+("frame;frame;frame count" per line).
+
+The profiler is toggled at runtime with ``toggle()``, which the server binds
+to SIGUSR2, and costs nothing while off. It needs a POSIX system and the
+event loop on the main thread, where Python runs signal handlers.
+"""
+
+import heapq
+import itertools
+import logging
+import signal
+from collections import Counter
+from contextvars import ContextVar, Token
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import PROFILER_INTERVAL, PROFILER_KEEP_SLOWEST
+
+logger = logging.getLogger(__name__)
+
+class CallProfile:
+    """Stack samples of one tool call."""
+
+    __slots__ = ("name", "root", "stacks", "duration", "token")
+
+    def __init__(self, name: str, root: CodeType):
+        self.name = name
+        self.root = root  # code of the tool wrapper; stacks are cut below it
+        self.stacks: Counter = Counter()  # folded stack -> samples
+        self.duration = 0.0
+        self.token: Optional[Token] = None
+
+    def folded(self) -> List[str]:
+        return [f"{self.name};{stack} {count}" for stack, count in self.stacks.most_common()]
+
+_current_call: ContextVar[Optional[CallProfile]] = ContextVar("profiled_call", default=None)
+
+def _frame_name(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+class SamplingProfiler:
+    """Samples the stacks of tool calls and keeps those of the slowest ones."""
+
+    def __init__(self, interval: float = PROFILER_INTERVAL, keep: int = PROFILER_KEEP_SLOWEST):
+        self.interval = interval
+        self.keep = keep
+        self.enabled = False
+        self.samples = 0
+        self._slowest: List[Tuple[float, int, CallProfile]] = []  # min-heap on duration
+        self._order = itertools.count()
+        self._previous_handler: Any = None
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        try:
+            self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        except (AttributeError, ValueError) as e:
+            logger.warning("Sampling profiler unavailable: %s", e)
+            return
+        self.enabled = True
+        logger.info("Sampling profiler enabled (every %.0f ms of CPU time)", self.interval * 1000)
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self.enabled = False
+        logger.info("Sampling profiler disabled")
+
+    def toggle(self) -> None:
+        """Switch the profiler on or off."""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def begin(self, name: str, root: CodeType) -> Optional[CallProfile]:
+        """Credit samples taken in the current context to a call of ``name``."""
+        if not self.enabled:
+            return None
+        profile = CallProfile(name, root)
+        profile.token = _current_call.set(profile)
+        return profile
+
+    def end(self, profile: Optional[CallProfile], duration: float) -> None:
+        """Finish a call; keep its stacks if it is among the slowest."""
+        if profile is None:
+            return
+        _current_call.reset(profile.token)
+        profile.token = None
+        profile.duration = duration
+        entry = (duration, next(self._order), profile)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        profile = _current_call.get()
+        if profile is None or profile.token is None:
+            return
+        stack: List[str] = []
+        while frame is not None and frame.f_code is not profile.root:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        if frame is None:
+            # A task started by the call: cut the stack where the event loop runs its step
+            for i, name in enumerate(stack):
+                if name.startswith("asyncio.events:_run:"):
+                    del stack[i:]
+                    break
+        profile.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def slowest(self) -> List[CallProfile]:
+        return [profile for _, _, profile in sorted(self._slowest, reverse=True)]
+
+    def folded(self) -> str:
+        """Stacks of the kept calls, slowest first, in the folded format."""
+        return "\n".join(line for profile in self.slowest() for line in profile.folded()) + "\n"
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "slowest": [{"tool": profile.name, "duration_ms": round(profile.duration * 1000, 1),
+                         "samples": sum(profile.stacks.values()),
+                         "top_stacks": profile.folded()[:5]}
+                        for profile in self.slowest()],
+        }
+
+    def reset(self) -> None:
+        self._slowest.clear()
+        self.samples = 0
+
+# Enabled by the server lifespan if PROFILER_ENABLED, or at runtime with SIGUSR2
+profiler = SamplingProfiler()
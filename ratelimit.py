@@ -0,0 +1,209 @@
+"""Client-side rate limiting and quota accounting for upstream API calls."""
+
+import asyncio
+import collections
+import contextvars
+import itertools
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, Optional
+
+class TokenBucket:
+    """Token bucket: ``rate`` tokens per second, at most ``capacity`` stored."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available."""
+        self._refill()
+        return self._tokens
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def take(self) -> None:
+        """Take one token; callers check delay() first."""
+        self._refill()
+        self._tokens -= 1
+
+    def drain(self, seconds: float) -> None:
+        """Make the next token available no sooner than seconds from now."""
+        self._refill()
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+class RateLimited(Exception):
+    """The call budget is exhausted; ``retry_after`` is the estimated wait in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"{reason}, retry in {retry_after:.0f} s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+# Identifies the tool call a request belongs to; tasks inherit it from their creator
+_flow: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("ratelimit_flow", default=None)
+_flow_ids = itertools.count(1)
+
+def ensure_flow() -> None:
+    """Give the current context its own queuing flow unless it already has one.
+
+    Called at the start of a tool call's upstream work, so every request made
+    by that call, including those in tasks it spawns, shares one flow.
+    """
+    if _flow.get() is None:
+        _flow.set(next(_flow_ids))
+
+class QuotaLimiter:
+    """Async limiter enforcing a per-minute and a per-day call budget.
+
+    Calls that cannot go immediately wait in per-flow queues served round-robin,
+    so a batch of many requests from one tool call does not hold back a single
+    request from another. A call is rejected with RateLimited instead of waiting
+    when the daily budget is spent or it would wait longer than ``max_wait``.
+
+    Args:
+        per_minute: Calls allowed per minute
+        per_day: Calls allowed per day
+        burst: Calls allowed back to back before per-minute pacing starts
+        max_wait: Longest time a call waits in the queue, in seconds
+    """
+
+    def __init__(self, per_minute: float, per_day: float, burst: Optional[float] = None,
+                 max_wait: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.minute = TokenBucket(per_minute / 60.0, burst or per_minute, clock)
+        self.day = TokenBucket(per_day / 86400.0, per_day, clock)
+        self.max_wait = max_wait
+        self._clock = clock
+        self._queues: "collections.OrderedDict[Hashable, Deque[asyncio.Future[None]]]" = collections.OrderedDict()
+        self._dispatcher: Optional["asyncio.Task[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waits: Deque[float] = collections.deque(maxlen=1024)
+        self.acquired = 0
+        self.queued = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.max_queue_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Queued futures and the dispatcher belong to one event loop
+        if self._loop is not loop:
+            self._queues.clear()
+            self._dispatcher = None
+            self._loop = loop
+
+    def _delay(self) -> float:
+        return max(self.minute.delay(), self.day.delay())
+
+    def _take(self) -> None:
+        self.minute.take()
+        self.day.take()
+        self.acquired += 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls currently waiting for a token."""
+        return sum(1 for queue in self._queues.values() for future in queue if not future.done())
+
+    def saturated(self) -> bool:
+        """True if a call made now would have to wait or be rejected."""
+        return self.queue_depth > 0 or self._delay() > 0
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is free right now, without queueing or waiting.
+
+        Returns:
+            False if the call would have to wait or the daily budget is spent
+        """
+        self._bind(asyncio.get_running_loop())
+        if self.saturated():
+            return False
+        self._take()
+        return True
+
+    async def acquire(self) -> None:
+        """Wait for a token in the current flow's queue and take it.
+
+        Raises:
+            RateLimited: The daily budget is spent, or no token came within max_wait
+        """
+        loop = asyncio.get_running_loop()
+        self._bind(loop)
+        day_delay = self.day.delay()
+        if day_delay > 0:
+            self.rejected += 1
+            raise RateLimited("daily call budget exhausted", day_delay)
+        if not self.queue_depth and self.minute.delay() == 0:
+            self._take()
+            return
+
+        future: "asyncio.Future[None]" = loop.create_future()
+        flow = _flow.get()
+        self._queues.setdefault(flow if flow is not None else object(), collections.deque()).append(future)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        start = self._clock()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimited("per-minute call budget exhausted", self._delay()) from None
+        finally:
+            waited = self._clock() - start
+            self._waits.append(waited)
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    async def _dispatch(self) -> None:
+        """Hand out tokens to the queued flows in turn until all queues are empty."""
+        while self._queues:
+            delay = self._delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            flow, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(flow)
+            else:
+                del self._queues[flow]
+            if not future.done():  # skip waiters that timed out or were cancelled
+                self._take()
+                future.set_result(None)
+
+    def throttle(self, retry_after: float) -> None:
+        """Pause the minute budget after upstream answered 429 Too Many Requests."""
+        self.throttled += 1
+        self.minute.drain(retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return budget, queue-depth and wait-time metrics."""
+        waits = sorted(self._waits)
+        waited = len(waits)
+        return {
+            "minute_tokens": round(self.minute.tokens, 2),
+            "day_tokens": round(self.day.tokens, 2),
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "throttled_by_upstream": self.throttled,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_avg_ms": round(self.wait_total / self.queued * 1000, 1) if self.queued else 0.0,
+            "wait_p95_ms": round(waits[int(waited * 0.95)] * 1000, 1) if waited else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
@@ -0,0 +1,213 @@
+"""Recording and replaying upstream answers for offline, reproducible runs.
+
+Both modes are httpx transports given to the shared client, so everything
+above the network (the quota limiter, retries, hedging, decoding and caching)
+runs exactly as it does live. ``RecordingTransport`` passes requests on to
+the real transport and appends every answer to an archive: one JSON line per
+exchange with the endpoint, the query without the API key, the status, the
+body and how long upstream took, gzip-compressed. ``ReplayTransport`` never
+touches the network; it answers each request with the last answer recorded
+for the same endpoint and query, after a simulated latency.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from config import REPLAY_LATENCY, REPLAY_NEAREST
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SECRET_PARAMS = frozenset({"appid"})  # never written to the archive
+
+QueryKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def query_key(request: httpx.Request) -> QueryKey:
+    """(endpoint, sorted query without secrets) identifying a request."""
+    endpoint = request.url.path.rsplit("/", 1)[-1]
+    params = tuple(sorted((name, value) for name, value in request.url.params.multi_items()
+                          if name not in SECRET_PARAMS))
+    return endpoint, params
+
+class Exchange:
+    """One recorded answer."""
+
+    __slots__ = ("endpoint", "params", "status", "content_type", "body", "elapsed", "recorded_at")
+
+    def __init__(self, endpoint: str, params: Dict[str, str], status: int, content_type: str,
+                 body: bytes, elapsed: float, recorded_at: float):
+        self.endpoint = endpoint
+        self.params = params
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.elapsed = elapsed
+        self.recorded_at = recorded_at
+
+    def to_json(self) -> str:
+        return json.dumps({"endpoint": self.endpoint, "params": self.params, "status": self.status,
+                           "content_type": self.content_type, "elapsed": round(self.elapsed, 4),
+                           "recorded_at": round(self.recorded_at, 3),
+                           "body": self.body.decode("utf-8", "replace")},
+                          ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "Exchange":
+        data = json.loads(line)
+        return cls(data["endpoint"], data["params"], data["status"], data["content_type"],
+                   data["body"].encode(), data["elapsed"], data["recorded_at"])
+
+    @property
+    def coordinates(self) -> Optional[Tuple[float, float]]:
+        try:
+            return float(self.params["lat"]), float(self.params["lon"])
+        except (KeyError, ValueError):
+            return None
+
+def read_archive(path: str) -> List[Exchange]:
+    """All exchanges in an archive, oldest first; a truncated tail is skipped."""
+    exchanges: List[Exchange] = []
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                exchanges.append(Exchange.from_json(line))
+    except FileNotFoundError:
+        logger.warning("Replay archive %s does not exist", path)
+    except (EOFError, zlib.error, json.JSONDecodeError) as e:
+        # A recording process that was killed leaves an unfinished gzip member
+        logger.warning("Replay archive %s is truncated after %d answers: %s", path, len(exchanges), e)
+    return exchanges
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Sends requests upstream and appends the answers to an archive.
+
+    Answers that are worth retrying (429 and 5xx) are not recorded.
+    Each recorder appends its own gzip member, so several recordings
+    can go into one archive, one process at a time.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, path: str):
+        self._inner = inner
+        self.path = path
+        self._file: Optional[gzip.GzipFile] = None
+        self.recorded = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        body = await response.aread()
+        elapsed = time.perf_counter() - start
+        if response.status_code != 429 and response.status_code < 500:
+            endpoint, params = query_key(request)
+            self._write(Exchange(endpoint, dict(params), response.status_code,
+                                 response.headers.get("content-type", "application/json"),
+                                 body, elapsed, time.time()))
+        return response
+
+    def _write(self, exchange: Exchange) -> None:
+        if self._file is None:
+            self._file = gzip.open(self.path, "ab")
+        self._file.write(exchange.to_json().encode() + b"\n")
+        self.recorded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recorded": self.recorded}
+
+    async def aclose(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info("Recorded %d upstream answers to %s", self.recorded, self.path)
+        await self._inner.aclose()
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from an archive without any network access.
+
+    Args:
+        path: Archive written by RecordingTransport
+        latency: Seconds each answer is delayed by; None waits as long as
+            upstream took when it was recorded
+        nearest: Answer requests for unrecorded coordinates with the answer
+            recorded nearest to them for the same endpoint, instead of a 404
+    """
+
+    def __init__(self, path: str, latency: Optional[float] = REPLAY_LATENCY, nearest: bool = REPLAY_NEAREST):
+        self.path = path
+        self.latency = latency
+        self.nearest = nearest
+        self._answers: Dict[QueryKey, Exchange] = {}
+        self._located: Dict[str, List[Tuple[float, float, Exchange]]] = {}
+        for exchange in read_archive(path):
+            self._answers[(exchange.endpoint, tuple(sorted(exchange.params.items())))] = exchange
+        for exchange in self._answers.values():
+            coordinates = exchange.coordinates
+            if coordinates is not None and exchange.status == 200:
+                self._located.setdefault(exchange.endpoint, []).append((*coordinates, exchange))
+        self.hits = 0
+        self.nearest_hits = 0
+        self.misses = 0
+        logger.info("Replaying %d recorded upstream answers from %s", len(self._answers), path)
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def find(self, request: httpx.Request) -> Optional[Exchange]:
+        """The exchange answering request, or None."""
+        key = query_key(request)
+        exchange = self._answers.get(key)
+        if exchange is not None:
+            self.hits += 1
+            return exchange
+        candidates = self._located.get(key[0]) if self.nearest else None
+        params = dict(key[1])
+        if candidates and "lat" in params and "lon" in params:
+            lat, lon = float(params["lat"]), float(params["lon"])
+            self.nearest_hits += 1
+            return min(candidates, key=lambda c: (c[0] - lat) ** 2 + (c[1] - lon) ** 2)[2]
+        self.misses += 1
+        return None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        exchange = self.find(request)
+        if exchange is None:
+            body = json.dumps({"cod": "404", "message": "not in the replay archive"}).encode()
+            return httpx.Response(404, headers={"content-type": "application/json"}, content=body)
+        delay = exchange.elapsed if self.latency is None else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return httpx.Response(exchange.status, headers={"content-type": exchange.content_type},
+                              content=exchange.body)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"answers": len(self._answers), "hits": self.hits, "nearest_hits": self.nearest_hits,
+                "misses": self.misses}
+
+# The recording or replaying transport of the shared client, if any
+_active: Optional[Union[RecordingTransport, ReplayTransport]] = None
+
+def create_transport(mode: str, inner: httpx.AsyncBaseTransport, path: str) -> httpx.AsyncBaseTransport:
+    """The transport for an upstream mode: inner itself when live."""
+    global _active
+    if mode == "record":
+        logger.info("Recording upstream answers to %s", path)
+        _active = RecordingTransport(inner, path)
+        return _active
+    if mode == "replay":
+        _active = ReplayTransport(path)
+        return _active
+    if mode != "live":
+        logger.warning("Unknown upstream mode %r, talking to OpenWeatherMap", mode)
+    return inner
+
+def get_archive_stats() -> Dict[str, Any]:
+    """Counters of the active recording or replaying transport."""
+    return _active.stats() if _active is not None else {}
+
+metrics.add_collector("archive", get_archive_stats)
@@ -0,0 +1,344 @@
+"""The tools' Turkish reports, and a cache of rendered reports.
+
+Each report is rendered by one function from the parsed models: the pieces
+are collected in a list and joined once, and the constant text (wind
+directions, AQI descriptions, activity lists, table headers) is built at
+import time rather than on every call.
+
+A rendered report stays valid as long as the data it was rendered from. The
+response cache hands out the same model object until a new response replaces
+it, so the object is the data's version: ``cached_report`` keys reports on
+the tool and its resolved arguments, keeps weak references to the models they
+were rendered from, and reuses a report only while the caller passes those
+very objects. A report is dropped as soon as one of its models is freed, so
+the cache never keeps data alive that the response cache has evicted.
+Reports rendered from errors or stale copies are not kept.
+"""
+
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+from aggregate import daily_summaries, summaries_for_day
+from api import is_demo_mode, is_error
+from config import RENDER_CACHE_MAX_ENTRIES
+from gazetteer import get_gazetteer
+from metrics import metrics
+from models import AirQuality, CurrentWeather, Forecast, today
+from utils import compare_values, get_aqi_recommendations, get_turkish_day_name, get_weather_emoji, or_na
+
+Response = Union[CurrentWeather, Forecast, AirQuality, Dict[str, Any]]
+
+class RenderCache:
+    """LRU cache of rendered reports, checked against the models they were rendered from."""
+
+    def __init__(self, max_entries: int = RENDER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> (weak references to the models, local day, report); reports may mention "today" or "tomorrow"
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[weakref.ref, ...], int, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.outdated = 0  # misses because the data has changed since rendering
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, sources: Sequence[Any]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            rendered_from, day, text = entry
+            if (day == today() and len(rendered_from) == len(sources)
+                    and all(old() is new for old, new in zip(rendered_from, sources))):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            self.outdated += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, sources: Sequence[Any], text: str) -> None:
+        if any(is_error(data) or getattr(data, "stale_age", None) is not None for data in sources):
+            return
+        def forget(ref: weakref.ref) -> None:
+            # A freed model's identity may be reused, so its report goes with it
+            entry = self._entries.get(key)
+            if entry is not None and any(old is ref for old in entry[0]):
+                del self._entries[key]
+
+        self._entries[key] = (tuple(weakref.ref(data, forget) for data in sources), today(), text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "outdated": self.outdated, "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+render_cache = RenderCache()
+metrics.add_collector("render", render_cache.stats)
+
+def cached_report(key: Hashable, sources: Sequence[Any], render: Callable[[], str]) -> str:
+    """The report for key rendered from sources, reused while sources are unchanged."""
+    text = render_cache.get(key, sources)
+    if text is None:
+        text = render()
+        render_cache.put(key, sources, text)
+    return text
+
+DEMO_NOTICE = ("\n\n⚠️ DEMO MODU: Bu veriler yalnızca örnek amaçlıdır. "
+               "Gerçek hava durumu için geçerli bir OpenWeatherMap API anahtarı ekleyin.")
+
+def data_notice(*datasets: Any) -> str:
+    """Return a warning if the data shown is demo data, or if any response is
+    an old cached copy served because upstream failed."""
+    if is_demo_mode():
+        return DEMO_NOTICE
+    ages = [data.stale_age for data in datasets if getattr(data, "stale_age", None) is not None]
+    if not ages:
+        return ""
+    return f"\n\n⚠️ Güncel veriler alınamadı; yaklaşık {max(ages) // 60} dakika önceki veriler gösteriliyor."
+
+WIND_DIRECTIONS = ("kuzey", "kuzeydoğu", "doğu", "güneydoğu", "güney", "güneybatı", "batı", "kuzeybatı")
+
+def weather_report(location: Optional[str], weather: CurrentWeather, forecast: Response) -> str:
+    """Current conditions and the daily outlook of the next 5 days (hava_durumu)."""
+    location = location or weather.name or "Bilinmeyen Konum"
+    wind_dir_text = (WIND_DIRECTIONS[round((weather.wind_deg % 360) / 45) % 8]
+                     if weather.wind_deg is not None else "N/A")
+    header = f"""🌤️ HAVA DURUMU: {location.upper()} 🌤️
+
+MEVCUT DURUM:
+🌡️ Sıcaklık: {or_na(weather.temp)}°C (Hissedilen: {or_na(weather.feels_like)}°C)
+💧 Nem: %{or_na(weather.humidity)}
+🌬️ Rüzgar: {or_na(weather.wind_speed)} m/s, yönü {wind_dir_text}
+🔍 Durum: {or_na(weather.description)}
+
+5 GÜNLÜK TAHMİN:
+"""
+    # Return the current conditions even if the forecast could not be fetched
+    if is_error(forecast):
+        return f"{header}Hava durumu tahmini alınamadı: {forecast['error']}{data_notice(weather)}"
+
+    # Aggregate the 3-hourly slots of the next 5 local days
+    days = []
+    for summary in daily_summaries(forecast, days=5):
+        precipitation = f"yağış {summary.precipitation:.1f} mm" if summary.precipitation else "yağış yok"
+        days.append(
+            f"{summary.day.strftime('%d.%m.%Y')} ({get_turkish_day_name(summary.day.weekday())}) - "
+            f"{summary.temp_min:.1f}°C / {summary.temp_max:.1f}°C (ort. {summary.temp_mean:.1f}°C), "
+            f"{summary.description}, {precipitation}, rüzgar en fazla {summary.wind_max:.1f} m/s")
+    return header + "\n".join(days) + data_notice(weather, forecast)
+
+def hourly_report(name: str, days: int, forecast: Forecast) -> str:
+    """The forecast slot by slot, grouped by local day (saatlik_hava_durumu)."""
+    parts = [f"🕒 {name} İÇİN SAATLİK HAVA DURUMU 🕒\n\n"]
+    current_day = None
+    for i in range(min(days * 24, len(forecast))):
+        # Show date at the beginning of a new day
+        if current_day != forecast.day[i]:
+            current_day = forecast.day[i]
+            day = forecast.slot_date(i)
+            parts.append(f"\n📅 {day.strftime('%d.%m.%Y')} ({get_turkish_day_name(day.weekday())})\n")
+        condition = forecast.description[i]
+        parts.append(f"{forecast.time_text(i)} - {get_weather_emoji(condition)} {forecast.temp[i]}°C, {condition}, "
+                     f"Nem: %{forecast.humidity[i]}, Rüzgar: {forecast.wind_speed[i]}m/s\n")
+    parts.append(data_notice(forecast))
+    return "".join(parts)
+
+AQI_DESCRIPTIONS = ("Bilgi yok", "İyi", "Makul", "Hassas gruplar için sağlıksız", "Sağlıksız",
+                    "Çok sağlıksız", "Tehlikeli")
+
+def air_quality_report(name: str, air: AirQuality) -> str:
+    """Air quality index, pollutants and advice (hava_kalitesi)."""
+    aqi = air.aqi
+    aqi_description = AQI_DESCRIPTIONS[min(aqi, len(AQI_DESCRIPTIONS) - 1)]
+    return f"""🌬️ {name} HAVA KALİTESİ 🌬️
+
+Hava Kalitesi Endeksi (AQI): {aqi} - {aqi_description}
+
+🔍 KİRLETİCİLER:
+• Partiküller (PM2.5): {or_na(air.pm2_5)} μg/m³
+• Partiküller (PM10): {or_na(air.pm10)} μg/m³
+• Ozon (O₃): {or_na(air.o3)} μg/m³
+• Nitrojen dioksit (NO₂): {or_na(air.no2)} μg/m³
+• Kükürt dioksit (SO₂): {or_na(air.so2)} μg/m³
+• Karbon monoksit (CO): {or_na(air.co)} μg/m³
+
+💡 TAVSİYELER:
+{get_aqi_recommendations(aqi)}
+""" + data_notice(air)
+
+def comparison_report(name1: str, weather1: CurrentWeather, name2: str, weather2: CurrentWeather) -> str:
+    """Side-by-side table of two cities' current weather (sehirler_karsilastir)."""
+    temp1, temp2 = or_na(weather1.temp), or_na(weather2.temp)
+    feels1, feels2 = or_na(weather1.feels_like), or_na(weather2.feels_like)
+    humidity1, humidity2 = or_na(weather1.humidity), or_na(weather2.humidity)
+    condition1, condition2 = or_na(weather1.description), or_na(weather2.description)
+    wind1, wind2 = or_na(weather1.wind_speed), or_na(weather2.wind_speed)
+
+    temp_compare = compare_values(temp1, temp2, "daha sıcak", "daha soğuk")
+    humidity_compare = compare_values(humidity1, humidity2, "daha nemli", "daha kuru")
+    wind_compare = compare_values(wind1, wind2, "daha rüzgarlı", "daha sakin")
+
+    return f"""🔄 HAVA DURUMU KARŞILAŞTIRMASI 🔄
+
+┌─────────────────────┬────────────────┬────────────────┐
+│                     │ {name1:<14} │ {name2:<14} │
+├─────────────────────┼────────────────┼────────────────┤
+│ Sıcaklık            │ {temp1}°C          │ {temp2}°C          │
+│ Hissedilen          │ {feels1}°C          │ {feels2}°C          │
+│ Nem                 │ %{humidity1:<13} │ %{humidity2:<13} │
+│ Rüzgar              │ {wind1} m/s         │ {wind2} m/s         │
+│ Durum               │ {condition1:<14} │ {condition2:<14} │
+└─────────────────────┴────────────────┴────────────────┘
+
+📊 KARŞILAŞTIRMA:
+• {name1}, {name2}'dan {temp_compare}.
+• {name1}, {name2}'dan {humidity_compare}.
+• {name1}, {name2}'dan {wind_compare}.
+""" + data_notice(weather1, weather2)
+
+def partial_comparison_report(error: str, name: str, weather: CurrentWeather) -> str:
+    """The one city's weather when the other's could not be fetched."""
+    return f"""🔄 HAVA DURUMU KARŞILAŞTIRMASI 🔄
+
+⚠️ Karşılaştırma yapılamadı: {error}
+
+{name}:
+• Sıcaklık: {or_na(weather.temp)}°C (Hissedilen: {or_na(weather.feels_like)}°C)
+• Nem: %{or_na(weather.humidity)}
+• Rüzgar: {or_na(weather.wind_speed)} m/s
+• Durum: {or_na(weather.description)}
+""" + data_notice(weather)
+
+INDOOR_ACTIVITIES = ("Müze ziyareti", "Alışveriş merkezi gezisi", "Kafe veya restoranda vakit geçirme",
+                     "Sinema filmi izleme", "Kitap okuma", "Yerel sergi ziyareti")
+OUTDOOR_ACTIVITIES = ("Yürüyüş yapma", "Bisiklet sürme", "Parkta piknik yapma", "Şehir turu",
+                      "Açık hava kafelerinde oturma", "Sahil kenarında gezinme (uygunsa)")
+# (recommended, not recommended, reason) per kind of weather
+ACTIVITIES = {
+    "rain": (INDOOR_ACTIVITIES, OUTDOOR_ACTIVITIES, "yağışlı hava"),
+    "snow": (INDOOR_ACTIVITIES, OUTDOOR_ACTIVITIES, "karlı hava"),
+    "wind": (INDOOR_ACTIVITIES + ("Rüzgardan korunaklı kafelerde oturma",),
+             ("Bisiklet sürme", "Parkta piknik yapma", "Açık hava etkinlikleri"), "rüzgarlı hava"),
+    "hot": (("Plaja gitme (uygunsa)", "Su parkı ziyareti", "Gölgeli parklar", "Klimalı mekanlarda vakit geçirme"),
+            ("Uzun yürüyüşler", "Güneş altında uzun süre kalmak", "Fiziksel olarak yorucu aktiviteler"),
+            "çok sıcak hava"),
+    "cold": (INDOOR_ACTIVITIES + ("Sıcak içeceklerin tadını çıkarma",),
+             ("Uzun süre dışarıda kalmak", "Su aktiviteleri"), "soğuk hava"),
+    "nice": (OUTDOOR_ACTIVITIES, (), "güzel hava"),
+}
+
+def activity_report(name: str, weather: CurrentWeather, forecast: Response) -> str:
+    """Activities suited to the current weather and tomorrow's change (havadurumu_aktivite_onerileri)."""
+    current_temp = weather.temp if weather.temp is not None else 20
+    current_id = weather.condition_id if weather.condition_id is not None else 800
+    wind_speed = weather.wind_speed or 0
+
+    # Condition ids 2xx: thunderstorm, 3xx: drizzle, 5xx: rain, 6xx: snow
+    if 200 <= current_id < 700:
+        kind = "snow" if 600 <= current_id < 700 else "rain"
+    elif wind_speed > 5.5:  # 5.5 m/s is considered moderate wind
+        kind = "wind"
+    elif current_temp > 30:
+        kind = "hot"
+    elif current_temp < 5:
+        kind = "cold"
+    else:
+        kind = "nice"
+    recommended, not_recommended, reason = ACTIVITIES[kind]
+
+    parts = [f"""🎯 {name} İÇİN AKTİVİTE ÖNERİLERİ 🎯
+
+📝 GÜNCEL HAVA DURUMU:
+• Sıcaklık: {current_temp}°C
+• Durum: {weather.description or "bilinmiyor"}
+• Rüzgar: {wind_speed} m/s
+
+👍 ÖNERİLEN AKTİVİTELER ({reason} için):
+"""]
+    parts.extend(f"• {activity}\n" for activity in recommended[:5])
+    if not_recommended:
+        parts.append("\n👎 KAÇINILMASI GEREKEN AKTİVİTELER:\n")
+        parts.extend(f"• {activity}\n" for activity in not_recommended[:3])
+    parts.append("\n🔮 İLERİYE DÖNÜK TAHMİN:\n")
+
+    # Show important changes in future forecast
+    if not is_error(forecast):
+        next_day = forecast.first_slot_after(today())
+        if next_day is not None:
+            temp_change = forecast.temp[next_day] - current_temp
+            direction = "daha sıcak" if temp_change > 0 else "daha soğuk"
+            parts.append(f"• {forecast.slot_date(next_day).strftime('%d.%m.%Y')} tarihinde hava "
+                         f"{abs(temp_change):.1f}°C {direction} olacak ve "
+                         f"{forecast.description[next_day]} bekleniyor.")
+    else:
+        parts.append(f"• Tahmin alınamadı: {forecast['error']}")
+    parts.append(data_notice(weather, forecast))
+    return "".join(parts)
+
+Location = Tuple[Optional[str], float, float]  # (display name or None, lat, lon)
+
+BATCH_TABLE_HEADER = f"{'Konum':<16} {'Sıcaklık':>8}  {'Nem':<4} {'Rüzgar':>9}  Durum\n"
+
+def batch_report(requested: int, locations: Sequence[Location], results: Sequence[Response],
+                 forecasts: Optional[Sequence[Response]], failures: Sequence[str]) -> str:
+    """One row per location, with tomorrow's outlook if forecasts are given (coklu_sehir_hava_durumu).
+
+    ``failures`` lists the entries that could not be resolved to a place;
+    locations whose weather could not be fetched are added to them.
+    """
+    if forecasts is not None:
+        # One aggregation pass over every city's forecast for tomorrow
+        available = [forecast for forecast in forecasts if not is_error(forecast)]
+        tomorrow = iter(summaries_for_day(available, today() + 1))
+        outlooks = [None if is_error(forecast) else next(tomorrow) for forecast in forecasts]
+    else:
+        outlooks = [None] * len(results)
+
+    failures = list(failures)
+    rows: List[str] = []
+    temperatures = []
+    for (name, lat, lon), weather, outlook in zip(locations, results, outlooks):
+        if is_error(weather):
+            failures.append(f"{name or f'{lat}, {lon}'}: {weather['error']}")
+            continue
+
+        location = name or weather.name or f"{lat}, {lon}"
+        temp = or_na(weather.temp)
+        stale_marker = " (eski veri)" if weather.stale_age is not None else ""
+        row = (f"{location:<16} {temp:>6}°C  %{or_na(weather.humidity):<3} {or_na(weather.wind_speed):>5} m/s  "
+               f"{or_na(weather.description)}{stale_marker}")
+        if outlook is not None:
+            row += (f"\n{'':<16} yarın: {outlook.temp_min:.1f} / {outlook.temp_max:.1f}°C, "
+                    f"{outlook.description}, yağış {outlook.precipitation:.1f} mm")
+        rows.append(row)
+        if isinstance(temp, (int, float)):
+            temperatures.append((temp, location))
+
+    parts = [f"📊 ÇOKLU ŞEHİR HAVA DURUMU ({len(rows)}/{requested} konum) 📊\n\n"]
+    if rows:
+        parts += (BATCH_TABLE_HEADER, "\n".join(rows), "\n")
+    if temperatures:
+        hottest = max(temperatures)
+        coldest = min(temperatures)
+        parts.append(f"\n🔥 En sıcak: {hottest[1]} ({hottest[0]}°C)\n")
+        parts.append(f"❄️ En soğuk: {coldest[1]} ({coldest[0]}°C)\n")
+    if failures:
+        parts.append("\n⚠️ ALINAMAYAN KONUMLAR:\n")
+        parts.extend(f"• {failure}\n" for failure in failures)
+    return "".join(parts).rstrip("\n") + data_notice(*results)
+
+@lru_cache(maxsize=1)
+def city_list_report() -> str:
+    """The provinces in alphabetical order (turk_sehirleri_listesi); the gazetteer never changes."""
+    gazetteer = get_gazetteer()
+    cities = [f"• {city_data['name']}" for _, city_data in sorted(gazetteer.provinces.items())]
+    district_count = len(gazetteer) - len(gazetteer.provinces)
+    return ("📍 KAYITLI ŞEHİRLER 📍\n\n" + "\n".join(cities) +
+            f"\n\nAyrıca {district_count} ilçe adıyla ve plaka koduyla (örn. 34) sorgu yapılabilir.")
@@ -0,0 +1,90 @@
+"""Building blocks for resilient upstream calls: backoff, latency tracking and circuit breaking."""
+
+import collections
+import random
+import time
+from typing import Any, Callable, Deque, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def decorrelated_jitter(previous: float, base: float, cap: float, rng: random.Random = random) -> float:
+    """Next retry delay: uniform between base and three times the previous delay, capped.
+
+    Spreads retries from many callers apart instead of synchronising them
+    like plain exponential backoff does.
+    """
+    return min(cap, rng.uniform(base, previous * 3))
+
+class LatencyTracker:
+    """Rolling window of recent latencies for one endpoint."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = collections.deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile of the window, or None until min_samples are recorded."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+class CircuitBreaker:
+    """Stops calls to an endpoint after repeated failures, then probes for recovery.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    allow() returns False for ``reset_timeout`` seconds. Then one probe call is
+    let through (half-open): success closes the breaker, failure opens it again.
+    A probe that never reports back is replaced after another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probe_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now."""
+        if self.state == CLOSED:
+            return True
+        now = self._clock()
+        if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._probe_at = None
+        if self.state == HALF_OPEN and (self._probe_at is None or now - self._probe_at >= self.reset_timeout):
+            self._probe_at = now
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed."""
+        start = self._opened_at if self.state == OPEN else (self._probe_at or 0.0)
+        return max(0.0, start + self.reset_timeout - self._clock())
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._probe_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.state = OPEN
+            self._opened_at = self._clock()
+            self._probe_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "trips": self.trips}
@@ -0,0 +1,105 @@
+"""Persistent on-disk response cache shared by server processes on one host."""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+def encode_key(key: Hashable) -> str:
+    """Turn an in-memory cache key tuple into a stable text key."""
+    if isinstance(key, tuple):
+        return "|".join(str(part) for part in key)
+    return str(key)
+
+class PersistentCache:
+    """SQLite-backed cache of raw response bodies with absolute expiry times.
+
+    The database runs in WAL mode so readers never block the writer, and
+    every connection waits on locks held by other processes instead of
+    failing. Several server processes can therefore share one file.
+    Expiry uses wall-clock time because entries outlive the process.
+    """
+
+    def __init__(self, path: str, max_entries: int, busy_timeout: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False,
+                                     isolation_level=None)
+        with self._lock:
+            # auto_vacuum only takes effect before the first table is created
+            self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute(_SCHEMA)
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, float]]:
+        """Return (payload, expires_at) for an unexpired entry, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                (encode_key(key), time.time()),
+            ).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def set(self, key: Hashable, payload: bytes, ttl: float) -> None:
+        """Store payload under key for ttl seconds."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                (encode_key(key), payload, now, now + ttl),
+            )
+
+    def compact(self) -> Dict[str, int]:
+        """Drop expired entries, trim to max_entries and give free pages back to the OS.
+
+        Returns the number of entries removed and the number left.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = self._conn.execute(
+                    "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+                trimmed = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                    "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            remaining = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            # A single step of the pragma frees one page; the script runs it to completion
+            self._conn.executescript("PRAGMA incremental_vacuum;")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": expired, "trimmed": trimmed, "entries": remaining}
+
+    def vacuum(self) -> None:
+        """Rebuild the database file; needs a moment of exclusive access."""
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, on-disk size and pages waiting to be freed."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return {"path": self.path, "entries": entries, "bytes": page_count * page_size, "free_pages": free_pages}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,227 @@
+"""Opt-in spans around the stages of a tool call.
+
+``span()``, ``traced()`` and ``annotate()`` cost a flag check while tracing is
+off. In "local" mode spans are recorded by a small built-in tracer: finished
+traces are kept in memory, slowest first in ``recent_traces()``, and every
+span is appended to TRACE_FILE as one JSON line using the OTLP field names
+(traceId, spanId, parentSpanId, startTimeUnixNano, ...). In "otel" mode the
+spans go to the OpenTelemetry API, so any configured SDK exporter receives them.
+"""
+
+import functools
+import importlib.util
+import inspect
+import json
+import logging
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+
+from config import TRACE_FILE, TRACE_KEEP, TRACING_MODE
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """A finished or running span of the local tracer."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "error", "_token")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        tracer.start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        tracer.finish(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error
+                      else {"code": "STATUS_CODE_OK"},
+        }
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+_NOOP = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class Tracer:
+    """Collects the spans of each trace until its root span ends."""
+
+    def __init__(self, mode: str = TRACING_MODE, path: Optional[str] = TRACE_FILE, keep: int = TRACE_KEEP):
+        self.path = path
+        self._open: Dict[str, List[Span]] = {}
+        self._recent: Deque[List[Span]] = deque(maxlen=keep)
+        self._otel: Any = None
+        self.mode = "off"
+        self.set_mode(mode)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def set_mode(self, mode: str) -> None:
+        """Switch between "off", "local" and "otel" (local if OpenTelemetry is missing)."""
+        if mode == "otel":
+            if importlib.util.find_spec("opentelemetry") is None:
+                logger.warning("WEATHER_TRACING=otel but opentelemetry is not installed, tracing locally")
+                mode = "local"
+            else:
+                from opentelemetry import trace
+                self._otel = trace.get_tracer("weather-turkey")
+        elif mode not in ("off", "local"):
+            logger.warning("Unknown tracing mode %r, tracing is off", mode)
+            mode = "off"
+        self.mode = mode
+
+    def span(self, name: str, attributes: Dict[str, Any]) -> Any:
+        if self.mode == "otel":
+            return self._otel.start_as_current_span(name, attributes=attributes)
+        return Span(name, _current_span.get(), attributes)
+
+    def start(self, span: Span) -> None:
+        if span.parent_id is None:
+            self._open[span.trace_id] = []
+
+    def finish(self, span: Span) -> None:
+        spans = self._open.get(span.trace_id)
+        if spans is None:
+            # Outlived its trace's root, e.g. a shared fetch another caller still awaits
+            self._write([span])
+            return
+        spans.append(span)
+        if span.parent_id is None:
+            del self._open[span.trace_id]
+            self._recent.append(spans)
+            self._write(spans)
+
+    def _write(self, spans: List[Span]) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(span.to_otlp(), ensure_ascii=False, default=str) + "\n"
+                             for span in spans)
+        except OSError as e:
+            logger.warning("Writing spans to %s failed: %s", self.path, e)
+
+    def recent_traces(self) -> List[Dict[str, Any]]:
+        """Kept traces, slowest first, as span trees with durations and self times in ms."""
+        traces = []
+        for spans in self._recent:
+            root = next(span for span in spans if span.parent_id is None)
+            children: Dict[Optional[str], List[Span]] = {}
+            for span in spans:
+                children.setdefault(span.parent_id, []).append(span)
+            rows: List[Dict[str, Any]] = []
+
+            def walk(span: Span, depth: int) -> None:
+                kids = sorted(children.get(span.span_id, []), key=lambda s: s.start_ns)
+                duration = span.end_ns - span.start_ns
+                rows.append({
+                    "span": "  " * depth + span.name,
+                    "start_ms": round((span.start_ns - root.start_ns) / 1e6, 3),
+                    "duration_ms": round(duration / 1e6, 3),
+                    # Time not covered by child spans, e.g. the tool's own formatting
+                    "self_ms": round((duration - _covered(kids)) / 1e6, 3),
+                    **({"attributes": span.attributes} if span.attributes else {}),
+                    **({"error": span.error} if span.error else {}),
+                })
+                for kid in kids:
+                    walk(kid, depth + 1)
+
+            walk(root, 0)
+            traces.append({"trace_id": root.trace_id, "name": root.name,
+                           "duration_ms": rows[0]["duration_ms"], "spans": rows})
+        return sorted(traces, key=lambda trace: trace["duration_ms"], reverse=True)
+
+def _covered(spans: List[Span]) -> int:
+    """Nanoseconds covered by the union of spans sorted by start; concurrent ones overlap."""
+    covered, end = 0, 0
+    for span in spans:
+        start = max(span.start_ns, end)
+        if span.end_ns > start:
+            covered += span.end_ns - start
+            end = span.end_ns
+    return covered
+
+tracer = Tracer()
+
+def span(name: str, **attributes: Any) -> Any:
+    """Context manager timing a stage as a child of the current span."""
+    if tracer.mode == "off":
+        return _NOOP
+    return tracer.span(name, attributes)
+
+def annotate(**attributes: Any) -> None:
+    """Add attributes to the current span, if tracing."""
+    if tracer.mode == "off":
+        return
+    if tracer.mode == "otel":
+        from opentelemetry import trace
+        trace.get_current_span().set_attributes(attributes)
+        return
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator running a sync or async function inside a span."""
+    def decorate(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if tracer.mode == "off":
+                    return await fn(*args, **kwargs)
+                with tracer.span(name, {}):
+                    return await fn(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if tracer.mode == "off":
+                return fn(*args, **kwargs)
+            with tracer.span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
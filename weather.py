@@ -1,21 +1,103 @@
 """Main module for the weather application with MCP tools."""
 
-from typing import Optional
-from datetime import datetime
+import asyncio
+import json
+import signal
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
 
 # Import from our modules
-from config import TURKISH_CITIES
-from utils import (normalize_turkish_text, get_weather_emoji, get_turkish_day_name, 
-                  get_aqi_recommendations, compare_values, generate_demo_weather,
-                  generate_demo_hourly_forecast, generate_demo_air_quality,
-                  generate_demo_city_comparison, generate_demo_activity_recommendations)
-from api import make_weather_request, get_current_weather, get_weather_forecast, get_air_quality
+from config import BATCH_MAX_LOCATIONS, PROFILER_ENABLED
+from fuzzy import resolve_place
+from geo import nearest_place
+from metrics import MetricsExporter, metrics, timed_tool
+from prefetch import prefetcher
+from profiler import profiler
+from tracing import traced, tracer
+from reports import (activity_report, air_quality_report, batch_report, cached_report, city_list_report,
+                     comparison_report, hourly_report, partial_comparison_report, weather_report)
+from utils import parse_coordinates
+from api import (is_error, get_current_weather, get_weather_forecast, get_air_quality,
+                 fetch_all, fetch_batch, fetch_many, lifespan, get_rate_limit_stats,
+                 get_resilience_stats)
 
-# Initialize FastMCP server
-mcp = FastMCP("weather-turkey")
+@asynccontextmanager
+async def _process_lifespan(server: Any) -> AsyncIterator[None]:
+    """Run the API lifespan (HTTP client, persistent cache), the cache warmer,
+    the optional metrics exporter and the profiler's SIGUSR2 toggle."""
+    async with lifespan(server):
+        exporter = MetricsExporter()
+        exporter.start()
+        prefetcher.start()
+        if PROFILER_ENABLED:
+            profiler.enable()
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGUSR2, profiler.toggle)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass  # no SIGUSR2 on Windows, or not on the main thread
+        try:
+            yield
+        finally:
+            try:
+                loop.remove_signal_handler(signal.SIGUSR2)
+            except (AttributeError, NotImplementedError, RuntimeError):
+                pass
+            profiler.disable()
+            await prefetcher.stop()
+            await exporter.stop()
+
+# Sessions currently inside server_lifespan, and the resources they share
+_lifespan_users = 0
+_lifespan_stack: Optional[AsyncExitStack] = None
+_lifespan_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def server_lifespan(server: Any) -> AsyncIterator[None]:
+    """Process-wide resources shared by every MCP session of this process.
+
+    FastMCP enters the lifespan once per session: once in total over stdio,
+    but once per request on the stateless HTTP transport. The resources are
+    started by the first user and stopped when the last one leaves; the HTTP
+    app holds them for the whole life of its worker process.
+    """
+    global _lifespan_users, _lifespan_stack
+    async with _lifespan_lock:
+        if _lifespan_users == 0:
+            stack = AsyncExitStack()
+            await stack.enter_async_context(_process_lifespan(server))
+            _lifespan_stack = stack
+        _lifespan_users += 1
+    try:
+        yield
+    finally:
+        async with _lifespan_lock:
+            _lifespan_users -= 1
+            if _lifespan_users == 0 and _lifespan_stack is not None:
+                stack, _lifespan_stack = _lifespan_stack, None
+                await stack.aclose()
+
+# Initialize FastMCP server; the lifespan owns the shared HTTP client
+mcp = FastMCP("weather-turkey", lifespan=server_lifespan)
+
+@traced("resolve_place")
+def resolve_city(sehir: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Resolve a place name like resolve_place and count the request for cache warming."""
+    city_data, suggestions = resolve_place(sehir)
+    if city_data is not None:
+        prefetcher.record(city_data)
+    return city_data, suggestions
+
+def city_not_found(sehir: str, suggestions: List[Dict[str, Any]], subject: str = "hava durumu bilgisi") -> str:
+    """Build the message for an unknown city, with 'did you mean' suggestions if any."""
+    if suggestions:
+        suggested = ", ".join([city["name"] for city in suggestions])
+        return f"'{sehir}' bulunamadı. Bunlardan birini mi demek istediniz? {suggested}"
+    return f"'{sehir}' için {subject} bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
 
 @mcp.tool()
+@timed_tool
 async def hava_durumu(enlem: float, boylam: float, yer_adi: Optional[str] = None) -> str:
     """Belirli bir konum için hava durumu tahminini alır.
 
@@ -31,93 +113,40 @@ async def hava_durumu(enlem: float, boylam: float, yer_adi: Optional[str] = None
     if not (-180 <= boylam <= 180):
         return "Geçersiz boylam değeri. Boylam -180 ile 180 arasında olmalıdır."
     
-    weather_data = await get_current_weather(enlem, boylam)
-    
-    if "error" in weather_data:
-        if "Demo mode" in weather_data["error"]:
-            # Generate demo data if using placeholder API key
-            return generate_demo_weather(enlem, boylam, yer_adi, TURKISH_CITIES)
-        return f"Hava durumu bilgisi alınamadı: {weather_data['error']}"
-    
-    forecast_data = await get_weather_forecast(enlem, boylam)
-    if "error" in forecast_data:
-        return f"Hava durumu tahmini alınamadı: {forecast_data['error']}"
-    
-    location = yer_adi or f"{weather_data.get('name', 'Bilinmeyen Konum')}"
-    
-    # Current weather
-    current = weather_data
-    current_temp = current.get("main", {}).get("temp", "N/A")
-    current_feels = current.get("main", {}).get("feels_like", "N/A")
-    current_humidity = current.get("main", {}).get("humidity", "N/A")
-    current_description = current.get("weather", [{}])[0].get("description", "N/A")
-    
-    # Wind information
-    wind_speed = current.get("wind", {}).get("speed", "N/A")
-    wind_direction = current.get("wind", {}).get("deg", "N/A")
-    
-    # Format wind direction
-    directions = ["kuzey", "kuzeydoğu", "doğu", "güneydoğu", "güney", "güneybatı", "batı", "kuzeybatı"]
-    wind_dir_text = directions[round(((wind_direction % 360) / 45) % 8)] if isinstance(wind_direction, (int, float)) else "N/A"
-    
-    # Build current weather report
-    result = f"""🌤️ HAVA DURUMU: {location.upper()} 🌤️
-
-MEVCUT DURUM:
-🌡️ Sıcaklık: {current_temp}°C (Hissedilen: {current_feels}°C)
-💧 Nem: %{current_humidity}
-🌬️ Rüzgar: {wind_speed} m/s, yönü {wind_dir_text}
-🔍 Durum: {current_description}
-
-5 GÜNLÜK TAHMİN:
-"""
+    # Name the location after the nearest known Turkish settlement if none was given
+    if yer_adi is None:
+        place = nearest_place(enlem, boylam)
+        if place is not None:
+            yer_adi = place["name"]
+            prefetcher.record(place)
     
-    # Extract forecast for next 5 days (every 24 hours)
-    forecast_items = forecast_data.get("list", [])
-    seen_dates = set()
-    daily_forecasts = []
+    # Both fetches run concurrently; the forecast is dropped if current weather fails
+    weather_data, forecast_data = await fetch_all(
+        get_current_weather(enlem, boylam), get_weather_forecast(enlem, boylam), fail_fast=True)
     
-    for item in forecast_items:
-        dt = datetime.fromtimestamp(item["dt"])
-        date_str = dt.strftime("%Y-%m-%d")
-        
-        if date_str in seen_dates:
-            continue
-            
-        seen_dates.add(date_str)
-        if len(seen_dates) > 5:
-            break
-            
-        temp = item["main"]["temp"]
-        condition = item["weather"][0]["description"]
-        
-        daily_forecasts.append(f"{dt.strftime('%d.%m.%Y')} - {temp}°C, {condition}")
+    if is_error(weather_data):
+        return f"Hava durumu bilgisi alınamadı: {weather_data['error']}"
     
-    result += "\n".join(daily_forecasts)
-    return result
+    return cached_report(("hava_durumu", enlem, boylam, yer_adi), (weather_data, forecast_data),
+                         lambda: weather_report(yer_adi, weather_data, forecast_data))
 
 @mcp.tool()
+@timed_tool
 async def hava_durumu_sehir(sehir: str) -> str:
     """Türkiye'deki bir şehir için hava durumu tahminini alır.
 
     Args:
         sehir: Türkiye'deki şehir adı (örn. İstanbul, Ankara)
     """
-    normalized_input = normalize_turkish_text(sehir)
+    city_data, suggestions = resolve_city(sehir)
     
-    if normalized_input not in TURKISH_CITIES:
-        close_matches = [city for city in TURKISH_CITIES if normalized_input in normalize_turkish_text(city)]
-        
-        if close_matches:
-            suggested = ", ".join([TURKISH_CITIES[city]["name"] for city in close_matches])
-            return f"'{sehir}' bulunamadı. Bunlardan birini mi demek istediniz? {suggested}"
-        
-        return f"'{sehir}' için hava durumu bilgisi bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
+    if city_data is None:
+        return city_not_found(sehir, suggestions)
     
-    city_data = TURKISH_CITIES[normalized_input]
     return await hava_durumu(city_data["lat"], city_data["lon"], city_data["name"])
 
 @mcp.tool()
+@timed_tool
 async def saatlik_hava_durumu(sehir: str, gun_sayisi: int = 1) -> str:
     """Belirli bir şehir için saatlik hava durumu tahminlerini alır.
     
@@ -129,111 +158,47 @@ async def saatlik_hava_durumu(sehir: str, gun_sayisi: int = 1) -> str:
     if not (1 <= gun_sayisi <= 5):
         return "Geçersiz gün sayısı. Değer 1-5 arasında olmalıdır."
     
-    # Normalize city name and get coordinates
-    normalized_input = normalize_turkish_text(sehir)
-    if normalized_input not in TURKISH_CITIES:
-        return f"'{sehir}' için hava durumu bilgisi bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
-    
-    city_data = TURKISH_CITIES[normalized_input]
-    lat, lon = city_data["lat"], city_data["lon"]
+    # Look up the city's coordinates
+    city_data, suggestions = resolve_city(sehir)
+    if city_data is None:
+        return city_not_found(sehir, suggestions)
     
     # Get hourly forecast data
-    forecast_data = await make_weather_request("forecast", {"lat": lat, "lon": lon})
+    forecast_data = await get_weather_forecast(city_data["lat"], city_data["lon"])
     
-    if "error" in forecast_data:
-        if "Demo mode" in forecast_data["error"]:
-            return generate_demo_hourly_forecast(city_data["name"], gun_sayisi)
+    if is_error(forecast_data):
         return f"Hava durumu tahmini alınamadı: {forecast_data['error']}"
     
-    # Format hourly data
-    result = f"🕒 {city_data['name']} İÇİN SAATLİK HAVA DURUMU 🕒\n\n"
-    
-    forecast_items = forecast_data.get("list", [])
-    hours_to_show = min(gun_sayisi * 24, len(forecast_items))
-    
-    current_date = None
-    for i in range(min(hours_to_show, len(forecast_items))):
-        item = forecast_items[i]
-        dt = datetime.fromtimestamp(item["dt"])
-        
-        # Show date at the beginning of a new day
-        if current_date != dt.date():
-            current_date = dt.date()
-            result += f"\n📅 {dt.strftime('%d.%m.%Y')} ({get_turkish_day_name(dt.weekday())})\n"
-            
-        temp = item["main"]["temp"]
-        condition = item["weather"][0]["description"]
-        humidity = item["main"]["humidity"]
-        wind_speed = item["wind"]["speed"]
-        
-        # Emoji selection
-        emoji = get_weather_emoji(condition)
-        
-        result += f"{dt.strftime('%H:%M')} - {emoji} {temp}°C, {condition}, Nem: %{humidity}, Rüzgar: {wind_speed}m/s\n"
-    
-    return result
+    return cached_report(("saatlik_hava_durumu", city_data["name"], gun_sayisi), (forecast_data,),
+                         lambda: hourly_report(city_data["name"], gun_sayisi, forecast_data))
 
 @mcp.tool()
+@timed_tool
 async def hava_kalitesi(sehir: str) -> str:
     """Belirli bir şehir için hava kalitesi endeksi bilgisini alır.
     
     Args:
         sehir: Türkiye'deki şehir adı (örn. İstanbul, Ankara)
     """
-    # Normalize city name and get coordinates
-    normalized_input = normalize_turkish_text(sehir)
-    if normalized_input not in TURKISH_CITIES:
-        return f"'{sehir}' için hava kalitesi bilgisi bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
-    
-    city_data = TURKISH_CITIES[normalized_input]
-    lat, lon = city_data["lat"], city_data["lon"]
+    # Look up the city's coordinates
+    city_data, suggestions = resolve_city(sehir)
+    if city_data is None:
+        return city_not_found(sehir, suggestions, "hava kalitesi bilgisi")
     
     # Use the air quality endpoint
-    air_quality_data = await get_air_quality(lat, lon)
+    air_quality_data = await get_air_quality(city_data["lat"], city_data["lon"])
     
-    if "error" in air_quality_data:
-        if "Demo mode" in air_quality_data["error"]:
-            return generate_demo_air_quality(city_data["name"])
+    if is_error(air_quality_data):
         return f"Hava kalitesi bilgisi alınamadı: {air_quality_data['error']}"
     
     try:
-        aqi_data = air_quality_data.get("list", [{}])[0]
-        aqi = aqi_data.get("main", {}).get("aqi", 0)
-        components = aqi_data.get("components", {})
-        
-        # Interpret AQI value
-        aqi_descriptions = [
-            "Bilgi yok",
-            "İyi", 
-            "Makul", 
-            "Hassas gruplar için sağlıksız", 
-            "Sağlıksız", 
-            "Çok sağlıksız",
-            "Tehlikeli"
-        ]
-        
-        aqi_description = aqi_descriptions[min(aqi, len(aqi_descriptions)-1)]
-        
-        result = f"""🌬️ {city_data['name']} HAVA KALİTESİ 🌬️
-
-Hava Kalitesi Endeksi (AQI): {aqi} - {aqi_description}
-
-🔍 KİRLETİCİLER:
-• Partiküller (PM2.5): {components.get('pm2_5', 'N/A')} μg/m³
-• Partiküller (PM10): {components.get('pm10', 'N/A')} μg/m³
-• Ozon (O₃): {components.get('o3', 'N/A')} μg/m³
-• Nitrojen dioksit (NO₂): {components.get('no2', 'N/A')} μg/m³
-• Kükürt dioksit (SO₂): {components.get('so2', 'N/A')} μg/m³
-• Karbon monoksit (CO): {components.get('co', 'N/A')} μg/m³
-
-💡 TAVSİYELER:
-{get_aqi_recommendations(aqi)}
-"""
-        return result
+        return cached_report(("hava_kalitesi", city_data["name"]), (air_quality_data,),
+                             lambda: air_quality_report(city_data["name"], air_quality_data))
     except Exception as e:
         return f"Hava kalitesi verileri işlenirken bir hata oluştu: {str(e)}"
 
 @mcp.tool()
+@timed_tool
 async def sehirler_karsilastir(sehir1: str, sehir2: str) -> str:
     """İki farklı şehrin hava durumunu karşılaştırır.
     
@@ -241,200 +206,113 @@ async def sehirler_karsilastir(sehir1: str, sehir2: str) -> str:
         sehir1: İlk şehrin adı
         sehir2: İkinci şehrin adı
     """
-    # Normalize city names
-    normalized_input1 = normalize_turkish_text(sehir1)
-    normalized_input2 = normalize_turkish_text(sehir2)
+    # Look up both cities
+    city_data1, suggestions1 = resolve_city(sehir1)
+    city_data2, suggestions2 = resolve_city(sehir2)
     
-    # Check if both cities are in the list
-    if normalized_input1 not in TURKISH_CITIES:
-        return f"'{sehir1}' için hava durumu bilgisi bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
+    # Check if both cities are in the gazetteer
+    if city_data1 is None:
+        return city_not_found(sehir1, suggestions1)
     
-    if normalized_input2 not in TURKISH_CITIES:
-        return f"'{sehir2}' için hava durumu bilgisi bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
+    if city_data2 is None:
+        return city_not_found(sehir2, suggestions2)
     
     # Get weather data for both cities
-    city_data1 = TURKISH_CITIES[normalized_input1]
-    city_data2 = TURKISH_CITIES[normalized_input2]
-    
-    weather_data1 = await get_current_weather(city_data1["lat"], city_data1["lon"])
-    weather_data2 = await get_current_weather(city_data2["lat"], city_data2["lon"])
+    weather_data1, weather_data2 = await fetch_all(
+        get_current_weather(city_data1["lat"], city_data1["lon"]),
+        get_current_weather(city_data2["lat"], city_data2["lon"]))
     
-    if "error" in weather_data1 or "error" in weather_data2:
-        if "Demo mode" in weather_data1.get("error", "") or "Demo mode" in weather_data2.get("error", ""):
-            return generate_demo_city_comparison(city_data1["name"], city_data2["name"])
+    if is_error(weather_data1) or is_error(weather_data2):
         
         errors = []
-        if "error" in weather_data1:
+        if is_error(weather_data1):
             errors.append(f"{city_data1['name']}: {weather_data1['error']}")
-        if "error" in weather_data2:
+        if is_error(weather_data2):
             errors.append(f"{city_data2['name']}: {weather_data2['error']}")
         
+        # One city failed: still report the other one
+        if len(errors) == 1:
+            available_city, available = ((city_data2, weather_data2) if is_error(weather_data1)
+                                         else (city_data1, weather_data1))
+            return partial_comparison_report(errors[0], available_city["name"], available)
+        
         return f"Hava durumu karşılaştırması yapılamadı: {', '.join(errors)}"
     
-    # Extract and compare data
-    temp1 = weather_data1.get("main", {}).get("temp", "N/A")
-    temp2 = weather_data2.get("main", {}).get("temp", "N/A")
-    
-    feels1 = weather_data1.get("main", {}).get("feels_like", "N/A")
-    feels2 = weather_data2.get("main", {}).get("feels_like", "N/A")
-    
-    humidity1 = weather_data1.get("main", {}).get("humidity", "N/A")
-    humidity2 = weather_data2.get("main", {}).get("humidity", "N/A")
-    
-    condition1 = weather_data1.get("weather", [{}])[0].get("description", "N/A")
-    condition2 = weather_data2.get("weather", [{}])[0].get("description", "N/A")
-    
-    wind1 = weather_data1.get("wind", {}).get("speed", "N/A")
-    wind2 = weather_data2.get("wind", {}).get("speed", "N/A")
-    
-    # Comparison texts
-    temp_compare = compare_values(temp1, temp2, "daha sıcak", "daha soğuk")
-    humidity_compare = compare_values(humidity1, humidity2, "daha nemli", "daha kuru")
-    wind_compare = compare_values(wind1, wind2, "daha rüzgarlı", "daha sakin")
-    
-    result = f"""🔄 HAVA DURUMU KARŞILAŞTIRMASI 🔄
-
-┌─────────────────────┬────────────────┬────────────────┐
-│                     │ {city_data1['name']:<14} │ {city_data2['name']:<14} │
-├─────────────────────┼────────────────┼────────────────┤
-│ Sıcaklık            │ {temp1}°C          │ {temp2}°C          │
-│ Hissedilen          │ {feels1}°C          │ {feels2}°C          │
-│ Nem                 │ %{humidity1:<13} │ %{humidity2:<13} │
-│ Rüzgar              │ {wind1} m/s         │ {wind2} m/s         │
-│ Durum               │ {condition1:<14} │ {condition2:<14} │
-└─────────────────────┴────────────────┴────────────────┘
-
-📊 KARŞILAŞTIRMA:
-• {city_data1['name']}, {city_data2['name']}'dan {temp_compare}.
-• {city_data1['name']}, {city_data2['name']}'dan {humidity_compare}.
-• {city_data1['name']}, {city_data2['name']}'dan {wind_compare}.
-"""
-    
-    return result
+    name1, name2 = city_data1["name"], city_data2["name"]
+    return cached_report(("sehirler_karsilastir", name1, name2), (weather_data1, weather_data2),
+                         lambda: comparison_report(name1, weather_data1, name2, weather_data2))
 
 @mcp.tool()
+@timed_tool
 async def havadurumu_aktivite_onerileri(sehir: str) -> str:
     """Belirli bir şehir için hava durumuna göre aktivite önerileri sunar.
     
     Args:
         sehir: Türkiye'deki şehir adı (örn. İstanbul, Ankara)
     """
-    # Normalize city name and get coordinates
-    normalized_input = normalize_turkish_text(sehir)
-    if normalized_input not in TURKISH_CITIES:
-        return f"'{sehir}' için bilgi bulunamadı. Lütfen geçerli bir Türk şehri adı girin."
+    # Look up the city's coordinates
+    city_data, suggestions = resolve_city(sehir)
+    if city_data is None:
+        return city_not_found(sehir, suggestions, "bilgi")
     
-    city_data = TURKISH_CITIES[normalized_input]
     lat, lon = city_data["lat"], city_data["lon"]
     
-    # Get weather data
-    weather_data = await get_current_weather(lat, lon)
-    forecast_data = await get_weather_forecast(lat, lon)
+    # Get weather data; the forecast is only useful together with current weather
+    weather_data, forecast_data = await fetch_all(
+        get_current_weather(lat, lon), get_weather_forecast(lat, lon), fail_fast=True)
     
-    if "error" in weather_data:
-        if "Demo mode" in weather_data.get("error", ""):
-            return generate_demo_activity_recommendations(city_data["name"])
+    if is_error(weather_data):
         return f"Hava durumu bilgisi alınamadı: {weather_data['error']}"
     
-    # Extract current weather data
-    current_temp = weather_data.get("main", {}).get("temp", 20)
-    current_condition = weather_data.get("weather", [{}])[0].get("main", "Clear").lower()
-    current_id = weather_data.get("weather", [{}])[0].get("id", 800)
-    wind_speed = weather_data.get("wind", {}).get("speed", 0)
-    rain_1h = weather_data.get("rain", {}).get("1h", 0)
-    
-    # Check precipitation status (id 2xx: thunderstorm, 3xx: drizzle, 5xx: rain, 6xx: snow)
-    is_precipitating = 200 <= current_id < 700
-    is_thunderstorm = 200 <= current_id < 300
-    is_snowing = 600 <= current_id < 700
-    is_clear = 800 <= current_id <= 801
-    is_cloudy = 802 <= current_id <= 804
-    is_windy = wind_speed > 5.5  # 5.5 m/s is considered moderate wind
-    
-    # Activity recommendations
-    indoor_activities = [
-        "Müze ziyareti",
-        "Alışveriş merkezi gezisi",
-        "Kafe veya restoranda vakit geçirme",
-        "Sinema filmi izleme",
-        "Kitap okuma",
-        "Yerel sergi ziyareti"
-    ]
-    
-    outdoor_activities = [
-        "Yürüyüş yapma",
-        "Bisiklet sürme",
-        "Parkta piknik yapma",
-        "Şehir turu",
-        "Açık hava kafelerinde oturma",
-        "Sahil kenarında gezinme (uygunsa)"
-    ]
-    
-    # Determine activity recommendations based on weather
-    if is_precipitating:
-        recommended = indoor_activities
-        not_recommended = outdoor_activities
-        reason = "yağışlı hava" if not is_snowing else "karlı hava"
-    elif is_windy:
-        recommended = indoor_activities + ["Rüzgardan korunaklı kafelerde oturma"]
-        not_recommended = ["Bisiklet sürme", "Parkta piknik yapma", "Açık hava etkinlikleri"]
-        reason = "rüzgarlı hava"
-    elif current_temp > 30:
-        recommended = ["Plaja gitme (uygunsa)", "Su parkı ziyareti", "Gölgeli parklar", "Klimalı mekanlarda vakit geçirme"]
-        not_recommended = ["Uzun yürüyüşler", "Güneş altında uzun süre kalmak", "Fiziksel olarak yorucu aktiviteler"]
-        reason = "çok sıcak hava"
-    elif current_temp < 5:
-        recommended = indoor_activities + ["Sıcak içeceklerin tadını çıkarma"]
-        not_recommended = ["Uzun süre dışarıda kalmak", "Su aktiviteleri"]
-        reason = "soğuk hava"
-    else:
-        # Nice weather
-        recommended = outdoor_activities
-        not_recommended = []
-        reason = "güzel hava"
-    
-    result = f"""🎯 {city_data['name']} İÇİN AKTİVİTE ÖNERİLERİ 🎯
+    return cached_report(("havadurumu_aktivite_onerileri", city_data["name"]), (weather_data, forecast_data),
+                         lambda: activity_report(city_data["name"], weather_data, forecast_data))
 
-📝 GÜNCEL HAVA DURUMU:
-• Sıcaklık: {current_temp}°C
-• Durum: {weather_data.get("weather", [{}])[0].get("description", "bilinmiyor")}
-• Rüzgar: {wind_speed} m/s
-
-👍 ÖNERİLEN AKTİVİTELER ({reason} için):
-"""
-    
-    for activity in recommended[:5]:  # Show at most 5 recommendations
-        result += f"• {activity}\n"
-        
-    if not_recommended:
-        result += "\n👎 KAÇINILMASI GEREKEN AKTİVİTELER:\n"
-        for activity in not_recommended[:3]:  # Show at most 3 not recommended activities
-            result += f"• {activity}\n"
-    
-    result += f"\n🔮 İLERİYE DÖNÜK TAHMİN:\n"
+@mcp.tool()
+@timed_tool
+async def coklu_sehir_hava_durumu(konumlar: List[str], yarin: bool = False) -> str:
+    """Birden fazla şehir veya koordinat için güncel hava durumunu tek raporda toplar.
     
-    # Show important changes in future forecast
-    if "list" in forecast_data:
-        next_day_forecast = None
-        for item in forecast_data["list"]:
-            dt = datetime.fromtimestamp(item["dt"])
-            if dt.date() > datetime.now().date():
-                next_day_forecast = item
-                break
-                
-        if next_day_forecast:
-            next_temp = next_day_forecast["main"]["temp"]
-            next_condition = next_day_forecast["weather"][0]["description"]
-            next_date = datetime.fromtimestamp(next_day_forecast["dt"]).strftime("%d.%m.%Y")
-            
-            temp_change = next_temp - current_temp
-            temp_change_text = f"{abs(temp_change):.1f}°C daha sıcak" if temp_change > 0 else f"{abs(temp_change):.1f}°C daha soğuk"
-            
-            result += f"• {next_date} tarihinde hava {temp_change_text} olacak ve {next_condition} bekleniyor."
+    Args:
+        konumlar: Şehir adları (örn. İstanbul) veya "enlem,boylam" biçiminde koordinatlar
+        yarin: Yarının en düşük/en yüksek sıcaklık ve yağış tahminini de ekler (varsayılan False)
+    """
+    if not konumlar:
+        return "Lütfen en az bir şehir veya koordinat girin."
+    
+    if len(konumlar) > BATCH_MAX_LOCATIONS:
+        return f"Tek seferde en fazla {BATCH_MAX_LOCATIONS} konum sorgulanabilir."
+    
+    # Resolve every entry to a display name and coordinates
+    locations = []
+    failures = []
+    for entry in konumlar:
+        coordinates = parse_coordinates(entry)
+        if coordinates is not None:
+            locations.append((None, coordinates[0], coordinates[1]))
+            continue
+        city_data, suggestions = resolve_city(entry)
+        if city_data is None:
+            hint = f" (öneriler: {', '.join(city['name'] for city in suggestions)})" if suggestions else ""
+            failures.append(f"{entry}: geçerli bir Türk şehri adı veya koordinat değil{hint}")
+            continue
+        locations.append((city_data["name"], city_data["lat"], city_data["lon"]))
+    
+    coordinates = [(lat, lon) for _, lat, lon in locations]
+    if yarin:
+        # One batch, so both endpoints share the concurrency bound
+        responses = await fetch_batch([(endpoint, lat, lon) for endpoint in ("weather", "forecast")
+                                       for lat, lon in coordinates])
+        results, forecasts = responses[:len(coordinates)], responses[len(coordinates):]
+        sources = tuple(responses)
+    else:
+        results, forecasts = await fetch_many("weather", coordinates), None
+        sources = tuple(results)
     
-    return result
+    return cached_report(("coklu_sehir_hava_durumu", tuple(konumlar), yarin), sources,
+                         lambda: batch_report(len(konumlar), locations, results, forecasts, failures))
 
 @mcp.tool()
+@timed_tool
 async def hava_alarmlari() -> str:
     """Türkiye için aktif hava durumu alarmları ve uyarılarını alır."""
     # Note: OpenWeatherMap has alerts but requires a higher tier subscription
@@ -448,14 +326,65 @@ async def hava_alarmlari() -> str:
 Bu fonksiyon şu anda demo amaçlıdır ve gerçek zamanlı alarm verilerine bağlı değildir."""
 
 @mcp.tool()
+@timed_tool
 async def turk_sehirleri_listesi() -> str:
     """Sistemde kayıtlı Türk şehirlerinin listesini döndürür."""
-    cities = [f"• {city_data['name']}" for city_name, city_data in sorted(TURKISH_CITIES.items())]
-    return "📍 KAYITLI ŞEHİRLER 📍\n\n" + "\n".join(cities)
+    return city_list_report()
+
+@mcp.resource("weather://diagnostics/prefetch", mime_type="application/json")
+def prefetch_durumu() -> str:
+    """Önbellek ısıtıcısının durumu: takip edilen şehirler, sonraki yenileme zamanları ve harcanan çağrı bütçesi."""
+    return json.dumps(prefetcher.state(), ensure_ascii=False, indent=2)
+
+@mcp.resource("weather://diagnostics/ratelimit", mime_type="application/json")
+def api_kotasi() -> str:
+    """OpenWeatherMap çağrı kotası: dakikalık ve günlük kalan çağrılar, kuyruk derinliği ve bekleme süreleri."""
+    return json.dumps(get_rate_limit_stats(), ensure_ascii=False, indent=2)
+
+@mcp.resource("weather://diagnostics/resilience", mime_type="application/json")
+def api_dayanikliligi() -> str:
+    """Yeniden deneme, yedek (hedged) istek ve devre kesici sayaçları ile uç nokta bazında devre durumları."""
+    return json.dumps(get_resilience_stats(), ensure_ascii=False, indent=2)
+
+@mcp.resource("weather://diagnostics/metrics", mime_type="application/json")
+def metrikler() -> str:
+    """Araç ve OpenWeatherMap çağrılarının gecikme dağılımları (p50/p95/p99), hata sınıfları, süren çağrı sayıları ve önbellek isabet oranı."""
+    return json.dumps(metrics.snapshot(), ensure_ascii=False, indent=2)
+
+@mcp.resource("weather://diagnostics/traces", mime_type="application/json")
+def izler() -> str:
+    """Son araç çağrılarının izleri (en yavaşı önce): her aşamanın (yer çözümleme, önbellek, kota, ağ, JSON çözme, biçimlendirme) süresi. WEATHER_TRACING=local ile açılır."""
+    return json.dumps({"mode": tracer.mode, "traces": tracer.recent_traces()}, ensure_ascii=False, indent=2)
+
+@mcp.resource("weather://diagnostics/profile", mime_type="application/json")
+def profil() -> str:
+    """Örnekleyici profil aracının durumu ve en yavaş araç çağrılarının en sık görülen yığınları. SIGUSR2 ile açılıp kapatılır."""
+    return json.dumps(profiler.state(), ensure_ascii=False, indent=2)
+
+@mcp.resource("weather://diagnostics/profile.folded", mime_type="text/plain")
+def profil_yiginlari() -> str:
+    """En yavaş araç çağrılarının yığınları, flamegraph.pl ve speedscope'un okuduğu katlanmış (folded) biçimde."""
+    return profiler.folded()
 
 if __name__ == "__main__":
+    import argparse
+
+    from config import HTTP_SERVER_HOST, HTTP_SERVER_PORT, SERVER_WORKERS
+
+    parser = argparse.ArgumentParser(description="Türkiye hava durumu MCP sunucusu")
+    parser.add_argument("--transport", choices=("stdio", "streamable-http"), default="stdio",
+                        help="stdio: tek istemci; streamable-http: çok istemcili HTTP sunucusu")
+    parser.add_argument("--host", default=HTTP_SERVER_HOST, help="HTTP sunucusunun dinlediği adres")
+    parser.add_argument("--port", type=int, default=HTTP_SERVER_PORT, help="HTTP sunucusunun portu")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="HTTP sunucusunun işçi süreç sayısı")
+    args = parser.parse_args()
+
     # Initialize and run the server
     try:
-        mcp.run(transport='stdio')
+        if args.transport == "streamable-http":
+            from http_server import serve
+            serve(args.host, args.port, max(1, args.workers))
+        else:
+            mcp.run(transport='stdio')
     except Exception as e:
         print(f"Uygulama başlatılırken bir hata oluştu: {e}")
\ No newline at end of file